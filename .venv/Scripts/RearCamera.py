@@ -0,0 +1,302 @@
+import time
+import io
+import threading
+from collections import deque
+import cv2 # Import OpenCV
+try:
+    from picamera2 import Picamera2, Preview
+    from libcamera import controls # For autofocus modes
+except ImportError as e:
+    # Not a Raspberry Pi (e.g. benchmarks with a simulated camera): Picamera2 can be replaced
+    # by assigning RearCamera.Picamera2 before creating a RearCamera.
+    print(f"RearCamera: picamera2/libcamera not available: {e}")
+    Picamera2 = None
+    Preview = None
+    controls = None
+
+# --- Encoder / adaptive quality settings ---
+FRAME_RING_SIZE = 3             # Number of encoded frames kept in the ring buffer
+JPEG_QUALITY_MAX = 85
+JPEG_QUALITY_MIN = 40
+JPEG_QUALITY_STEP = 10
+SCALE_LEVELS = (1.0, 0.75, 0.5) # Output scale steps, used once quality is already at minimum
+ENCODE_BUDGET_S = 0.020         # Target encode time per frame
+RECOVER_AFTER_FRAMES = 30       # Frames within budget before quality is raised again
+ENCODE_TIME_SMOOTHING = 0.2     # EMA factor for the encode time
+
+
+class EncodedFrame:
+    """One JPEG frame from the ring buffer. `data` is the numpy buffer from cv2.imencode (zero-copy capable)."""
+    __slots__ = ("seq", "data", "capture_time", "encode_time", "quality", "scale")
+
+    def __init__(self, seq, data, capture_time, encode_time, quality, scale):
+        self.seq = seq
+        self.data = data
+        self.capture_time = capture_time
+        self.encode_time = encode_time
+        self.quality = quality
+        self.scale = scale
+
+
+class RearCamera:
+    def __init__(self, resolution=(640, 480), framerate=30, target_fps=15):
+        self.picam2 = None
+        self.resolution = resolution
+        self.framerate = framerate
+        self.target_fps = target_fps
+        self.is_streaming = False
+        self._preview_active = False  # To manage X11 preview if used for debugging
+        self._configured = False
+
+        # Capture/encode worker
+        self._worker_thread = None
+        self._quit_worker = threading.Event()
+        self._capture_enabled = threading.Event()
+        self._worker_idle = threading.Event()
+        self._worker_idle.set()
+        self._frames = deque(maxlen=FRAME_RING_SIZE)
+        self._frames_lock = threading.Lock()
+        self._frame_seq = 0
+        self._last_taken_seq = 0
+
+        # Adaptive quality state
+        self.jpeg_quality = JPEG_QUALITY_MAX
+        self._scale_index = 0
+        self._encode_time_ema = 0.0
+        self._frames_within_budget = 0
+        self._congestion_reported = False
+
+        # Metrics
+        self.frames_encoded = 0
+        self.frames_dropped = 0
+        self.last_time_to_first_frame = None
+        self._stream_start_time = None
+
+        if Picamera2 is None:
+            print("RearCamera: Picamera2 not available, camera disabled.")
+            return
+        try:
+            self.picam2 = Picamera2()
+            print("RearCamera: Picamera2 object created.")
+        except Exception as e:
+            print(f"RearCamera: Error initializing Picamera2: {e}")
+            self.picam2 = None  # Ensure it's None if initialization fails
+            return
+
+        # Warm standby: configure once, start/stop later only pauses the sensor
+        self._configure()
+
+    def _configure(self):
+        try:
+            # Configure for video recording, which is suitable for streaming frames
+            config = self.picam2.create_video_configuration(
+                main={"size": self.resolution, "format": "RGB888"},
+                # MJPEG can also be an option if capturing directly to it
+                controls={"FrameRate": float(self.framerate)}
+            )
+            self.picam2.configure(config)
+            self._configured = True
+            print(f"RearCamera: Configured once for {self.resolution} @ {self.framerate}fps (warm standby).")
+        except Exception as e:
+            print(f"RearCamera: Error configuring camera: {e}")
+            self._configured = False
+        return self._configured
+
+    def start_stream(self):
+        if not self.picam2:
+            print("RearCamera: Cannot start stream, Picamera2 not initialized.")
+            return False
+        if self.is_streaming:
+            print("RearCamera: Stream already started.")
+            return True
+        if not self._configured and not self._configure():
+            return False
+
+        try:
+            # Optional: Autofocus settings
+            # self.picam2.set_controls({"AfMode": controls.AfModeEnum.Continuous, "AfSpeed": controls.AfSpeedEnum.Fast})
+
+            self._stream_start_time = time.monotonic()
+            self.last_time_to_first_frame = None
+            self.picam2.start()
+            self.is_streaming = True
+            with self._frames_lock:
+                self._frames.clear()
+                self._last_taken_seq = self._frame_seq
+            self._ensure_worker()
+            self._worker_idle.clear()
+            self._capture_enabled.set()
+            print(f"RearCamera: Stream started at {self.resolution} @ {self.framerate}fps.")
+            # For local debugging on a connected display (remove for headless operation)
+            # self.picam2.start_preview(Preview.QTGL) # Or Preview.DRM for console
+            # self._preview_active = True
+            return True
+        except Exception as e:
+            print(f"RearCamera: Error starting stream: {e}")
+            self.is_streaming = False
+            return False
+
+    def stop_stream(self):
+        if not self.picam2 or not self.is_streaming:
+            # print("RearCamera: Stream not active or Picamera2 not initialized.") # Can be noisy
+            return
+        try:
+            # Pause the worker first so capture_array is not running while the sensor stops
+            self._capture_enabled.clear()
+            self._worker_idle.wait(timeout=1.0)
+            # if self._preview_active:
+            #     self.picam2.stop_preview()
+            #     self._preview_active = False
+            self.picam2.stop()
+            self.is_streaming = False
+            print("RearCamera: Stream stopped (configuration kept).")
+        except Exception as e:
+            print(f"RearCamera: Error stopping stream: {e}")
+
+    def _ensure_worker(self):
+        if self._worker_thread and self._worker_thread.is_alive():
+            return
+        self._quit_worker.clear()
+        self._worker_thread = threading.Thread(target=self._capture_encode_thread_func,
+                                               name="RearCameraWorker", daemon=True)
+        self._worker_thread.start()
+
+    def _capture_encode_thread_func(self):
+        print("RearCamera: Capture/encode worker started.")
+        frame_interval = 1.0 / self.target_fps if self.target_fps else 0.0
+        next_capture = time.monotonic()
+        while not self._quit_worker.is_set():
+            if not self._capture_enabled.is_set():
+                self._worker_idle.set()
+                self._capture_enabled.wait(timeout=0.5)
+                next_capture = time.monotonic()
+                continue
+            self._worker_idle.clear()
+
+            # Only capture at the rate we actually publish
+            delay = next_capture - time.monotonic()
+            if delay > 0:
+                self._quit_worker.wait(delay)
+                continue
+            next_capture += frame_interval
+            if next_capture < time.monotonic():
+                next_capture = time.monotonic()
+
+            try:
+                frame = self._capture_and_encode()
+            except Exception as e:
+                print(f"RearCamera: Error capturing or encoding frame: {e}")
+                frame = None
+            if frame is None:
+                continue
+
+            with self._frames_lock:
+                self._frames.append(frame)
+            if self.last_time_to_first_frame is None and self._stream_start_time is not None:
+                self.last_time_to_first_frame = frame.capture_time + frame.encode_time - self._stream_start_time
+            self._adapt_quality(frame.encode_time)
+        self._worker_idle.set()
+        print("RearCamera: Capture/encode worker finished.")
+
+    def _capture_and_encode(self):
+        # Capture the image as a numpy array from the main stream (e.g. RGB888)
+        frame_array = self.picam2.capture_array("main")
+        if frame_array is None:
+            return None
+        capture_time = time.monotonic()
+
+        quality = self.jpeg_quality
+        scale = SCALE_LEVELS[self._scale_index]
+        if scale < 1.0:
+            frame_array = cv2.resize(frame_array, None, fx=scale, fy=scale, interpolation=cv2.INTER_AREA)
+        is_success, jpeg_bytes_ndarray = cv2.imencode(".jpg", frame_array, [cv2.IMWRITE_JPEG_QUALITY, quality])
+        encode_time = time.monotonic() - capture_time
+        if not is_success:
+            return None
+
+        self._frame_seq += 1
+        self.frames_encoded += 1
+        return EncodedFrame(self._frame_seq, jpeg_bytes_ndarray, capture_time, encode_time, quality, scale)
+
+    def _adapt_quality(self, encode_time):
+        """Lowers quality/resolution when encoding or sending is over budget, raises it again slowly."""
+        if self._encode_time_ema == 0.0:
+            self._encode_time_ema = encode_time
+        else:
+            self._encode_time_ema += ENCODE_TIME_SMOOTHING * (encode_time - self._encode_time_ema)
+
+        congested = self._congestion_reported
+        self._congestion_reported = False
+        if congested or self._encode_time_ema > ENCODE_BUDGET_S:
+            self._frames_within_budget = 0
+            if self.jpeg_quality > JPEG_QUALITY_MIN:
+                self.jpeg_quality = max(JPEG_QUALITY_MIN, self.jpeg_quality - JPEG_QUALITY_STEP)
+            elif self._scale_index < len(SCALE_LEVELS) - 1:
+                self._scale_index += 1
+            return
+
+        if self._encode_time_ema < ENCODE_BUDGET_S * 0.5:
+            self._frames_within_budget += 1
+            if self._frames_within_budget >= RECOVER_AFTER_FRAMES:
+                self._frames_within_budget = 0
+                if self._scale_index > 0:
+                    self._scale_index -= 1
+                elif self.jpeg_quality < JPEG_QUALITY_MAX:
+                    self.jpeg_quality = min(JPEG_QUALITY_MAX, self.jpeg_quality + JPEG_QUALITY_STEP)
+
+    def report_congestion(self):
+        """Called by the publisher when the previous frame is still queued in ZMQ."""
+        self._congestion_reported = True
+        self.frames_dropped += 1
+
+    def get_latest_frame(self):
+        """
+        Returns the newest encoded frame that has not been handed out yet (EncodedFrame) or None.
+        Never blocks on the camera.
+        """
+        with self._frames_lock:
+            if not self._frames:
+                return None
+            frame = self._frames[-1]
+            if frame.seq <= self._last_taken_seq:
+                return None
+            if self._last_taken_seq and frame.seq - self._last_taken_seq > 1:
+                # Frames encoded in between were superseded and are never published
+                self.frames_dropped += frame.seq - self._last_taken_seq - 1
+            self._last_taken_seq = frame.seq
+            return frame
+
+    def get_frame(self):
+        """Compatibility wrapper: newest frame as bytes (copies, prefer get_latest_frame)."""
+        if not self.picam2 or not self.is_streaming:
+            return None
+        frame = self.get_latest_frame()
+        return frame.data.tobytes() if frame is not None else None
+
+    def get_stats(self) -> dict:
+        return {
+            "encode_ms_avg": self._encode_time_ema * 1000.0,
+            "frames_encoded": self.frames_encoded,
+            "frames_dropped": self.frames_dropped,
+            "jpeg_quality": self.jpeg_quality,
+            "scale": SCALE_LEVELS[self._scale_index],
+            "time_to_first_frame_ms": (self.last_time_to_first_frame * 1000.0
+                                       if self.last_time_to_first_frame is not None else None),
+        }
+
+    def close(self):
+        self.stop_stream()
+        self._quit_worker.set()
+        self._capture_enabled.set()  # Wake the worker so it can exit
+        if self._worker_thread and self._worker_thread.is_alive():
+            self._worker_thread.join(timeout=1.0)
+        self._worker_thread = None
+
+    def __del__(self):
+        self.close()
+        if self.picam2:
+            try:
+                self.picam2.close()  # Properly release the camera
+                print("RearCamera: Picamera2 object closed.")
+            except Exception as e:
+                print(f"RearCamera: Error closing Picamera2 object: {e}")
@@ -0,0 +1,1138 @@
+import zmq
+import subprocess
+import time
+import re
+import netifaces
+import sys
+import socket  # Für UDP-Broadcast
+import random
+import struct
+from WheelchairControlReal import WheelchairControlReal
+from RearCamera import RearCamera
+from drive_control import DriveControlThread, DRIVE_CONTROL_RATE_HZ, SOURCE_ML2
+import ipc_control
+import protocol
+import os
+import json
+
+# --- Konstanten ---
+HEARTBEAT_INTERVAL = 2  # Sekunden (Heartbeat-Intervall vom *Client*)
+RECONNECT_INTERVAL = 10# Sekunden (Heartbeat-Timeout, danach gilt die Verbindung als abgebrochen)
+HEARTBEAT_INTERVAL_RLINK = 0.2  # Sekunden, Heartbeat ZUM Rollstuhl (auch während die ML2 fehlt)
+INITIAL_CONNECTION_TIMEOUT = 30  # Sekunden (Timeout für das erste "READY"-Signal)
+BROADCAST_PORT = 50000     # Port für UDP-Broadcast (optional)
+PC_IP_FILE = "pc_ip.txt"   # Wird per adb push auf die ML2 kopiert ("ip:port")
+# Lokaler Betrieb ohne ADB (z.B. mit ml2_sim_client.py und RLINK_BACKEND=sim):
+# ML2_IP überspringt die ADB-Ermittlung und das adb push, PC_BIND_IP die Schnittstellensuche.
+ML2_IP_OVERRIDE = os.environ.get("ML2_IP")
+PC_IP_OVERRIDE = os.environ.get("PC_BIND_IP")
+
+# --- ZeroMQ-Kontext erstellen ---
+context = zmq.Context()
+
+# --- Globale Variablen ---
+magic_leap_ip = None  # IP-Adresse der Magic Leap 2
+last_heartbeat = 0    # Zeitpunkt des letzten empfangenen Heartbeats
+publisher_socket = None # Publisher Socket (zum Senden von Daten)
+subscriber_socket = None # Subscriber Socket (zum Empfangen von Heartbeats und READY)
+ml2_session_active = False # True zwischen READY und Verbindungsabbruch
+wheelchair = WheelchairControlReal()
+
+# --- Camera ---
+rear_camera = None # Initialize rear_camera
+camera_stream_active = False # Track camera state
+MIN_REVERSE_SPEED_THRESHOLD = -0.1
+last_frame_send_time = 0
+VIDEO_FRAME_RATE = 15
+VIDEO_FRAME_INTERVAL = 1.0 / VIDEO_FRAME_RATE
+last_frame_tracker = None # zmq.MessageTracker des zuletzt (zero-copy) gesendeten Frames
+camera_first_frame_pending = False # Für die Messung "Rückwärts -> erstes gesendetes Bild"
+camera_start_time = 0
+
+# --- Globale Variablen für ML2 Konfig-Senden ---
+CONFIG_TRIGGER_FILE = "send_ml2_config_trigger.flag" # Wie in app.py definiert
+last_config_send_time = 0 # Zeitstempel des letzten Config-Sendens
+
+JOYSTICK_VISIBILITY_TRIGGER_FILE = "/tmp/joystick_visibility_trigger.txt"
+GAMEPAD_MODE_TRIGGER_FILE = "/tmp/gamepad_mode_trigger.txt"
+gamepad_control_is_active_by_trigger = False
+gamepad_status_published = False # Zuletzt an die ML2 gemeldeter Gamepad-Status
+
+# --- Lokaler Steuerkanal zu app.py (ersetzt das Polling der Trigger-Dateien) ---
+control_socket = None # REP-Socket auf ipc_control.CONTROL_ENDPOINT
+# Trigger-Dateien bleiben als Fallback, werden aber nur noch in diesem Intervall geprüft
+FILE_TRIGGER_POLL_INTERVAL = 0.5 # Sekunden
+last_file_trigger_poll = 0
+
+try:
+    from gamepad_controller import GamepadController  # Annahme: gamepad_controller.py ist im selben Verzeichnis
+except ImportError as e:
+    print(f"Fehler: gamepad_controller.py nicht gefunden: {e}", file=sys.stderr)
+    GamepadController = None  # Ermöglicht Start auch ohne Gamepad-Modul
+    print("WARNUNG: Gamepad-Steuerung wird nicht verfügbar sein.")
+
+gamepad_ctrl: GamepadController | None = None
+
+# --- Fahrsteuerung auf eigenem Thread (Latest-Wins) ---
+# True: joystickPos wird nur im Latest-Wins-Slot der Quelle "ml2" abgelegt, set_direction + Rampe
+#       laufen mit fester Rate (DRIVE_CONTROL_RATE_HZ) im DriveControlThread. Dieser ist der einzige
+#       Schreiber auf RLink (auch Heartbeat, Hupe, Licht) und entscheidet zwischen ML2 und Gamepad.
+# False: Altes Verhalten, set_direction direkt pro empfangener Nachricht.
+USE_DRIVE_CONTROL_THREAD = True
+MAX_MESSAGES_PER_PASS = 200  # Obergrenze, wie viele Nachrichten pro Schleifendurchlauf abgeholt werden
+LATENCY_REPORT_INTERVAL = 10  # Sekunden zwischen Latenz-Ausgaben (0 = aus)
+drive_control: DriveControlThread | None = None
+
+# --- Binäres State-/Input-Frame-Protokoll (protocol.py) ---
+# Clients, die b"input"-Frames schicken, bekommen statt der Einzel-Topics (gear, lights, warn,
+# kantelung, topic_float) einen State-Frame pro Tick. Ältere Clients bleiben beim alten Protokoll.
+USE_STATE_FRAMES = True
+STATE_FRAME_INTERVAL = 1.0 / 20  # Sekunden zwischen State-Frames
+binary_client_active = False # True, sobald die ML2 in dieser Sitzung Input-Frames sendet
+state_frame_seq = 0
+last_state_frame_send = 0
+input_link_stats = protocol.LinkStats()
+last_input_levels = 0
+last_input_event_id = None
+
+# --- Schnelles Wiederverbinden ---
+# Nach einem Abbruch bleiben Publisher (fester Port), Subscriber, Kamera und RLink bestehen.
+# libzmq verbindet den Subscriber selbst mit exponentiellem Backoff neu; die ML2 wird ohne
+# erneutes ADB/adb push wieder aufgenommen, sobald wieder Nachrichten (READY oder Heartbeat) kommen.
+RECONNECT_BACKOFF_INITIAL = 0.02  # Sekunden, Wartezeit nach dem ersten Fehlschlag (verdoppelt sich)
+RECONNECT_BACKOFF_MAX = 5.0
+RECONNECT_BACKOFF_RESET = 5.0     # Sekunden fehlerfreie Sitzung, danach beginnt der Backoff wieder von vorn
+ZMQ_RECONNECT_IVL_MS = 10         # Erster TCP-Reconnect-Versuch des Subscribers
+ZMQ_RECONNECT_IVL_MAX_MS = 1000   # Obergrenze des exponentiellen Backoffs von libzmq
+RESUME_WINDOW = 30.0              # Sekunden Warten auf bekannter Adresse, bevor die ML2-IP neu ermittelt wird
+cached_pc_ip = None               # Eigene IP im Subnetz der ML2 (zu magic_leap_ip)
+last_ml2_ip = None                # Zuletzt ermittelte ML2-IP (bleibt erhalten, wenn magic_leap_ip zur Neuermittlung geleert wird)
+publisher_port = None             # Bleibt über Neuverbindungen gleich
+subscriber_endpoint = None
+pushed_address = None             # (pc_ip, port), zuletzt erfolgreich per adb push übertragen
+session_resumable = False         # Es gab bereits eine Sitzung mit dieser ML2
+last_ml2_message_time = 0.0       # time.monotonic() der letzten Nachricht von der ML2
+outage_start_time = None          # last_ml2_message_time beim erkannten Abbruch, bis wieder gefahren wird
+dropout_detected_time = None
+reconnect_stats = {"dropouts": 0, "resumed": 0, "last_time_to_drive_ms": None, "max_time_to_drive_ms": 0.0}
+
+# Vorkompilierte Structs (Network Byte Order = Big-Endian, unabhängig vom Host)
+NETWORK_STRUCTS = {
+    'i': struct.Struct('>i'),  # Integer
+    'f': struct.Struct('>f'),  # Float
+    'd': struct.Struct('>d'),  # Double
+    '?': struct.Struct('?'),   # Bool
+}
+
+
+def to_network_order(value, data_type):
+    try:
+        return NETWORK_STRUCTS[data_type].pack(value)
+    except KeyError:
+        raise ValueError("Ungültiger Datentyp")
+
+
+def from_network_order(data, data_type):
+    """Konvertiert einen Wert von Big-Endian (Network Byte Order) zum Host-System."""
+    try:
+        return NETWORK_STRUCTS[data_type].unpack(data)[0]
+    except KeyError:
+        raise ValueError("Ungültiger Datentyp")
+
+
+def get_correct_network_interface(magic_leap_ip):
+    """
+    Findet die Netzwerkschnittstelle des PCs, die im gleichen Subnetz wie die
+    Magic Leap 2 ist.  Wird benötigt, um die *eigene* IP-Adresse des PCs zu
+    bestimmen, an die der PublisherSocket gebunden werden soll.
+    """
+    if not magic_leap_ip:  # Stelle sicher, dass eine IP-Adresse vorhanden ist
+        return None
+
+    try:
+        magic_leap_subnet = ".".join(magic_leap_ip.split(".")[:3])  # z.B. "192.168.1"
+        interfaces = netifaces.interfaces()  # Liste aller Netzwerkschnittstellen
+        for interface in interfaces:
+            try:
+                iface_details = netifaces.ifaddresses(interface)  # Details der Schnittstelle
+                if netifaces.AF_INET in iface_details:  # IPv4-Adressen?
+                    ipv4_details = iface_details[netifaces.AF_INET]
+                    for ip_info in ipv4_details:
+                        ip_address = ip_info['addr']  # IP-Adresse der Schnittstelle
+                        if ip_address != '127.0.0.1':  # Loopback-Adresse ignorieren
+                            interface_subnet = ".".join(ip_address.split(".")[:3])
+                            if interface_subnet == magic_leap_subnet:  # Passt das Subnetz?
+                                print(f"Korrekte Schnittstelle gefunden: {interface} ({ip_address})")
+                                return ip_address  # Korrekte IP-Adresse zurückgeben
+            except Exception as e:
+                print(f"Fehler bei der Überprüfung der Schnittstelle {interface}: {e}")
+                # Bei Fehlern einfach weitermachen mit der nächsten Schnittstelle
+        return None  # Keine passende Schnittstelle gefunden
+
+    except Exception as e:
+        print(f"Unerwarteter Fehler in get_correct_network_interface: {e}")
+        return None
+
+
+def get_magic_leap_ip_adb():
+    """Ermittelt die IP-Adresse der Magic Leap 2 über ADB (zuverlässiger)."""
+    try:
+        start_time = time.time()
+        timeout = 10
+
+        while time.time() - start_time < timeout:
+            # 'adb shell ip route' gibt die Routing-Tabelle aus.
+            # Die Ausgabe ist je nach Android-Version und Gerät unterschiedlich.
+            # Das folgende Kommando funktioniert auf der ML2 und filtert die Ausgabe.
+            result = subprocess.run(['adb', 'shell', 'ip', 'route'], capture_output=True, text=True, check=True)
+
+            # Suche nach der Zeile, die "wlan0" oder "usb0" enthält (oder den Namen des Netzwerkadapters)
+            for line in result.stdout.splitlines():
+                if "dev mlnet0" or "eth1" in line:  # <---  Anpassen, falls nötig!
+                    # Extrahiere die IP-Adresse nach "src"
+                    match = re.search(r'src (\d{1,3}\.\d{1,3}\.\d{1,3}\.\d{1,3})', line)
+                    if match:
+                        ip_address = match.group(1)
+                        print(f"Magic Leap 2 IP-Adresse (über ip route): {ip_address}")
+                        return ip_address
+
+            time.sleep(1)  # Kurze Pause, bevor der Befehl erneut ausgeführt wird.
+
+        print("Timeout beim Ermitteln der IP-Adresse über ADB.")
+        return None
+
+    except subprocess.CalledProcessError as e:
+        print(f"Fehler bei der Ausführung von 'adb shell ip route': {e}, Rückgabecode: {e.returncode}, Ausgabe: {e.output}")
+        return None
+    except Exception as e:
+        print(f"Unerwarteter Fehler bei der ADB-IP-Ermittlung: {e}")
+        return None
+
+
+def send_pc_ip_and_port(magic_leap_ip, port, pc_ip=None):
+    """Schreibt die IP-Adresse des PCs *und* den Port in eine Datei."""
+    try:
+        correct_interface_ip = pc_ip or get_correct_network_interface(magic_leap_ip)
+        if not correct_interface_ip:
+            print("Keine passende Netzwerkschnittstelle gefunden.")
+            return False
+
+        temp_file = PC_IP_FILE
+        with open(temp_file, "w") as f:
+            f.write(f"{correct_interface_ip}:{port}")  # IP und Port, getrennt durch :
+
+        if ML2_IP_OVERRIDE:
+            # Lokaler Client liest die Datei direkt, kein adb push
+            print(f"PC IP-Adresse ({correct_interface_ip}) und Port ({port}) nach {temp_file} geschrieben.")
+            return True
+        subprocess.run(['adb', 'push', temp_file, '/storage/emulated/0/Android/data/de.IMC.EyeJoystick/files'], check=True)
+        print(f"PC IP-Adresse ({correct_interface_ip}) und Port ({port}) auf Magic Leap 2 kopiert.")
+        return True
+
+    except subprocess.CalledProcessError as e:
+        print(f"Fehler beim Kopieren der Datei (adb push): {e}")
+        return False
+    except Exception as e:
+        print(f"Fehler beim Schreiben/Kopieren der IP-Adresse und des Ports: {e}")
+        return False
+
+def set_gamepad_mode(enable: bool) -> bool:
+    """
+    Aktiviert/deaktiviert die Gamepad-Steuerung. Gibt den angeforderten Status zurück.
+    Das Aktivieren blockiert nicht: die Gerätesuche läuft im Hintergrund, das Ergebnis liefern
+    get_gamepad_status()/is_gamepad_starting() und check_gamepad_state() meldet es der ML2.
+    """
+    global gamepad_ctrl, gamepad_control_is_active_by_trigger
+
+    if enable:
+        if GamepadController and (gamepad_ctrl is None or gamepad_ctrl.quit_event.is_set()):
+            print("[ZMQ-Server] Aktiviere Gamepad-Steuerung...")
+            gamepad_ctrl = GamepadController(wheelchair, drive_control)  # Mit drive_control: Eingabequelle statt eigener Schreiber
+            if not gamepad_ctrl.start(wait=False):
+                print("[ZMQ-Server] WARNUNG: GamepadController konnte nicht gestartet werden.", file=sys.stderr)
+                gamepad_ctrl = None
+                gamepad_control_is_active_by_trigger = False
+            else:
+                print("[ZMQ-Server] GamepadController gestartet, suche Gamepad...")
+                gamepad_control_is_active_by_trigger = True
+        elif gamepad_ctrl and not gamepad_ctrl.quit_event.is_set():
+            print("[ZMQ-Server] Gamepad-Steuerung ist bereits aktiv.")
+            gamepad_control_is_active_by_trigger = True
+        else:
+            print("[ZMQ-Server] GamepadController Modul nicht geladen, kann nicht aktiviert werden.")
+            gamepad_control_is_active_by_trigger = False
+    else:
+        if gamepad_ctrl and not gamepad_ctrl.quit_event.is_set():
+            print("[ZMQ-Server] Deaktiviere Gamepad-Steuerung...")
+            gamepad_ctrl.stop()
+            print("[ZMQ-Server] GamepadController gestoppt.")
+        gamepad_ctrl = None
+        gamepad_control_is_active_by_trigger = False
+
+    check_gamepad_state()
+    return gamepad_control_is_active_by_trigger
+
+
+def get_gamepad_status() -> bool:
+    """Tatsächlicher Status: Flag gesetzt, Gamepad gefunden UND Controller-Threads laufen noch."""
+    return bool(gamepad_control_is_active_by_trigger and gamepad_ctrl and gamepad_ctrl.is_ready())
+
+
+def is_gamepad_starting() -> bool:
+    return bool(gamepad_control_is_active_by_trigger and gamepad_ctrl and gamepad_ctrl.is_starting())
+
+
+def check_gamepad_state():
+    """
+    Übernimmt Zustandswechsel des Gamepads (gefunden, nicht gefunden, beendet) und sendet den
+    tatsächlichen Status an die ML2, wenn er sich geändert hat.
+    """
+    global gamepad_ctrl, gamepad_control_is_active_by_trigger, gamepad_status_published
+
+    if gamepad_control_is_active_by_trigger and gamepad_ctrl and gamepad_ctrl.quit_event.is_set():
+        print("[ZMQ-Server] WARNUNG: Gamepad nicht gefunden oder Controller beendet.", file=sys.stderr)
+        gamepad_ctrl.stop()
+        gamepad_ctrl = None
+        gamepad_control_is_active_by_trigger = False
+    status = get_gamepad_status()
+    if is_gamepad_starting() or status == gamepad_status_published:
+        return
+    gamepad_status_published = status
+    print(f"[ZMQ-Server] Gamepad-Status: {'AN' if status else 'AUS'}")
+    # Sende den neuen Status an die ML2, damit sie es ggf. anzeigen kann
+    if publisher_socket and not publisher_socket.closed:
+        publisher_socket.send_multipart([b"gamepad_status", to_network_order(status, '?')])
+
+
+def send_joystick_visibility_toggle() -> bool:
+    if publisher_socket and not publisher_socket.closed:
+        print("Sende 'joystick_toggle_visibility' an ML2...")
+        publisher_socket.send_multipart([b"joystick_toggle_visibility", b""])
+        return True
+    print("Fehler: ZMQ Publisher-Socket nicht bereit für Joystick-Toggle.", file=sys.stderr)
+    return False
+
+
+def send_ml2_config(config_json_str: str) -> bool:
+    if not config_json_str:
+        return False
+    if publisher_socket and not publisher_socket.closed:
+        print(f"Sende ML2 Joystick Konfiguration (Länge: {len(config_json_str)})...")
+        publisher_socket.send_multipart([b"joystick_settings", config_json_str.encode('utf-8')])
+        return True
+    print("Fehler: ZMQ Publisher-Socket nicht bereit für ML2-Konfiguration.", file=sys.stderr)
+    return False
+
+
+def process_gamepad_mode_trigger():
+    """Fallback: Gamepad-Modus über Trigger-Datei."""
+    if os.path.exists(GAMEPAD_MODE_TRIGGER_FILE):
+        try:
+            with open(GAMEPAD_MODE_TRIGGER_FILE, "r") as f:
+                content = f.read().strip()
+            command_part = content.split(":")[0]
+
+            if command_part == "ENABLE_GAMEPAD":
+                set_gamepad_mode(True)
+            elif command_part == "DISABLE_GAMEPAD":
+                set_gamepad_mode(False)
+
+            os.remove(GAMEPAD_MODE_TRIGGER_FILE)
+            print("[ZMQ-Server] Gamepad-Modus-Trigger verarbeitet.")
+        except Exception as e_gp_trigger:
+            print(f"[ZMQ-Server] Fehler Verarbeitung Gamepad-Modus-Trigger: {e_gp_trigger}", file=sys.stderr)
+
+
+def process_joystick_visibility_trigger():
+    """Fallback: Joystick-Sichtbarkeit über Trigger-Datei."""
+    if os.path.exists(JOYSTICK_VISIBILITY_TRIGGER_FILE):
+        try:
+            print(f"Trigger-Datei '{JOYSTICK_VISIBILITY_TRIGGER_FILE}' gefunden.")
+            send_joystick_visibility_toggle()
+
+            # Trigger-Datei löschen, um erneutes Ausführen zu verhindern
+            try:
+                os.remove(JOYSTICK_VISIBILITY_TRIGGER_FILE)
+                print(f"Trigger-Datei '{JOYSTICK_VISIBILITY_TRIGGER_FILE}' gelöscht.")
+            except OSError as e_remove:
+                print(
+                    f"Fehler beim Löschen der Trigger-Datei '{JOYSTICK_VISIBILITY_TRIGGER_FILE}': {e_remove}",
+                    file=sys.stderr)
+        except Exception as e_trigger:
+            print(f"Fehler bei der Verarbeitung der Joystick-Sichtbarkeits-Trigger-Datei: {e_trigger}",
+                  file=sys.stderr)
+
+
+def process_ml2_config_trigger():
+    """Fallback: ML2-Konfiguration über Trigger-Datei."""
+    global last_config_send_time
+
+    if os.path.exists(CONFIG_TRIGGER_FILE):
+        try:
+            trigger_timestamp = os.path.getmtime(CONFIG_TRIGGER_FILE)
+            if trigger_timestamp > last_config_send_time:
+                with open(CONFIG_TRIGGER_FILE, 'r') as f:
+                    config_json_str = f.read()
+
+                if config_json_str and publisher_socket:
+                    if send_ml2_config(config_json_str):
+                        last_config_send_time = trigger_timestamp
+                    try:
+                        os.remove(CONFIG_TRIGGER_FILE)
+                        print("Trigger-Datei für ML2-Konfig gelöscht.")
+                    except OSError as e_remove:
+                        print(f"Fehler beim Löschen der Trigger-Datei '{CONFIG_TRIGGER_FILE}': {e_remove}")
+                elif not config_json_str:  # Falls Datei leer ist
+                    print("Trigger-Datei ist leer, lösche sie.")
+                    try:
+                        os.remove(CONFIG_TRIGGER_FILE)
+                    except OSError as e_remove:
+                        print(
+                            f"Fehler beim Löschen der leeren Trigger-Datei '{CONFIG_TRIGGER_FILE}': {e_remove}")
+        except FileNotFoundError:
+            pass
+        except Exception as e_config:
+            print(f"Fehler beim Lesen/Senden der ML2 Joystick Konfiguration: {e_config}")
+
+
+def poll_file_triggers(ml2_connected: bool):
+    """Prüft die Trigger-Dateien (Fallback) höchstens alle FILE_TRIGGER_POLL_INTERVAL Sekunden."""
+    global last_file_trigger_poll
+
+    now = time.time()
+    if now - last_file_trigger_poll < FILE_TRIGGER_POLL_INTERVAL:
+        return
+    last_file_trigger_poll = now
+    check_gamepad_state()  # Ergebnis einer laufenden Gamepad-Suche übernehmen
+    process_gamepad_mode_trigger()
+    if ml2_connected:
+        process_joystick_visibility_trigger()
+        process_ml2_config_trigger()
+
+
+def setup_control_socket():
+    """Bindet den REP-Socket für Befehle von app.py (einmalig)."""
+    global control_socket
+
+    if control_socket is not None and not control_socket.closed:
+        return control_socket
+    try:
+        control_socket = context.socket(zmq.REP)
+        control_socket.setsockopt(zmq.LINGER, 0)
+        control_socket.bind(ipc_control.CONTROL_ENDPOINT)
+        print(f"Steuerkanal gebunden an {ipc_control.CONTROL_ENDPOINT}")
+    except zmq.ZMQError as e:
+        print(f"WARNUNG: Steuerkanal konnte nicht gebunden werden ({e}). Nur Trigger-Dateien verfügbar.",
+              file=sys.stderr)
+        if control_socket:
+            control_socket.close()
+        control_socket = None
+    return control_socket
+
+
+def handle_control_command(cmd: str, params: dict) -> bytes:
+    """Führt einen Befehl vom Steuerkanal aus und liefert die Quittung."""
+    ml2_connected = bool(ml2_session_active and publisher_socket and not publisher_socket.closed)
+
+    if cmd == ipc_control.CMD_PING:
+        return ipc_control.make_reply(True, ml2_connected=ml2_connected, gamepad_enabled=get_gamepad_status(),
+                                      gamepad_starting=is_gamepad_starting(),
+                                      reconnect=reconnect_stats,
+                                      arbitration=drive_control.get_arbitration_stats() if drive_control else None,
+                                      config_version=wheelchair.get_config_version())
+    if cmd == ipc_control.CMD_RELOAD_CONFIG:
+        result = wheelchair.reload_config()
+        return ipc_control.make_reply(result["ok"], error=result.get("error"), config_version=result["version"],
+                                      changed=result.get("changed", False))
+    if cmd == ipc_control.CMD_GET_GAMEPAD_STATUS:
+        check_gamepad_state()
+        return ipc_control.make_reply(True, gamepad_enabled=get_gamepad_status(), gamepad_starting=is_gamepad_starting())
+    if cmd == ipc_control.CMD_SET_GAMEPAD_MODE:
+        requested = bool(params.get("enabled", False))
+        accepted = set_gamepad_mode(requested)
+        # Antwort sofort; ob das Gamepad gefunden wurde, fragt app.py per CMD_GET_GAMEPAD_STATUS ab
+        error = None if accepted == requested else "Gamepad-Steuerung konnte nicht aktiviert werden."
+        return ipc_control.make_reply(accepted == requested, error=error, gamepad_enabled=get_gamepad_status(),
+                                      gamepad_starting=is_gamepad_starting())
+    if cmd == ipc_control.CMD_TOGGLE_JOYSTICK_VISIBILITY:
+        if not ml2_connected:
+            return ipc_control.make_reply(False, error="ML2 nicht verbunden.")
+        return ipc_control.make_reply(send_joystick_visibility_toggle())
+    if cmd == ipc_control.CMD_SEND_ML2_CONFIG:
+        config = params.get("config")
+        if not isinstance(config, dict):
+            return ipc_control.make_reply(False, error="Parameter 'config' fehlt oder ist ungültig.")
+        if not ml2_connected:
+            return ipc_control.make_reply(False, error="ML2 nicht verbunden.")
+        return ipc_control.make_reply(send_ml2_config(json.dumps(config)))
+    return ipc_control.make_reply(False, error=f"Unbekannter Befehl: {cmd}")
+
+
+def process_control_requests():
+    """Beantwortet alle anstehenden Anfragen auf dem Steuerkanal (nicht blockierend)."""
+    if control_socket is None:
+        return
+    while True:
+        try:
+            request = control_socket.recv(zmq.NOBLOCK)
+        except zmq.error.Again:
+            return
+        try:
+            cmd, params = ipc_control.decode_request(request)
+            print(f"[ZMQ-Server] Steuerbefehl empfangen: {cmd}")
+            reply = handle_control_command(cmd, params)
+        except (ValueError, UnicodeDecodeError) as e:
+            reply = ipc_control.make_reply(False, error=f"Ungültige Anfrage: {e}")
+        except Exception as e:
+            print(f"[ZMQ-Server] Fehler bei Steuerbefehl: {e}", file=sys.stderr)
+            reply = ipc_control.make_reply(False, error=str(e))
+        control_socket.send(reply)  # REP: auf jede Anfrage muss genau eine Antwort folgen
+
+
+def make_poller(*sockets):
+    poller = zmq.Poller()
+    for sock in sockets:
+        if sock is not None:
+            poller.register(sock, zmq.POLLIN)
+    return poller
+
+
+def receive_pending_messages(socket):
+    """
+    Holt alle bereits anstehenden Nachrichten ohne zu blockieren ab (max. MAX_MESSAGES_PER_PASS).
+    Gibt eine Liste von (topic, message, recv_time) in Empfangsreihenfolge zurück.
+    """
+    messages = []
+    while len(messages) < MAX_MESSAGES_PER_PASS:
+        try:
+            topic, message = socket.recv_multipart(zmq.NOBLOCK)
+        except zmq.error.Again:
+            break
+        messages.append((topic, message, time.monotonic()))
+    return messages
+
+
+def publish_legacy(topic, payload):
+    """Einzel-Topic senden, außer der Client bekommt bereits State-Frames."""
+    if not (USE_STATE_FRAMES and binary_client_active):
+        publisher_socket.send_multipart([topic, payload])
+
+
+def handle_control_message(topic, message):
+    """Verarbeitet alle Topics außer joystickPos (Reihenfolge bleibt erhalten)."""
+    global last_heartbeat
+
+    if topic == b"heartbeat":
+        last_heartbeat = time.time()
+        print("Heartbeat empfangen")
+    elif topic == b"READY":
+        # App auf der ML2 neu gestartet, während die alte Sitzung noch lief
+        print("READY empfangen (neue Sitzung)!")
+        start_ml2_session(resumed=False)
+    elif topic == b"gear":
+        received_value = from_network_order(message, '?')
+        actual_gear = wheelchair.set_gear(received_value)
+        publish_legacy(b"gear", to_network_order(actual_gear, 'i'))
+    elif topic == b"lights":
+        received_value = from_network_order(message, '?')
+        wheelchair.set_lights()
+        publish_legacy(b"lights", to_network_order(wheelchair.get_lights(), '?'))
+        print("lights: " + str(wheelchair.get_lights()))
+    elif topic == b"warn":
+        received_value = from_network_order(message, '?')
+        wheelchair.set_warn()
+        publish_legacy(b"warn", to_network_order(wheelchair.get_warn(), '?'))
+        print("warn: " + str(wheelchair.get_warn()))
+    elif topic == b"horn":
+        received_value = from_network_order(message, '?')
+        wheelchair.on_horn(received_value)
+    elif topic == b"kantelung":
+        received_value = from_network_order(message, '?')
+        wheelchair.on_kantelung(received_value)
+        publish_legacy(b"kantelung", to_network_order(wheelchair.get_kantelung(), '?'))
+    else:
+        print(f"Unerwartetes Topic: {topic}")
+
+
+def handle_input_frame(message, recv_time):
+    """
+    Dekodiert einen Input-Frame, verbucht Verlust/Umordnung/Latenz und wendet Hupe,
+    Kantelung und Events an. Gibt die Joystick-Position zurück oder None, wenn der
+    Frame veraltet oder ungültig ist.
+    """
+    global binary_client_active, last_input_levels, last_input_event_id
+
+    try:
+        seq, timestamp_us, x, y, levels, event, event_id = protocol.decode_input_frame(message)
+    except protocol.ProtocolError as e:
+        print(f"Ungültiger Input-Frame: {e}", file=sys.stderr)
+        return None
+    if not input_link_stats.update(seq, timestamp_us, int(recv_time * 1_000_000)):
+        return None  # Älter als ein bereits angewendeter Frame
+    if not binary_client_active:
+        print(f"ML2 nutzt Binärprotokoll v{protocol.PROTOCOL_VERSION}, sende State-Frames.")
+        binary_client_active = True
+
+    changed = levels ^ last_input_levels
+    if changed & protocol.INPUT_LEVEL_HORN:
+        wheelchair.on_horn(bool(levels & protocol.INPUT_LEVEL_HORN))
+    if changed & protocol.INPUT_LEVEL_KANTELUNG:
+        wheelchair.on_kantelung(bool(levels & protocol.INPUT_LEVEL_KANTELUNG))
+    last_input_levels = levels
+
+    if event != protocol.EVENT_NONE and event_id != last_input_event_id:
+        if event == protocol.EVENT_GEAR_UP:
+            wheelchair.set_gear(True)
+        elif event == protocol.EVENT_GEAR_DOWN:
+            wheelchair.set_gear(False)
+        elif event == protocol.EVENT_TOGGLE_LIGHTS:
+            wheelchair.set_lights()
+        elif event == protocol.EVENT_TOGGLE_WARN:
+            wheelchair.set_warn()
+        else:
+            print(f"Unbekannter Event im Input-Frame: {event}")
+    last_input_event_id = event_id
+    return x, y
+
+
+def reset_protocol_state():
+    """Neue ML2-Sitzung: Client startet wieder im alten Protokoll."""
+    global binary_client_active, last_input_levels, last_input_event_id
+
+    binary_client_active = False
+    last_input_levels = 0
+    last_input_event_id = None
+    input_link_stats.reset()
+
+
+def publish_state_frame():
+    """Sendet den kompletten Zustand als einen State-Frame."""
+    global state_frame_seq
+
+    flags = 0
+    if wheelchair.get_lights(): flags |= protocol.STATE_FLAG_LIGHTS
+    if wheelchair.get_warn(): flags |= protocol.STATE_FLAG_WARN
+    if wheelchair.get_kantelung(): flags |= protocol.STATE_FLAG_KANTELUNG
+    if gamepad_control_is_active_by_trigger: flags |= protocol.STATE_FLAG_GAMEPAD
+    if camera_stream_active: flags |= protocol.STATE_FLAG_REAR_CAMERA
+
+    battery_gauge = protocol.BATTERY_UNKNOWN
+    if wheelchair.telemetry:
+        battery = wheelchair.telemetry.get_value("battery")
+        if battery is not None:
+            battery_gauge = min(100, int(battery[1]))
+
+    frame = protocol.encode_state_frame(state_frame_seq, wheelchair.get_actual_gear(), flags,
+                                        wheelchair.get_wheelchair_speed(),
+                                        int(round(wheelchair.get_current_sent_x())), int(round(wheelchair.get_current_sent_y())),
+                                        battery_gauge)
+    publisher_socket.send_multipart([protocol.TOPIC_STATE, frame])
+    state_frame_seq = (state_frame_seq + 1) % protocol.SEQUENCE_MODULO
+
+
+def decode_joystick_pos(message):
+    x = from_network_order(message[0:4], 'f')
+    y = from_network_order(message[4:8], 'f')
+    return x, y
+
+
+def process_incoming_messages(messages):
+    """
+    Verarbeitet einen Stapel empfangener Nachrichten.
+    Mit USE_DRIVE_CONTROL_THREAD werden alle joystickPos-Nachrichten zusammengefasst
+    und nur die neueste an den DriveControlThread übergeben.
+    """
+    global last_ml2_message_time
+
+    if messages:
+        last_ml2_message_time = messages[-1][2]
+    latest_joystick = None
+    drive_input = False
+    for topic, message, recv_time in messages:
+        if topic == b"joystickPos":
+            direction = decode_joystick_pos(message)
+        elif topic == protocol.TOPIC_INPUT:
+            direction = handle_input_frame(message, recv_time)
+            if direction is None:
+                continue
+        else:
+            handle_control_message(topic, message)
+            continue
+
+        drive_input = True
+        if USE_DRIVE_CONTROL_THREAD and drive_control:
+            latest_joystick = (direction, recv_time)
+        elif not gamepad_control_is_active_by_trigger:
+            wheelchair.set_direction(direction)
+
+    if latest_joystick is not None:
+        # Ob die ML2 fährt, entscheidet die Arbitrierung im DriveControlThread (Gamepad hat Vorrang)
+        direction, recv_time = latest_joystick
+        drive_control.submit(direction, recv_time, source=SOURCE_ML2)
+    if drive_input and outage_start_time is not None:
+        note_drive_resumed()
+
+
+def note_drive_resumed():
+    """Erste Fahreingabe nach einem Verbindungsabbruch: Time-to-Drive verbuchen."""
+    global outage_start_time, dropout_detected_time
+
+    now = time.monotonic()
+    time_to_drive_ms = (now - outage_start_time) * 1000.0
+    reconnect_stats["last_time_to_drive_ms"] = time_to_drive_ms
+    reconnect_stats["max_time_to_drive_ms"] = max(reconnect_stats["max_time_to_drive_ms"], time_to_drive_ms)
+    print(f"[Reconnect] Wieder fahrbereit {time_to_drive_ms:.0f} ms nach der letzten Nachricht vor dem Abbruch "
+          f"({(now - dropout_detected_time) * 1000.0:.0f} ms nach Erkennung, "
+          f"Abbrüche={reconnect_stats['dropouts']}, max={reconnect_stats['max_time_to_drive_ms']:.0f} ms).")
+    outage_start_time = None
+    dropout_detected_time = None
+
+
+def publish_camera_frame(frame):
+    """
+    Sendet den neuesten kodierten Frame zero-copy. Hängt der vorherige Frame noch in der
+    ZMQ-Sendewarteschlange, wird dieser Frame verworfen und die Kamera gedrosselt.
+    """
+    global last_frame_tracker, camera_first_frame_pending
+
+    if last_frame_tracker is not None and not last_frame_tracker.done:
+        rear_camera.report_congestion()
+        return False
+    last_frame_tracker = publisher_socket.send_multipart([b"rear_video_stream", frame.data], copy=False, track=True)
+    if camera_first_frame_pending:
+        camera_first_frame_pending = False
+        print(f"Erstes Rückkamerabild nach {(time.monotonic() - camera_start_time) * 1000:.0f} ms gesendet.")
+    return True
+
+
+def print_camera_stats():
+    if not rear_camera:
+        return
+    stats = rear_camera.get_stats()
+    ttff = stats['time_to_first_frame_ms']
+    print(f"[Kamera] encode avg={stats['encode_ms_avg']:.1f}ms, kodiert={stats['frames_encoded']}, "
+          f"verworfen={stats['frames_dropped']}, Qualität={stats['jpeg_quality']}, Skalierung={stats['scale']}, "
+          f"erstes Bild={'n/a' if ttff is None else f'{ttff:.0f}ms'}")
+
+
+def print_latency_stats():
+    if not drive_control:
+        return
+    stats = drive_control.get_latency_stats()
+    counters = stats.pop("counters")
+    stages = ", ".join(f"{name}: avg={s['avg_ms']:.2f}ms max={s['max_ms']:.2f}ms (n={s['count']})"
+                       for name, s in stats.items())
+    print(f"\n[Latenz] {stages} | empfangen={counters['received']} verworfen={counters['collapsed']} "
+          f"ticks={counters['ticks']} overruns={counters['overruns']}")
+    arb = drive_control.get_arbitration_stats()
+    calls = ", ".join(f"{name}={arb['sent'].get(name, 0)}/{arb['suppressed'].get(name, 0)}"
+                      for name in sorted(set(arb['sent']) | set(arb['suppressed'])))
+    print(f"[RLink] Quelle={arb['active_source'] or '-'} Wechsel={arb['source_switches']} "
+          f"Heartbeats={arb['heartbeats']} (Fehler={arb['heartbeat_errors']}) gesendet/übersprungen: {calls}")
+    if binary_client_active:
+        link = input_link_stats.snapshot()
+        print(f"[Input-Frames] empfangen={link['received']} verloren={link['lost']} umgeordnet={link['reordered']} "
+              f"doppelt={link['duplicates']} Neustarts={link['restarts']} "
+              f"Einweg-Latenz avg={link['latency_avg_ms']:.2f}ms max={link['latency_max_ms']:.2f}ms (relativ zum schnellsten Paket)")
+
+
+def close_ml2_sockets():
+    """Schließt Publisher und Subscriber (nur bei Fehlern oder neuer Adresse, nicht bei jedem Abbruch)."""
+    global publisher_socket, subscriber_socket, subscriber_endpoint
+
+    for sock in (subscriber_socket, publisher_socket):
+        try:
+            if sock is not None and not sock.closed:
+                sock.close(linger=0)
+        except Exception as e:
+            print(f"Fehler beim Schließen der Sockets: {e}")
+    publisher_socket = None
+    subscriber_socket = None
+    subscriber_endpoint = None
+
+
+def ensure_ml2_connection() -> bool:
+    """
+    Stellt Publisher, Subscriber und die Adressdatei auf der ML2 sicher. Bereits Vorhandenes
+    (ML2-IP, Schnittstelle, gebundener Port, gepushte Adresse) wird wiederverwendet; ADB,
+    netifaces und adb push laufen nur, wenn sich etwas geändert hat.
+    """
+    global magic_leap_ip, cached_pc_ip, publisher_socket, subscriber_socket
+    global publisher_port, subscriber_endpoint, pushed_address, session_resumable, last_ml2_ip
+
+    if not magic_leap_ip:
+        new_ip = ML2_IP_OVERRIDE or get_magic_leap_ip_adb()
+        if not new_ip:
+            print("Konnte Magic Leap IP nicht ermitteln.")
+            return False
+        # Gleiche ML2 wiedergefunden: Schnittstelle und Sitzung bleiben gültig
+        if new_ip != last_ml2_ip:
+            if last_ml2_ip:
+                print(f"ML2-IP hat sich geändert ({last_ml2_ip} -> {new_ip}).")
+            cached_pc_ip = None
+            session_resumable = False
+        magic_leap_ip = last_ml2_ip = new_ip
+
+    pc_ip = PC_IP_OVERRIDE or cached_pc_ip or get_correct_network_interface(magic_leap_ip)
+    if not pc_ip:
+        print("Konnte eigene IP-Adresse nicht ermitteln.")
+        magic_leap_ip = None  # ML2 evtl. in einem anderen Netz: beim nächsten Versuch neu ermitteln
+        return False
+    if pc_ip != cached_pc_ip and publisher_socket is not None:
+        print(f"Eigene IP hat sich geändert ({cached_pc_ip} -> {pc_ip}), Sockets werden neu gebunden.")
+        close_ml2_sockets()
+    cached_pc_ip = pc_ip
+
+    try:
+        if publisher_socket is None:
+            publisher_socket = context.socket(zmq.PUB)
+            publisher_socket.setsockopt(zmq.LINGER, 0)
+            bound = False
+            if publisher_port:
+                # Gleichen Port wie bisher verwenden, damit die ML2 keine neue Adresse braucht
+                try:
+                    publisher_socket.bind(f"tcp://{pc_ip}:{publisher_port}")
+                    bound = True
+                except zmq.ZMQError as e:
+                    print(f"Port {publisher_port} nicht mehr verfügbar ({e}), wähle einen neuen.")
+            if not bound:
+                publisher_port = publisher_socket.bind_to_random_port(f"tcp://{pc_ip}")  # Dynamischen Port zuweisen
+            print(f"Publisher Socket (PC) gebunden an {pc_ip}:{publisher_port}")
+
+        endpoint = f"tcp://{magic_leap_ip}:{publisher_port + 1}"
+        if subscriber_socket is None or endpoint != subscriber_endpoint:
+            if subscriber_socket is not None:
+                subscriber_socket.close(linger=0)
+            subscriber_socket = context.socket(zmq.SUB)
+            subscriber_socket.setsockopt(zmq.LINGER, 0)
+            subscriber_socket.setsockopt(zmq.RECONNECT_IVL, ZMQ_RECONNECT_IVL_MS)
+            subscriber_socket.setsockopt(zmq.RECONNECT_IVL_MAX, ZMQ_RECONNECT_IVL_MAX_MS)
+            # Alle Topics von Anfang an: eine wiederkehrende ML2 muss nicht erst READY senden
+            for topic in (b"READY", b"heartbeat", b"joystickPos", b"gear", b"lights", b"warn", b"horn",
+                          b"kantelung", protocol.TOPIC_INPUT):
+                subscriber_socket.setsockopt(zmq.SUBSCRIBE, topic)
+            subscriber_socket.connect(endpoint)
+            subscriber_endpoint = endpoint
+            print(f"Subscriber (PC) verbindet mit ML2 an {subscriber_endpoint}")
+    except zmq.ZMQError as e:
+        print(f"Fehler beim Binden/Verbinden der Sockets: {e}")
+        close_ml2_sockets()
+        return False
+
+    # --- Sende IP und Port an die Magic Leap 2 (nur wenn geändert) ---
+    if pushed_address != (pc_ip, publisher_port):
+        if send_pc_ip_and_port(magic_leap_ip, publisher_port, pc_ip):  # Sende IP *und* Port
+            pushed_address = (pc_ip, publisher_port)
+        else:
+            print("Konnte PC-IP und Port nicht an Magic Leap senden. Setze fort...")
+    return True
+
+
+def start_ml2_session(resumed: bool):
+    """READY empfangen oder eine bekannte ML2 meldet sich wieder: Zustand an die ML2 senden."""
+    global ml2_session_active, session_resumable, last_heartbeat
+
+    if not resumed:
+        reset_protocol_state()
+    else:
+        input_link_stats.reset()  # Sequenz der ML2 kann seit dem Abbruch neu begonnen haben
+    publisher_socket.send_multipart([b"gear", to_network_order(wheelchair.get_actual_gear(), 'i')])
+    publisher_socket.send_multipart([b"lights", to_network_order(wheelchair.get_lights(), '?')])
+    publisher_socket.send_multipart([b"warn", to_network_order(wheelchair.get_warn(), '?')])
+    if wheelchair.telemetry:
+        wheelchair.telemetry.force_publish()  # Neue Sitzung: alle Telemetriewerte einmal senden
+    last_heartbeat = time.time()
+    ml2_session_active = True
+    session_resumable = True
+    if resumed:
+        reconnect_stats["resumed"] += 1
+        print(f"ML2-Sitzung wiederaufgenommen ({subscriber_endpoint}).")
+    else:
+        print(f"Subscriber (PC) verbunden mit ML2 an {subscriber_endpoint}")
+
+
+def wait_for_ml2_session(poller, timeout):
+    """
+    Wartet auf READY, bei einer bereits bekannten ML2 auch auf jede andere Nachricht.
+    Gibt die schon empfangenen Nachrichten zurück (zum normalen Verarbeiten) oder None bei Timeout.
+    """
+    deadline = time.monotonic() + timeout
+    last_rlink_heartbeat_send = 0.0
+    while time.monotonic() < deadline:
+        poll_file_triggers(ml2_connected=False)
+        # RLink warm halten, damit nach der Wiederaufnahme sofort gefahren werden kann
+        # (mit DriveControlThread sendet dieser die Heartbeats)
+        if not drive_control and time.monotonic() - last_rlink_heartbeat_send > HEARTBEAT_INTERVAL_RLINK:
+            wheelchair.send_rlink_heartbeat()
+            last_rlink_heartbeat_send = time.monotonic()
+        # Subscriber und Steuerkanal gemeinsam pollen, damit Web-Befehle auch hier beantwortet werden
+        events = dict(poller.poll(100))
+        if control_socket in events:
+            process_control_requests()
+        if subscriber_socket not in events:
+            continue
+        messages = receive_pending_messages(subscriber_socket)
+        ready_index = next((i for i, (topic, _, _) in enumerate(messages) if topic == b"READY"), None)
+        if ready_index is not None:
+            print("READY empfangen!")
+            start_ml2_session(resumed=False)
+            return [m for m in messages[ready_index + 1:] if m[0] != b"READY"]
+        if session_resumable and messages:
+            start_ml2_session(resumed=True)
+            return messages
+    return None
+
+
+def wait_with_backoff(delay):
+    """Wartet 'delay' Sekunden, beantwortet dabei aber den Steuerkanal."""
+    if control_socket is None:
+        time.sleep(delay)
+        return
+    end = time.monotonic() + delay
+    poller = make_poller(control_socket)
+    while True:
+        remaining = end - time.monotonic()
+        if remaining <= 0:
+            return
+        if poller.poll(max(1, int(remaining * 1000))):
+            process_control_requests()
+
+
+def ensure_rear_camera():
+    """Kamera nur einmal konfigurieren; bleibt über Neuverbindungen im Warm-Standby."""
+    global rear_camera
+
+    if rear_camera is not None:
+        return
+    try:
+        print("Attempting to initialize RearCamera...")
+        rear_camera = RearCamera(target_fps=VIDEO_FRAME_RATE)  # Konfiguriert einmalig (Warm-Standby)
+        # Test if camera can start (optional, but good for early feedback)
+        if rear_camera.picam2 is None:  # Check if Picamera2 object itself failed to init
+            print("WARNUNG: RearCamera Picamera2 object ist None. Kamerastreaming nicht verfügbar.")
+            rear_camera = None  # Explicitly set to None if unusable
+        elif not rear_camera.start_stream():
+            print("WARNUNG: RearCamera konnte den Stream nicht initial starten. Kamerastreaming nicht verfügbar.")
+            rear_camera.stop_stream()  # Ensure it's stopped if start failed
+            # rear_camera = None # Decide if you want to disable it completely or allow retries
+        else:
+            print("RearCamera initial gestartet und gestoppt für Test. Bereit.")
+            rear_camera.stop_stream()  # Stop it, will be activated by reverse movement
+    except Exception as e_cam_init:
+        print(f"WARNUNG: Kritischer Fehler bei Initialisierung der RearCamera: {e_cam_init}")
+        rear_camera = None  # Disable camera functionality
+
+
+def handle_ml2_dropout():
+    """Heartbeat-Timeout: Fahren stoppen, aber Sockets, Kamera und RLink behalten."""
+    global ml2_session_active, camera_stream_active, outage_start_time, dropout_detected_time
+
+    ml2_session_active = False
+    if drive_control:
+        drive_control.stop_motion()  # Keine alte Joystick-Position über den Abbruch hinaus halten
+    elif not gamepad_control_is_active_by_trigger:
+        wheelchair.set_direction((0.0, 0.0))
+    if rear_camera and camera_stream_active:
+        rear_camera.stop_stream()  # Nur pausieren, Konfiguration bleibt
+        camera_stream_active = False
+    reconnect_stats["dropouts"] += 1
+    dropout_detected_time = time.monotonic()
+    if outage_start_time is None:  # Nicht überschreiben, falls seit dem letzten Abbruch nicht gefahren wurde
+        outage_start_time = last_ml2_message_time or dropout_detected_time
+
+
+def run_server():
+    """Hauptfunktion des Servers."""
+    global magic_leap_ip, camera_stream_active, last_frame_send_time, drive_control
+    global camera_first_frame_pending, camera_start_time, last_frame_tracker
+    global last_state_frame_send
+
+    if USE_DRIVE_CONTROL_THREAD and drive_control is None:
+        drive_control = DriveControlThread(wheelchair, rate_hz=DRIVE_CONTROL_RATE_HZ,
+                                           heartbeat_interval=HEARTBEAT_INTERVAL_RLINK)
+        drive_control.start()
+
+    setup_control_socket()
+    backoff = RECONNECT_BACKOFF_INITIAL
+
+    while True:  # Äußere Schleife für (Wieder-)Verbindung
+        process_control_requests()
+        process_gamepad_mode_trigger()
+        if not ensure_ml2_connection():
+            print(f"Neuer Verbindungsversuch in {backoff * 1000:.0f} ms...")
+            wait_with_backoff(backoff)
+            backoff = min(backoff * 2, RECONNECT_BACKOFF_MAX)
+            continue
+
+        print("Warte auf ML2 (READY" + (" oder Wiederaufnahme)..." if session_resumable else ")..."))
+        # Erstes READY: INITIAL_CONNECTION_TIMEOUT, bekannte ML2: RESUME_WINDOW
+        session_timeout = RESUME_WINDOW if session_resumable else INITIAL_CONNECTION_TIMEOUT
+        poller = make_poller(subscriber_socket, control_socket)
+        try:
+            initial_messages = wait_for_ml2_session(poller, session_timeout)
+        except zmq.ZMQError as e:
+            print(f"Fehler beim Warten/Verbinden (ZMQ): {e}")
+            close_ml2_sockets()
+            wait_with_backoff(backoff)
+            backoff = min(backoff * 2, RECONNECT_BACKOFF_MAX)
+            continue
+        except Exception as e:
+            print(f"Unerwarteter Fehler: {e}")
+            wait_with_backoff(backoff)
+            backoff = min(backoff * 2, RECONNECT_BACKOFF_MAX)
+            continue
+        if initial_messages is None:
+            # ML2 meldet sich nicht auf der bekannten Adresse: IP beim nächsten Durchlauf neu ermitteln
+            print(f"Keine Antwort der ML2 innerhalb von {session_timeout:.0f} s, ermittle Adresse neu.")
+            if not ML2_IP_OVERRIDE:
+                magic_leap_ip = None
+            continue
+
+        ensure_rear_camera()
+
+        # --- Hauptkommunikationsschleife (nach Empfang von READY) ---
+        print("Beginne mit der Hauptkommunikation...")
+
+        float_value = 0
+        last_heartbeat_send = 0  # Zeitpunkt des letzten Sendens.
+        last_rlink_heartbeat_send = time.time()  # NEU: Für Heartbeat ZUM Rollstuhl
+        last_latency_report = time.time()
+        if initial_messages:
+            process_incoming_messages(initial_messages)
+
+        # Backoff erst nach einer stabilen Sitzung zurücksetzen, sonst würde ein sofort wiederkehrender
+        # Fehler nach jeder Wiederaufnahme ohne Wartezeit erneut auftreten
+        session_start = time.monotonic()
+        socket_error = False
+        unexpected_error = False
+        while True:  # Hauptkommunikationsschleife
+            try:
+                if backoff > RECONNECT_BACKOFF_INITIAL and time.monotonic() - session_start > RECONNECT_BACKOFF_RESET:
+                    backoff = RECONNECT_BACKOFF_INITIAL
+                poll_file_triggers(ml2_connected=True)
+                # --- Sende Heartbeat (alle 2 Sekunden) ---
+                if time.time() - last_heartbeat_send > HEARTBEAT_INTERVAL:
+                    publisher_socket.send_multipart([b"heartbeat", b""])
+                    last_heartbeat_send = time.time()  # Aktualisiere den Zeitpunkt des Sendens
+
+                # --- Heartbeat ZUM Rollstuhl(RLink), nur ohne DriveControlThread (sonst sendet dieser) ---
+                if not drive_control and time.time() - last_rlink_heartbeat_send > HEARTBEAT_INTERVAL_RLINK:
+                    if wheelchair.send_rlink_heartbeat():  # Rufe die neue Methode auf
+                        last_rlink_heartbeat_send = time.time()
+                    else:
+                        print("Konnte RLink Heartbeat nicht senden, möglicherweise Verbindungsproblem.")
+
+                if USE_STATE_FRAMES and binary_client_active:
+                    if time.time() - last_state_frame_send > STATE_FRAME_INTERVAL:
+                        publish_state_frame()
+                        last_state_frame_send = time.time()
+                if wheelchair.telemetry and wheelchair.telemetry.is_running():
+                    # Nur geänderte Werte (Totband) bzw. Keep-Alive senden
+                    for topic, payload in wheelchair.telemetry.collect_updates():
+                        if topic == b"topic_float" and USE_STATE_FRAMES and binary_client_active:
+                            continue  # Geschwindigkeit steckt im State-Frame
+                        publisher_socket.send_multipart([topic, payload])
+                else:
+                    speed = wheelchair.get_wheelchair_speed()
+                    float_value = to_network_order(speed, 'f')
+                    publisher_socket.send_multipart([b"topic_float", float_value])
+                current_y_command = wheelchair.get_current_sent_y()
+                #publisher_socket.send_multipart([b"topic_string", string_value.encode()])
+
+                # --- Cam activation ---
+
+                if rear_camera and rear_camera.picam2:
+                    if current_y_command < MIN_REVERSE_SPEED_THRESHOLD and not camera_stream_active:
+                        camera_start_time = time.monotonic()
+                        if rear_camera.start_stream():
+                            camera_stream_active = True
+                            camera_first_frame_pending = True
+                            last_frame_tracker = None
+                            print("Rear camera stream started due to reverse movement.")
+                            publisher_socket.send_multipart([b"rear_camera_status", b"STARTING"])
+                    elif current_y_command >= MIN_REVERSE_SPEED_THRESHOLD and camera_stream_active:
+                        rear_camera.stop_stream()
+                        camera_stream_active = False
+                        print("Rear camera stream stopped.")
+                        print_camera_stats()
+                        publisher_socket.send_multipart([b"rear_camera_status", b"STOPPED"])
+
+                    # Rate-limit video frame sending
+                    # Capture + Encode laufen im Kamera-Worker, hier wird nur der neueste Frame abgeholt
+                    if camera_stream_active and (time.time() - last_frame_send_time > VIDEO_FRAME_INTERVAL):
+                        frame = rear_camera.get_latest_frame()  # Blockiert nie
+                        if frame is not None:
+                            publish_camera_frame(frame)
+                            last_frame_send_time = time.time()  # Aktualisiere den Zeitpunkt des letzten Sendens
+
+                # Empfange Nachrichten (mit Timeout), danach alle anstehenden abholen
+                events = dict(poller.poll(10))  # 10 ms Timeout, Subscriber + Steuerkanal
+                if subscriber_socket in events:
+                    process_incoming_messages(receive_pending_messages(subscriber_socket))
+                if control_socket in events:
+                    process_control_requests()
+
+                if LATENCY_REPORT_INTERVAL and time.time() - last_latency_report > LATENCY_REPORT_INTERVAL:
+                    print_latency_stats()
+                    last_latency_report = time.time()
+
+                # Heartbeat-Timeout-Überprüfung
+                if time.time() - last_heartbeat > RECONNECT_INTERVAL:
+                    print("Heartbeat-Timeout!")
+                    break  # Beende die Hauptschleife
+
+            except zmq.ZMQError as e:
+                print(f"Fehler in der Kommunikation: {e}")
+                socket_error = True
+                break  # Beende die Hauptschleife
+            except Exception as e:
+                print(f"Unerwarteter Fehler: {e}")
+                unexpected_error = True
+                break # Beende die Hauptschleife.
+
+        # --- Verbindungsabbruch: Sitzung pausieren statt alles neu aufzubauen ---
+        handle_ml2_dropout()
+        if socket_error:
+            print("Sockets werden neu aufgebaut...")
+            close_ml2_sockets()
+            wait_with_backoff(backoff)
+            backoff = min(backoff * 2, RECONNECT_BACKOFF_MAX)
+        elif unexpected_error:
+            print(f"Wiederaufnahme in {backoff * 1000:.0f} ms...")
+            wait_with_backoff(backoff)
+            backoff = min(backoff * 2, RECONNECT_BACKOFF_MAX)
+        else:
+            print("Verbindung zur ML2 verloren, warte auf Wiederaufnahme (Sockets, Kamera und RLink bleiben aktiv)...")
+
+
+if __name__ == "__main__":
+    try:
+        run_server()
+    except KeyboardInterrupt:
+        print("\nCtrl+C erkannt. Beende Hauptserver...")
+    finally:
+        print("Beende alle Komponenten des Hauptservers...")
+        if gamepad_ctrl:  # gamepad_ctrl ist global
+            gamepad_ctrl.stop()
+        if drive_control:
+            drive_control.stop()
+        if wheelchair:  # wheelchair ist global
+            wheelchair.shutdown()
+        if rear_camera:  # Ensure camera is stopped if server loop breaks
+            rear_camera.close()
+
+        if control_socket and not control_socket.closed:
+            control_socket.close(linger=0)
+
+        # Globale Sockets hier schließen, da sie in der Schleife neu zugewiesen werden
+        if publisher_socket and not publisher_socket.closed:
+            print("Schließe globalen Publisher Socket...")
+            publisher_socket.close(linger=0)
+        if subscriber_socket and not subscriber_socket.closed:
+            print("Schließe globalen Subscriber Socket...")
+            subscriber_socket.close(linger=0)
+
+        if context and not context.closed:
+            print("Schließe globalen ZeroMQ-Kontext.")
+            context.term()
+        print("Hauptserver beendet.")
\ No newline at end of file
@@ -0,0 +1,585 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import time
+import threading
+import sys
+import os # Für os.path.exists
+import json # Für Konfigurationspersistenz
+import math # Für math.copysign
+
+# Importiere den VOLLSTÄNDIGEN Wrapper und die benötigten Enums/Klassen
+try:
+    from full_rlink_wrapper import ( # Annahme: Diese Datei existiert und enthält RLink etc.
+        RLink, RLinkError,
+        RLinkLight, RLinkAxisId, RLinkAxisDir, RLinkButton,
+        MSP_OK, # Importiere MSP_OK, falls nicht schon global im Wrapper
+        RLINK_BACKEND
+    )
+    if RLINK_BACKEND == "sim":
+        # RLINK_BACKEND=sim: Simulierter RLink ohne Hardware (Benchmarks, Tests am PC)
+        from rlink_sim import SimulatedRLink as RLink
+except ImportError as e:
+    print(f"Fehler: Konnte 'full_rlink_wrapper.py' oder RLink-Klassen nicht finden: {e}", file=sys.stderr)
+    sys.exit(1)
+from telemetry import TelemetrySampler
+from flight_recorder import FlightRecorder, FLAG_TILT, FLAG_LIGHTS, FLAG_WARN, FLAG_HORN
+from drive_control import RLinkOutputCache
+from drive_config import DEFAULT_CONFIG, ResponseCurves, ConfigWatcher, parse_config, load_config_file
+
+# --- Konfiguration ---
+HEARTBEAT_INTERVAL = 0.4 # Sekunden zwischen Heartbeats
+# !!! WICHTIG: PASSE DIESE ID AN DEINE SITZKANTELUNG AN !!!
+SEAT_TILT_AXIS_ID = RLinkAxisId.ID_0 # <-- ÄNDERN ZUM TESTEN
+TILT_THRESHOLD_NORMALIZED = 0.5  # Schwellenwert für normalisierte Joystick Y-Achse (-1.0 bis 1.0)
+
+CONFIG_FILE = "wheelchair_config.json" # Name der Speicherdatei
+FLIGHT_RECORDER_FILE = "drive_flight_recorder.bin" # Ringdatei des Fahrtenschreibers (None = aus)
+
+class WheelchairControlReal:
+    """
+    Steuert einen echten Rollstuhl über die RLink-Bibliothek.
+    Implementiert Software-Gänge und Beschleunigungsrampen basierend auf
+    Werten aus wheelchair_config.json. Die Konfiguration liegt als vorberechneter
+    Snapshot (drive_config.ResponseCurves) in self._curves und wird bei Änderungen der
+    Datei bzw. per reload_config() im laufenden Betrieb ausgetauscht.
+    Alle RLink-Ausgaben laufen über self.outputs (unveränderte Werte werden nicht erneut
+    gesendet). Ist ein Command-Writer (DriveControlThread) angeschlossen, ändern Hupe/Licht/
+    Warnblinker/Kantelung nur den Soll-Zustand und der Writer-Thread sendet ihn.
+    WARNUNG: Setzt voraus, dass die originale (fehlerhafte) udev-Regel
+             aktiv ist, damit der verwendete RLink-Wrapper funktioniert!
+    """
+    _light_on = False
+    _warn_on = False
+    _horn_on = False
+    _tilt_mode_active = False
+    _current_axis_dir = {}
+
+    _current_gear = 1 # Wird aus Config geladen oder Default
+    _current_sent_x = 0.0
+    _current_sent_y = 0.0
+    _gear_factors = {}
+    _acceleration_step = 10.0
+    _pi_side_deadzone = 0.1
+    _min_rlink_command = 10
+    _curves: ResponseCurves | None = None # Aktiver Konfigurations-Snapshot (vorberechnet je Gang)
+    _last_raw_x = 0.0 # Letzte Joystick-Eingabe vor Remapping/Rampe (für den Fahrtenschreiber)
+    _last_raw_y = 0.0
+
+    def __init__(self, device_index=0, config_filepath=CONFIG_FILE, recorder_filepath=FLIGHT_RECORDER_FILE,
+                 watch_config=True):
+        print("Initialisiere WheelchairControlReal...")
+        self.rlink: RLink | None = None
+        self._heartbeat_thread = None
+        self._quit_heartbeat = threading.Event()
+        self.telemetry: TelemetrySampler | None = None
+        self.config_filepath = config_filepath # Pfad zur Konfig-Datei
+        self.last_set_xy_time = None # time.monotonic() nach dem letzten set_xy (Latenzmessung)
+        self.recorder: FlightRecorder | None = None
+        self._lock = threading.RLock() # Rampenzustand + RLink-Ausgaben (Aufrufe aus mehreren Threads)
+        self.outputs = RLinkOutputCache()
+        self._command_writer = None
+        self._light_state = {RLinkLight.DIP: self._light_on, RLinkLight.HAZARD: self._warn_on} # Soll-Zustand der Lichter
+        self.config_watcher: ConfigWatcher | None = None
+
+        self._load_config() # Lade Konfiguration BEIM START
+
+        if recorder_filepath:
+            try:
+                self.recorder = FlightRecorder(recorder_filepath)
+            except (OSError, ValueError) as e:
+                print(f"Warnung: Fahrtenschreiber nicht verfügbar ({recorder_filepath}): {e}", file=sys.stderr)
+                self.recorder = None
+
+        try:
+            self.rlink = RLink(device_index=device_index)
+            self.rlink.open()
+
+            # Initialzustand setzen (basierend auf internen Defaults, nicht Config hier)
+            self._current_axis_dir[SEAT_TILT_AXIS_ID] = RLinkAxisDir.NONE
+            self.apply_outputs() # Hupe, Lichter, Achse (Cache ist leer -> alles wird gesendet)
+            self._send_xy(0, 0)
+            self._current_sent_x = 0.0
+            self._current_sent_y = 0.0
+
+            self._quit_heartbeat.clear()
+            # Telemetrie (Geschwindigkeit, Batterie, ...) wird im Hintergrund abgetastet
+            # Getter laufen unter self._lock, damit RLink nie von zwei Threads gleichzeitig benutzt wird
+            self.telemetry = TelemetrySampler(self.rlink, lock=self._lock)
+            self.telemetry.start()
+            #self._heartbeat_thread = threading.Thread(target=self._heartbeat_thread_func, daemon=True)
+            #self._heartbeat_thread.start()
+            if watch_config:
+                # Änderungen an der Konfigurationsdatei (z.B. über das Webinterface) live übernehmen
+                self.config_watcher = ConfigWatcher(self.config_filepath, self.reload_config)
+                self.config_watcher.start()
+            print("WheelchairControlReal Initialisierung erfolgreich.")
+            print(f"Geladene Konfiguration {self._curves.describe()}")
+
+        except RLinkError as e:
+            print(f"FATAL: Konnte RLink nicht initialisieren oder öffnen: {e}", file=sys.stderr)
+            raise ConnectionError(f"Failed to initialize RLink: {e}") from e
+        except Exception as e:
+            print(f"FATAL: Unerwarteter Fehler bei Initialisierung: {e}", file=sys.stderr)
+            raise ConnectionError(f"Unexpected error during RLink init: {e}") from e
+
+    def send_rlink_heartbeat(self):
+        """Sendet einen Heartbeat an RLink, falls verbunden."""
+        if self.rlink:
+            try:
+                with self._lock:
+                    self.rlink.heartbeat()
+                # print("RLink Heartbeat sent synchronously") # Optional für Debugging
+                return True
+            except RLinkError as e:
+                print(f"Fehler beim synchronen Senden des RLink Heartbeats: {e}", file=sys.stderr)
+                return False
+            except Exception as e:
+                print(f"Unerwarteter Fehler beim synchronen Senden des RLink Heartbeats: {e}", file=sys.stderr)
+                return False
+        return False
+
+    def set_command_writer(self, writer):
+        """Schließt den Thread an, der ab jetzt allein auf RLink schreibt (None = wieder direkt senden)."""
+        with self._lock:
+            self._command_writer = writer
+        if writer is None:
+            self.apply_outputs()
+
+    def apply_outputs(self):
+        """Sendet Hupe, Lichter und Achsen, soweit sie vom zuletzt gesendeten Stand abweichen."""
+        if not self.rlink: return
+        with self._lock:
+            rlink = self.rlink
+            outputs = self.outputs
+            if outputs.pending("set_horn", None, self._horn_on):
+                outputs.send("set_horn", None, self._horn_on, rlink.set_horn, self._horn_on)
+            for light, on in self._light_state.items():
+                if outputs.pending("set_light", light, on):
+                    outputs.send("set_light", light, on, rlink.set_light, light, on)
+            for axis, axis_dir in self._current_axis_dir.items():
+                if outputs.pending("set_axis", axis, axis_dir):
+                    outputs.send("set_axis", axis, axis_dir, rlink.set_axis, axis, axis_dir)
+
+    def get_output_stats(self) -> dict:
+        """Gesendete/übersprungene RLink-Aufrufe je Funktion (siehe RLinkOutputCache.snapshot)."""
+        with self._lock:
+            return self.outputs.snapshot()
+
+    def _outputs_changed(self):
+        """Soll-Zustand geändert: ohne Writer sofort senden, sonst im nächsten Tick des Writers."""
+        if self._command_writer is None:
+            self.apply_outputs()
+
+    def _send_xy(self, x: int, y: int) -> bool:
+        return self.outputs.send("set_xy", None, (x, y), self.rlink.set_xy, x, y)
+
+    def _send_tilt_axis(self, axis_dir):
+        self._current_axis_dir[SEAT_TILT_AXIS_ID] = axis_dir
+        self.outputs.send("set_axis", SEAT_TILT_AXIS_ID, axis_dir, self.rlink.set_axis, SEAT_TILT_AXIS_ID, axis_dir)
+
+    def _load_config(self):
+        """Lädt Konfiguration aus JSON oder verwendet Defaults."""
+        if os.path.exists(self.config_filepath):
+            try:
+                config, warnings = load_config_file(self.config_filepath)
+                for warning in warnings:
+                    print(f"Warnung: {warning}")
+                self._apply_config(config)
+                print(f"Konfiguration aus {self.config_filepath} geladen.")
+                return
+            except (json.JSONDecodeError, IOError) as e:
+                print(f"Warnung: Fehler beim Laden von {self.config_filepath}: {e}. Verwende Defaults.", file=sys.stderr)
+        else:
+            print(f"Info: Konfigurationsdatei {self.config_filepath} nicht gefunden. Verwende Defaults und erstelle Datei.")
+
+        # Fallback zu Defaults, wenn Datei nicht existiert oder fehlerhaft war
+        self._apply_config(parse_config(DEFAULT_CONFIG)[0])
+        self._save_config() # Speichere Defaults
+
+    def _apply_config(self, config) -> ResponseCurves:
+        """
+        Baut die Tabellen für eine validierte Konfiguration und tauscht den Snapshot aus.
+        Der Steuerpfad liest self._curves einmal pro set_direction, ein Austausch während
+        der Fahrt wirkt also ab dem nächsten Joystick-Wert.
+        """
+        curves = ResponseCurves(config)
+        self._gear_factors = config["gear_factors"]
+        self._acceleration_step = curves.acceleration_step
+        self._pi_side_deadzone = config["pi_side_deadzone"]
+        self._min_rlink_command = config["min_rlink_command"]
+        self._curves = curves
+        return curves
+
+    def reload_config(self) -> dict:
+        """
+        Liest die Konfigurationsdatei neu und übernimmt sie ohne Neustart (ConfigWatcher, IPC).
+        Bei Fehlern bleibt die bisherige Konfiguration aktiv.
+        """
+        try:
+            config, warnings = load_config_file(self.config_filepath)
+        except (ValueError, OSError) as e:
+            print(f"Fehler beim Neuladen von {self.config_filepath}: {e}. Behalte Konfiguration v{self._curves.version}.",
+                  file=sys.stderr)
+            return {"ok": False, "error": str(e), "version": self._curves.version}
+        for warning in warnings:
+            print(f"Warnung: {warning}")
+        if config == self._curves.config:
+            return {"ok": True, "version": self._curves.version, "changed": False}
+        start = time.perf_counter()
+        curves = self._apply_config(config)
+        print(f"Konfiguration live übernommen ({(time.perf_counter() - start) * 1000:.1f} ms): {curves.describe()}")
+        return {"ok": True, "version": curves.version, "changed": True}
+
+    def get_config_version(self) -> int:
+        return self._curves.version
+
+    def _save_config(self):
+        """Speichert die aktuelle Konfiguration (Snapshot in self._curves)."""
+        config_data = dict(self._curves.config)
+        try:
+            with open(self.config_filepath, 'w') as f:
+                json.dump(config_data, f, indent=4)
+            print(f"Konfiguration in {self.config_filepath} gespeichert.")
+        except IOError as e:
+            print(f"Fehler beim Speichern der Konfiguration in {self.config_filepath}: {e}", file=sys.stderr)
+        if self.config_watcher:
+            self.config_watcher.mark_current() # Eigene Änderung nicht erneut laden
+
+    # --- Öffentliche Methoden zum Aktualisieren der Konfiguration (für Webinterface) ---
+    def update_gear_factor(self, gear: int, factor: float) -> bool:
+        gear_str = str(gear)
+        if 1 <= gear <= 5 and 0.0 <= factor <= 1.0:
+            config = dict(self._curves.config)
+            config["gear_factors"] = dict(config["gear_factors"], **{gear_str: factor})
+            self._apply_config(config)
+            self._save_config()
+            print(f"Gangfaktor für Gang {gear_str} auf {factor} aktualisiert.")
+            return True
+        print(f"Fehler: Ungültiger Gang ({gear}) oder Faktor ({factor}) für update_gear_factor.", file=sys.stderr)
+        return False
+
+    def update_acceleration_step(self, step: float) -> bool:
+        if step >= 0.1: # Erlaube kleine Beschleunigungsschritte
+            self._apply_config(dict(self._curves.config, acceleration_step=step))
+            self._save_config()
+            print(f"Beschleunigungsschritt auf {step} aktualisiert.")
+            return True
+        print(f"Fehler: Ungültiger Beschleunigungsschritt ({step}). Muss >= 0.1 sein.", file=sys.stderr)
+        return False
+
+    # --- Restliche Methoden (Funktionalität wie zuvor, Heartbeat, Shutdown etc.) ---
+    def get_current_sent_x(self) -> float:
+        """Gibt den aktuell an RLink gesendeten X-Wert (nach Rampe) zurück."""
+        return self._current_sent_x
+
+    def get_current_sent_y(self) -> float:
+        """Gibt den aktuell an RLink gesendeten Y-Wert (nach Rampe) zurück."""
+        return self._current_sent_y
+
+    def _heartbeat_thread_func(self):
+        print("Heartbeat thread started.")
+        while not self._quit_heartbeat.wait(timeout=HEARTBEAT_INTERVAL):
+            if self.rlink and self.rlink._opened:
+                try:
+                    self.rlink.heartbeat()
+                except RLinkError as e:
+                    print(f"Fehler im Heartbeat-Thread: {e}", file=sys.stderr); break
+                except Exception as e:
+                     print(f"Unerwarteter Fehler im Heartbeat-Thread: {e}", file=sys.stderr); break
+            else: break
+        print("Heartbeat thread finished.")
+
+    def shutdown(self):
+        print("WheelchairControlReal wird heruntergefahren...")
+        self._quit_heartbeat.set()
+        if self._heartbeat_thread is not None: self._heartbeat_thread.join(timeout=1.0)
+        if self.config_watcher:
+            self.config_watcher.stop()
+            self.config_watcher = None
+        if self.telemetry: self.telemetry.stop()
+        if self.rlink:
+            try:
+                 print("Stoppe Bewegung/Achsen vor Shutdown...")
+                 self.rlink.set_xy(0, 0)
+                 self.rlink.set_axis(SEAT_TILT_AXIS_ID, RLinkAxisDir.NONE)
+                 time.sleep(0.1)
+            except Exception as e: print(f"Warnung: Fehler Shutdown-Stop: {e}", file=sys.stderr)
+            self.rlink.destruct()
+            self.rlink = None
+        if self.recorder:
+            self.recorder.close()
+            self.recorder = None
+        print("WheelchairControlReal  heruntergefahren.")
+
+    def on_kantelung(self, on: bool):
+        with self._lock:
+            if on == self._tilt_mode_active: return
+            self._tilt_mode_active = on
+            print(f"Kantelungsmodus {'AKTIVIERT' if on else 'DEAKTIVIERT'}")
+            if self.rlink:
+                if on:
+                    # Mit Writer sendet dessen nächster Tick (0, 0), da die Rampe hier zurückgesetzt wird
+                    print(" -> Stoppe Fahren."); self._current_sent_x = 0.0; self._current_sent_y = 0.0
+                    if self._command_writer is None: self._send_xy(0, 0)
+                else:
+                    print(" -> Stoppe Kantelung."); self._current_axis_dir[SEAT_TILT_AXIS_ID] = RLinkAxisDir.NONE
+                    self._outputs_changed()
+
+    def get_kantelung(self) -> bool: return self._tilt_mode_active
+    def on_horn(self, on: bool):
+        with self._lock:
+            self._horn_on = on; print(f"Hupe: {'AN' if on else 'AUS'}")
+            self._outputs_changed()
+    def set_warn(self):
+        with self._lock:
+            self._warn_on = not self._warn_on; print(f"Warnblinker: {'AN' if self._warn_on else 'AUS'}")
+            self._light_state[RLinkLight.HAZARD] = self._warn_on
+            if self._warn_on: self._light_state[RLinkLight.LEFT] = False; self._light_state[RLinkLight.RIGHT] = False
+            self._outputs_changed()
+    def get_warn(self) -> bool: return self._warn_on
+    def set_lights(self):
+        with self._lock:
+            self._light_on = not self._light_on; print(f"Licht (DIP): {'AN' if self._light_on else 'AUS'}")
+            self._light_state[RLinkLight.DIP] = self._light_on
+            self._outputs_changed()
+    def get_lights(self) -> bool: return self._light_on
+
+    def get_wheelchair_speed(self) -> float:
+        if self.telemetry and self.telemetry.is_running():
+            speed = self.telemetry.get_value("speed") # Letzter Snapshot, kein ctypes-Aufruf
+            return speed[1] if speed is not None else 0.0
+        if self.rlink:
+            try: _, true_speed, _ = self.rlink.get_speed(); return true_speed
+            except RLinkError as e: print(f"Fehler get_speed: {e}", file=sys.stderr); return 0.0
+            except Exception as e: print(f"Unerw. Fehler get_speed: {e}", file=sys.stderr); return 0.0
+        else: return 0.0
+
+    def set_direction(self, direction: tuple[float, float]):
+        """Thread-safe Einstieg, siehe _set_direction."""
+        with self._lock:
+            self._set_direction(direction)
+
+    def _set_direction(self, direction: tuple[float, float]):
+        """
+        Setzt Fahrtrichtung ODER Kantelung. Im Fahrmodus wird der Input-Bereich [-1, 1]
+        (nach der Deadzone) auf den Output-Bereich [min_rlink_command/127, gear_factor] abgebildet,
+        um die physikalische Ansprechschwelle zu überwinden, ohne die Maximalgeschwindigkeit
+        des Ganges zu verändern. Wendet anschließend eine Beschleunigungsrampe an.
+        Erwartet normalisierte Joystick-Werte (-1.0 bis 1.0) von der ML2.
+        """
+        if not self.rlink: return # Abbruch, wenn keine RLink-Verbindung
+
+        # Eingabevalidierung
+        if not isinstance(direction, tuple) or len(direction) != 2:
+            print(f"Warnung: Ungültiges Format für set_direction: {direction}", file=sys.stderr)
+            self._last_raw_x = 0.0
+            self._last_raw_y = 0.0
+            # Setze Ziele auf 0, um sicher anzuhalten
+            self._target_x_for_ramping = 0.0
+            self._target_y_for_ramping = 0.0
+            # Wende Rampe an, um sanft zu stoppen (falls noch nicht geschehen)
+            if not self._tilt_mode_active: # Nur wenn im Fahrmodus
+                 try:
+                     self._apply_drive_ramp_and_send()
+                 except Exception as e: print(f"Warnung: Fehler beim Stoppen (ramp) bei ungültigem Input: {e}", file=sys.stderr)
+            # Kantelung auch stoppen
+            last_tilt_dir = self._current_axis_dir.get(SEAT_TILT_AXIS_ID, RLinkAxisDir.NONE)
+            if last_tilt_dir != RLinkAxisDir.NONE:
+                try:
+                    self._send_tilt_axis(RLinkAxisDir.NONE)
+                except Exception as e: print(f"Warnung: Fehler beim Stoppen der Kantelung bei ungültigem Input: {e}", file=sys.stderr)
+            return
+
+        raw_x, raw_y = direction # -1.0 bis 1.0 von ML2
+        self._last_raw_x = raw_x
+        self._last_raw_y = raw_y
+
+        # --- Logik für Kantelungsmodus ---
+        if self._tilt_mode_active:
+            # Fahrmodus stoppen (Ziel auf 0 setzen, Rampe anwenden)
+            self._target_x_for_ramping = 0.0
+            self._target_y_for_ramping = 0.0
+            try:
+                 self._apply_drive_ramp_and_send()
+            except Exception as e: print(f"Warnung: Fehler beim Stoppen (ramp) bei Wechsel zu Kantelung: {e}", file=sys.stderr)
+
+
+            # Y-Achse für Kantelung interpretieren
+            target_axis_dir = RLinkAxisDir.NONE
+            # Deadzone für Kantelung (kann anders sein als Fahr-Deadzone)
+            tilt_deadzone = 0.1 # Beispiel
+            if raw_y > tilt_deadzone and abs(raw_y) > TILT_THRESHOLD_NORMALIZED: target_axis_dir = RLinkAxisDir.UP
+            elif raw_y < -tilt_deadzone and abs(raw_y) > TILT_THRESHOLD_NORMALIZED: target_axis_dir = RLinkAxisDir.DOWN
+
+            last_dir = self._current_axis_dir.get(SEAT_TILT_AXIS_ID, RLinkAxisDir.NONE)
+            if target_axis_dir != last_dir:
+                try:
+                    self._send_tilt_axis(target_axis_dir)
+                    # Debug.Log($"Set Tilt Axis to: {target_axis_dir}");
+                except Exception as e: print(f"Fehler bei set_axis: {e}", file=sys.stderr)
+            return # Ende der Methode für Kantelungsmodus
+
+        # --- Logik für Fahrmodus ---
+        # Kantelungsmodus stoppen (falls noch aktiv)
+        last_tilt_dir = self._current_axis_dir.get(SEAT_TILT_AXIS_ID, RLinkAxisDir.NONE)
+        if last_tilt_dir != RLinkAxisDir.NONE:
+             try:
+                 self._send_tilt_axis(RLinkAxisDir.NONE)
+             except Exception as e: print(f"Warnung: Fehler beim Stoppen der Kantelung bei Wechsel zu Fahrmodus: {e}", file=sys.stderr)
+
+        # --- Input Remapping Logik ---
+        # Deadzone, min_rlink_command, Gangfaktor und Kennlinie sind im Snapshot vorberechnet
+        # (drive_config.ResponseCurves); hier bleibt pro Achse eine Multiplikation (linear) bzw. ein Tabellenzugriff.
+        curves = self._curves
+        target_x, target_y = curves.targets(self._current_gear, raw_x, raw_y)
+
+        # Setze die Ziele für die Rampe
+        self._target_x_for_ramping = target_x
+        self._target_y_for_ramping = target_y
+
+        # Wende Rampe an und sende Befehl
+        try:
+            self._apply_drive_ramp_and_send(curves.acceleration_step)
+        except Exception as e: print(f"Fehler in _apply_drive_ramp_and_send: {e}", file=sys.stderr)
+
+    def _apply_drive_ramp_and_send(self, step=None):
+        """Interne Methode, um die Rampe anzuwenden und set_xy zu senden."""
+        if not self.rlink: return
+        if step is None: step = self._curves.acceleration_step
+
+        # X-Achse Rampe
+        delta_x = self._target_x_for_ramping - self._current_sent_x
+        if abs(delta_x) < step:
+            self._current_sent_x = self._target_x_for_ramping
+        else:
+            self._current_sent_x += math.copysign(step, delta_x)
+
+        # Y-Achse Rampe
+        delta_y = self._target_y_for_ramping - self._current_sent_y
+        if abs(delta_y) < step:
+            self._current_sent_y = self._target_y_for_ramping
+        else:
+            self._current_sent_y += math.copysign(step, delta_y)
+
+        # Begrenzen auf den RLink Wertebereich (-127 bis 127)
+        final_x = int(round(max(-127.0, min(127.0, self._current_sent_x))))
+        final_y = int(round(max(-127.0, min(127.0, self._current_sent_y))))
+
+        # Unveränderte Werte (Joystick gehalten oder in Ruhe) werden nicht erneut gesendet
+        if self._send_xy(final_x, final_y):
+            self.last_set_xy_time = time.monotonic()
+        if self.recorder:
+            self._record_drive_sample(final_x, final_y)
+        # _last_sent_x/y werden nicht mehr für Moduswechsel gebraucht,
+        # da _target_x/y_for_ramping im Kantelungsmodus auf 0 gesetzt werden
+        # und die Rampe dann sanft auf 0 fährt.
+
+    def _record_drive_sample(self, final_x, final_y):
+        """Ein Datensatz für den Fahrtenschreiber (ersetzt die frühere RAMP-Debugausgabe)."""
+        flags = 0
+        if self._tilt_mode_active: flags |= FLAG_TILT
+        if self._light_on: flags |= FLAG_LIGHTS
+        if self._warn_on: flags |= FLAG_WARN
+        if self._horn_on: flags |= FLAG_HORN
+        speed = 0.0
+        if self.telemetry:
+            speed_values = self.telemetry.get_value("speed") # Snapshot, kein RLink-Aufruf
+            if speed_values is not None:
+                speed = speed_values[1]
+        self.recorder.record(self._last_raw_x, self._last_raw_y,
+                             self._target_x_for_ramping, self._target_y_for_ramping,
+                             final_x, final_y, self._current_gear, flags, speed)
+
+    def set_gear(self, gearUp: bool) -> int:
+        """Ändert den Software-Gang."""
+        with self._lock:
+            if gearUp:
+                if self._current_gear < 5: self._current_gear += 1
+            else:
+                if self._current_gear > 1: self._current_gear -= 1
+        print(f"Software-Gang auf {self._current_gear} gesetzt (Faktor: {self._gear_factors.get(str(self._current_gear), 'N/A')})")
+        # Hardware-Gang-Simulation (Button Press) bleibt wie es war, falls benötigt
+        # if self.rlink:
+        #     # ... (Kommentierter Code für Button Press) ...
+        return self._current_gear
+
+    def get_actual_gear(self) -> int:
+        """Gibt den aktuellen Software-Gang zurück."""
+        return self._current_gear
+"""
+# --- Testblock ---
+if __name__ == '__main__':
+    print("Starte Test für WheelchairControlReal mit Software-Gängen & Rampe...")
+    print(f"Konfigurationsdatei: {os.path.abspath(CONFIG_FILE)}")
+    print(f"Stelle sicher, dass die originale (fehlerhafte) udev-Regel aktiv ist!")
+
+    wc_instance = None
+    try:
+        wc_instance = WheelchairControlReal(device_index=0)
+
+        print("\n--- Teste Software-Gänge ---")
+        # Lade Faktoren aus der Instanz, um sicherzustellen, dass sie geladen wurden
+        print(f"Geladene Gang-Faktoren: {wc_instance._gear_factors}")
+        print(f"Geladener Beschl.-Schritt: {wc_instance._acceleration_step}")
+
+        for i in range(1, 7): # Teste alle Gänge, inkl. Versuch über Max hinaus
+            print(f"Aktueller Gang: {wc_instance.get_actual_gear()}")
+            if i < 5: wc_instance.set_gear(True) # True für Gang hoch
+            elif i == 5: wc_instance.set_gear(True) # Versuche über Max
+            elif i == 6: wc_instance.set_gear(False) # Gehe wieder runter
+            time.sleep(0.2)
+
+        print("\n--- Teste Beschleunigungsrampe (Vorwärts) ---")
+        print(f"Setze Software-Gang auf 5 für max. Geschwindigkeit.")
+        while wc_instance.get_actual_gear() < 5: wc_instance.set_gear(True)
+
+        print("Sende Ziel: (0, 1.0) = Volle Fahrt vorwärts im aktuellen Gang")
+        for i in range(30): # Simuliere Joystick wird gehalten
+            wc_instance.set_direction((0.0, 1.0)) # Joystick Y voll nach vorn
+            print(f"  Loop {i+1}: Gesendet X={int(round(wc_instance._current_sent_x))}, Y={int(round(wc_instance._current_sent_y))}")
+            time.sleep(0.05) # Simuliert Intervall der Joystick-Updates (20Hz)
+
+        print("Sende Ziel: (0, 0) - Stoppen")
+        for i in range(30): # Simuliere Stopp-Rampe
+            wc_instance.set_direction((0.0, 0.0))
+            print(f"  Loop {i+1} (Stop): Gesendet X={int(round(wc_instance._current_sent_x))}, Y={int(round(wc_instance._current_sent_y))}")
+            if abs(wc_instance._current_sent_x) < 0.01 and abs(wc_instance._current_sent_y) < 0.01 : # Werte sind nah an Null
+                # Ein paar Mal Null senden, um sicher zu stoppen
+                for _ in range(5):
+                    wc_instance.set_direction((0.0,0.0))
+                    print(f"  Final Stop: Gesendet X={int(round(wc_instance._current_sent_x))}, Y={int(round(wc_instance._current_sent_y))}")
+                    time.sleep(0.05)
+                break
+            time.sleep(0.05)
+
+        print("\n--- Teste Kantelung ---")
+        print("Aktiviere Kantelungsmodus")
+        wc_instance.on_kantelung(True)
+        print("Kantele HOCH (Joystick Y=1.0)")
+        for _ in range(20): # Simuliere halten
+            wc_instance.set_direction((0.0, 1.0))
+            time.sleep(0.1)
+        print("Stoppe Kantelung (Joystick Y=0.0)")
+        wc_instance.set_direction((0.0, 0.0))
+        time.sleep(0.5)
+        print("Deaktiviere Kantelungsmodus")
+        wc_instance.on_kantelung(False)
+        time.sleep(0.5)
+        print("Fahre kurz vorwärts nach Kantelungsmodus-Ende")
+        wc_instance.set_direction((0.0, 0.5))
+        time.sleep(1)
+        wc_instance.set_direction((0.0,0.0))
+
+
+    except ConnectionError as e:
+         print(f"Initialisierungsfehler: {e}")
+    except Exception as e:
+        print(f"Ein unerwarteter Fehler ist aufgetreten: {e}")
+        import traceback
+        traceback.print_exc()
+    finally:
+        if wc_instance:
+            wc_instance.shutdown()
+    print("\nTest beendet.")
+    """
\ No newline at end of file
@@ -0,0 +1,676 @@
+# app.py (Flask Webserver)
+
+from flask import Flask, render_template, request, jsonify, redirect, url_for, flash
+import subprocess
+import os
+import json
+import sys
+import time
+
+# --- Steuerkanal zum ZMQ-Server (optional, Trigger-Dateien bleiben als Fallback) ---
+try:
+    import ipc_control
+except ImportError as e:
+    print(f"WARNUNG: Steuerkanal nicht verfügbar ({e}). Verwende nur Trigger-Dateien.", file=sys.stderr)
+    ipc_control = None
+
+# --- Konfiguration für Rollstuhl-Pi-Parameter ---
+CONFIG_FILE_PI = "wheelchair_config.json"  # Für Pi-seitige Rollstuhlparameter
+GAMEPAD_MODE_TRIGGER_FILE = "/tmp/gamepad_mode_trigger.txt"
+GAMEPAD_START_WAIT = 2.0  # Sekunden, die das Webinterface auf das Ergebnis der Gamepad-Suche wartet
+GIT_PULL_DIRECTORY = "/home/jendrik/projekte/JoystickCommunicator"
+PATH_TO_START_ZMQ_SCRIPT = "/home/jendrik/projekte/scripts/start_zmq.sh"
+PATH_TO_STOP_ZMQ_SCRIPT = "/home/jendrik/projekte/scripts/stop_zmq.sh"
+JOYSTICK_VISIBILITY_TRIGGER_FILE = "/tmp/joystick_visibility_trigger.txt"
+DEFAULT_CONFIG_PI = {
+    "gear_factors": {
+        "1": 0.2, "2": 0.4, "3": 0.6, "4": 0.8, "5": 1.0
+    },
+    "acceleration_step": 2.0,
+    "pi_side_deadzone": 0.1,
+    "min_rlink_command": 10,
+    "response_curve": "linear",
+    "curve_strength": 0.5,
+    "forward_scale": 1.0,
+    "turn_scale": 1.0
+}
+RESPONSE_CURVES_PI = ("linear", "expo", "s_curve")  # Siehe drive_config.CURVES
+
+# --- Konfiguration für ML2 Joystick-Parameter ---
+CONFIG_FILE_ML2 = "ml2_joystick_config.json"  # Für ML2-seitige Joystick-Parameter
+DEFAULT_CONFIG_ML2 = {
+    "activationDuration": 1.0,
+    "graceDuration": 0.5,
+    "recenterDuration": 0.25,
+    "rotationThreshold": 1.5,
+    "rotationSmoothSpeed": 10.0,
+    "historyLength": 0,
+    "handleSmoothSpeed": 8.0,
+    "visualizerSmoothSpeed": 8.0,
+    "rotationExponent": 1.8,
+    "rotationDeadZone": 0.1,
+    "outputSensitivity": 0.7
+}
+
+# --- Trigger-Datei für ZeroMQ-Server ---
+# Server.py wird diese Datei überwachen und bei Änderung/Erstellung den Inhalt an ML2 senden
+ZMQ_ML2_CONFIG_TRIGGER_FILE = "send_ml2_config_trigger.flag"
+
+# --- Flask App Initialisierung ---
+app = Flask(__name__)
+app.secret_key = os.urandom(24)
+
+# --- Konfiguration für ML2 Sprachbefehle (Legacy) ---
+DATA_FILE_PI_LEGACY = "data.txt"  # Für alte Sprachbefehl-Logik
+DATA_FILE_ML2_LEGACY = '/storage/emulated/0/Android/data/de.IMC.EyeJoystick/files/data.txt'
+init_commands_legacy = {
+    "joystick": "Steuerung Aktivieren", "lights": "Licht AN/AUS", "warn": "Warnblinker AN/AUS",
+    "hornOn": "Hupe AN", "hornOff": "Hupe AUS", "kantelungOn": "Sitzk. AN",
+    "kantelungOff": "Sitzk. AUS", "gearUp": "Schneller", "gearDown": "Langsamer",
+    "language": "Deutsch"
+}
+gamepad_web_switch_enabled = False # Initial auf AUS setzen
+
+# --- Hilfsfunktionen für JSON Konfiguration (generisch) ---
+def load_config(filepath, defaults):
+    config = defaults.copy()
+    if os.path.exists(filepath):
+        try:
+            with open(filepath, 'r') as f:
+                loaded_data = json.load(f)
+                if isinstance(loaded_data, dict):
+                    # Überschreibe Defaults nur mit tatsächlich geladenen Keys,
+                    # um die Struktur der Defaults beizubehalten, falls Keys fehlen
+                    for key in defaults.keys():
+                        if key in loaded_data:
+                            # Hier könnte man noch Typ-Prüfungen und Validierungen für jeden Key machen
+                            if isinstance(defaults[key], dict) and isinstance(loaded_data[key], dict):
+                                # Für verschachtelte Dictionaries wie gear_factors
+                                for sub_key in defaults[key].keys():
+                                    if sub_key in loaded_data[key]:
+                                        try:  # Versuch der Typkonvertierung für Sub-Keys
+                                            if isinstance(defaults[key][sub_key], float):
+                                                config[key][sub_key] = float(loaded_data[key][sub_key])
+                                            elif isinstance(defaults[key][sub_key], int):
+                                                config[key][sub_key] = int(loaded_data[key][sub_key])
+                                            else:  # String oder anderes
+                                                config[key][sub_key] = loaded_data[key][sub_key]
+                                        except (ValueError, TypeError):
+                                            print(
+                                                f"Warnung: Ungültiger Typ für {key}.{sub_key} in {filepath}. Verwende Default.")
+                                            # Default ist schon in config[key][sub_key]
+                                    # else: Default für sub_key bleibt erhalten
+                            else:  # Für nicht-verschachtelte Keys
+                                try:  # Versuch der Typkonvertierung
+                                    if isinstance(defaults[key], float):
+                                        config[key] = float(loaded_data[key])
+                                    elif isinstance(defaults[key], int):
+                                        config[key] = int(loaded_data[key])
+                                    else:  # String oder anderes
+                                        config[key] = loaded_data[key]
+                                except (ValueError, TypeError):
+                                    print(f"Warnung: Ungültiger Typ für {key} in {filepath}. Verwende Default.")
+                                    # Default bleibt erhalten
+                        # else: Default für key bleibt erhalten
+                else:
+                    print(f"Warnung: {filepath} enthält kein valides JSON-Objekt. Verwende Defaults.")
+        except (json.JSONDecodeError, IOError) as e:
+            print(f"Warnung: Fehler beim Laden von {filepath}: {e}. Verwende Defaults.")
+    else:
+        print(
+            f"Info: Konfigurationsdatei {filepath} nicht gefunden. Verwende Defaults und erstelle sie beim Speichern.")
+    return config
+
+
+def save_config(filepath, config_data):
+    try:
+        with open(filepath, 'w') as f:
+            json.dump(config_data, f, indent=4)
+        print(f"Konfiguration erfolgreich in {filepath} gespeichert.")
+        return True
+    except IOError as e:
+        print(f"Fehler beim Speichern von {filepath}: {e}", file=sys.stderr)
+        return False
+
+
+def send_server_command(cmd, **params):
+    """
+    Schickt einen Befehl über den Steuerkanal an Server.py.
+    Gibt die Antwort ({"ok", "result", "error"}) zurück oder None, wenn der Server nicht erreichbar ist
+    (nur dann greifen die Trigger-Dateien). Kam keine Antwort, obwohl die Anfrage gesendet wurde, ist
+    der Befehl eventuell schon ausgeführt: dann kommt eine Fehler-Antwort mit "timeout": True zurück.
+    """
+    if ipc_control is None:
+        return None
+    try:
+        return ipc_control.send_command(cmd, **params)
+    except ipc_control.ControlChannelTimeout as e:
+        print(f"Steuerkanal: keine Antwort auf {cmd}: {e}", file=sys.stderr)
+        return {"ok": False, "result": {}, "error": str(e), "timeout": True}
+    except ipc_control.ControlChannelError as e:
+        print(f"Steuerkanal nicht erreichbar ({cmd}): {e}. Verwende Trigger-Datei.", file=sys.stderr)
+        return None
+
+
+# --- Captive Portal Check ---
+@app.before_request
+def check_for_captive_portal():
+    # ... (Code wie in deiner letzten funktionierenden Version) ...
+    expected_host = "192.168.4.1";
+    allowed_hosts = [expected_host, "localhost", "127.0.0.1"]
+    host_received = request.host.split(':')[0]
+    if not request.url: app.logger.error("Request URL is empty/None in captive portal check."); return
+    expected_url_root = f'http://{expected_host}/'
+    if not request.url.startswith(expected_url_root) and host_received not in allowed_hosts:
+        app.logger.warning(f"--> Captive portal redirect: {request.host} to {expected_host}")
+        return redirect(expected_url_root)
+
+
+# --- Routen für ML2 Sprachbefehle (Legacy) ---
+@app.route("/")
+def index():
+    # ... (Code wie in deiner letzten funktionierenden Version für data.txt) ...
+    initial_data = init_commands_legacy.copy()  # Start mit Defaults
+    try:
+        # ADB Pull Logik hier
+        # ... (Deine Logik zum Holen und Verarbeiten von DATA_FILE_PI_LEGACY) ...
+        if os.path.exists(DATA_FILE_PI_LEGACY):  # Beispiel, wenn Pull fehlgeschlagen, aber Datei da ist
+            with open(DATA_FILE_PI_LEGACY, "r") as f:
+                lines = [line.strip() for line in f.readlines()]
+            keys = list(init_commands_legacy.keys())
+            for i, key in enumerate(keys):
+                if i < len(lines): initial_data[key] = lines[i]
+    except Exception as e:
+        print(f"Fehler beim Laden der Legacy-Daten für Index: {e}")
+    return render_template("index.html", data=initial_data)
+
+
+@app.route("/save", methods=["POST"])
+def save_data():
+    # ... (Code wie in deiner letzten funktionierenden Version für data.txt) ...
+    try:
+        form_data = [request.form.get(key, init_commands_legacy[key]) for key in init_commands_legacy.keys()]
+        with open(DATA_FILE_PI_LEGACY, "w") as f:
+            for item in form_data: f.write(item + "\n")
+        # ADB Push Logik hier
+        # ...
+        flash("Sprachbefehle (Legacy) gespeichert und übertragen!", "success")
+    except Exception as e:
+        flash(f"Fehler beim Speichern der Sprachbefehle: {str(e)}", "error")
+    return redirect(url_for('index'))
+
+
+# --- Routen für Rollstuhl-Pi-Parameter Konfiguration ---
+@app.route('/config', methods=['GET'])
+def show_config():
+    current_pi_config = load_config(CONFIG_FILE_PI, DEFAULT_CONFIG_PI)
+    # Sicherstellen, dass alle Gänge im Dictionary sind für das Template
+    for i in range(1, 6):
+        key = str(i)
+        if key not in current_pi_config["gear_factors"]:
+            # Nimm Default für diesen spezifischen Gang, falls er fehlt
+            current_pi_config["gear_factors"][key] = DEFAULT_CONFIG_PI["gear_factors"].get(key, 0.2 * i)
+    return render_template('config.html', config=current_pi_config)
+
+
+@app.route('/save_config', methods=['POST'])
+def save_config_route():
+    try:
+        config = load_config(CONFIG_FILE_PI, DEFAULT_CONFIG_PI)
+        valid = True;
+        new_gear_factors = {}
+
+        # Lese und validiere Gang-Faktoren
+        for i in range(1, 6):
+            key_html = f'gear{i}';
+            key_json = str(i)
+            factor_str = request.form.get(key_html)
+            if factor_str is None: flash(f"Fehlender Wert für Gang {i}.", "error"); valid = False; continue
+            try:
+                factor = float(factor_str)
+                if 0.0 <= factor <= 1.0:
+                    new_gear_factors[key_json] = factor
+                else:
+                    flash(f"Ungültiger Wert für Gang {i} (0.0-1.0).", "error"); valid = False
+            except ValueError:
+                flash(f"Ungültiger Zahlenwert für Gang {i}.", "error"); valid = False
+        if valid: config["gear_factors"] = new_gear_factors
+
+        # Lese und validiere Beschleunigung
+        accel_str = request.form.get('acceleration')
+        if accel_str is None:
+            flash("Fehlender Wert für Beschleunigung.", "error"); valid = False
+        else:
+            try:
+                accel = float(accel_str)
+                if accel >= 0.1:
+                    config["acceleration_step"] = accel
+                else:
+                    flash("Beschleunigung muss >= 0.1 sein.", "error"); valid = False
+            except ValueError:
+                flash("Ungültiger Zahlenwert für Beschleunigung.", "error"); valid = False
+
+        # Lese und validiere Pi Side Deadzone
+        pideadzone_str = request.form.get('pi_deadzone')
+        if pideadzone_str is None:
+            flash("Fehlender Wert für Pi Deadzone.", "error"); valid = False
+        else:
+            try:
+                dz = float(pideadzone_str)
+                if 0.0 <= dz < 1.0:
+                    config["pi_side_deadzone"] = dz
+                else:
+                    flash("Pi Deadzone muss 0.0 bis <1.0 sein.", "error"); valid = False
+            except ValueError:
+                flash("Ungültiger Zahlenwert für Pi Deadzone.", "error"); valid = False
+
+        # Lese und validiere Min RLink Command
+        mincmd_str = request.form.get('min_command')
+        if mincmd_str is None:
+            flash("Fehlender Wert für Min. RLink Command.", "error"); valid = False
+        else:
+            try:
+                cmd = int(mincmd_str)
+                if 1 <= cmd <= 50:
+                    config["min_rlink_command"] = cmd
+                else:
+                    flash("Min. RLink Command muss 1 bis 50 sein.", "error"); valid = False
+            except ValueError:
+                flash("Ungültiger Ganzzahl-Wert für Min. RLink Cmd.", "error"); valid = False
+
+        # Lese und validiere Kennlinie (optional, ältere Formulare senden sie nicht)
+        curve = request.form.get('response_curve', config["response_curve"])
+        if curve in RESPONSE_CURVES_PI:
+            config["response_curve"] = curve
+        else:
+            flash(f"Unbekannte Kennlinie: {curve}.", "error"); valid = False
+        for key_html, key_json, label in (('curve_strength', 'curve_strength', "Kennlinien-Stärke"),
+                                          ('forward_scale', 'forward_scale', "Faktor Vor/Zurück"),
+                                          ('turn_scale', 'turn_scale', "Faktor Drehen")):
+            try:
+                value = float(request.form.get(key_html, config[key_json]))
+                if 0.0 <= value <= 1.0:
+                    config[key_json] = value
+                else:
+                    flash(f"{label} muss 0.0 bis 1.0 sein.", "error"); valid = False
+            except (ValueError, TypeError):
+                flash(f"Ungültiger Zahlenwert für {label}.", "error"); valid = False
+
+        if valid:
+            if save_config(CONFIG_FILE_PI, config):
+                flash("Rollstuhl Pi-Parameter erfolgreich gespeichert!", "success")
+                # Server.py übernimmt die Datei ohnehin nach spätestens ~1 s, der Befehl macht es sofort
+                reply = send_server_command(ipc_control.CMD_RELOAD_CONFIG) if ipc_control else None
+                if reply and reply["ok"]:
+                    flash(f"Änderungen live übernommen (Konfiguration v{reply['result'].get('config_version')}).",
+                          "success")
+                elif reply:
+                    flash(f"Server konnte die Konfiguration nicht neu laden: {reply.get('error')}", "error")
+            else:
+                flash("Fehler beim Speichern der Pi-Parameter.", "error")
+        else:
+            flash("Pi-Parameter NICHT gespeichert (ungültige Werte).", "warning")
+    except Exception as e:
+        flash(f"Fehler Speichern Pi-Konfig: {e}", "error");
+        print(f"Fehler in /save_config: {e}", file=sys.stderr)
+    return redirect(url_for('show_config'))
+
+
+# --- Routen für ML2 Joystick-Parameter Konfiguration ---
+@app.route('/ml2_config', methods=['GET'])
+def show_ml2_config():
+    current_ml2_config = load_config(CONFIG_FILE_ML2, DEFAULT_CONFIG_ML2)
+    return render_template('ml2_config.html', config=current_ml2_config)
+
+@app.route('/control/git_pull', methods=['POST'])
+def git_pull_route():
+    """Führt 'git pull' im angegebenen Verzeichnis aus."""
+    abs_path = os.path.abspath(GIT_PULL_DIRECTORY)
+    print(f"Versuche 'git pull' in {abs_path} via Web-Button.")
+    message = f"Git pull für {abs_path} wird versucht..."
+    category = "info"
+
+    # Prüfe, ob das Verzeichnis existiert
+    if not os.path.isdir(abs_path):
+        message = f"Fehler: Verzeichnis {abs_path} nicht gefunden!"
+        category = "error"
+        print(message, file=sys.stderr)
+        flash(message, category)
+        return redirect(url_for('index'))
+
+    git_command = ['git', 'pull']
+    try:
+        # Führe 'git pull' direkt aus, im richtigen Verzeichnis (cwd)
+        # Läuft als der Benutzer, der den Flask-Server ausführt!
+        result = subprocess.run(
+            git_command,
+            cwd=abs_path,                   # WICHTIG: Arbeitsverzeichnis setzen!
+            capture_output=True,
+            text=True,
+            check=True,                     # Löst CalledProcessError aus, wenn git pull fehlschlägt
+            timeout=45                      # Timeout für den Pull-Vorgang
+        )
+        message = f"'git pull' in {abs_path} erfolgreich!"
+        category = "success"
+        print(f"Git pull erfolgreich. Ausgabe:\n{result.stdout}")
+        # Zeige die Git-Ausgabe in der Flash-Nachricht an (kann lang sein!)
+        flash(message + f"\n--- Git Output ---\n{result.stdout}\n--- End Output ---", category)
+
+    except FileNotFoundError:
+        message = "Fehler: 'git' Kommando nicht gefunden. Ist git installiert und im PATH?"
+        category = "error"
+        print(message, file=sys.stderr)
+        flash(message, category)
+    except subprocess.CalledProcessError as e:
+        message = f"Fehler bei 'git pull' in {abs_path} (Exit Code {e.returncode})."
+        category = "error"
+        error_details = e.stderr.strip() if e.stderr else e.stdout.strip() # Manchmal ist Fehler in stdout
+        print(f"{message}\nFehlermeldung von Git:\n{error_details}", file=sys.stderr)
+        flash(message + f"\n--- Git Error ---\n{error_details}\n--- End Error ---", category)
+    except subprocess.TimeoutExpired:
+        message = f"Timeout beim Ausführen von 'git pull' in {abs_path}."
+        category = "error"
+        print(message, file=sys.stderr)
+        flash(message, category)
+    except Exception as e:
+        message = f"Unerwarteter Fehler beim 'git pull': {str(e)}"
+        category = "error"
+        print(message, file=sys.stderr)
+        flash(message, category)
+
+    return redirect(url_for('index'))
+
+
+@app.route('/save_ml2_config', methods=['POST'])
+def save_ml2_config_route():
+    try:
+        config = load_config(CONFIG_FILE_ML2, DEFAULT_CONFIG_ML2)  # Aktuelle/Defaults laden
+        valid = True
+
+        # --- Alle ML2 Parameter hier abrufen und validieren ---
+        # Beispielhaft für einige Parameter:
+        try:
+            config["activationDuration"] = max(0.1, min(5.0, float(
+                request.form.get('activationDuration', config["activationDuration"]))))
+        except (ValueError, TypeError):
+            flash("Ungültige Aktivierungsdauer", "error"); valid = False
+
+        try:
+            config["graceDuration"] = max(0.1,
+                                          min(3.0, float(request.form.get('graceDuration', config["graceDuration"]))))
+        except (ValueError, TypeError):
+            flash("Ungültige Toleranzperiode", "error"); valid = False
+
+        try:
+            config["recenterDuration"] = max(0.05, min(2.0, float(
+                request.form.get('recenterDuration', config["recenterDuration"]))))
+        except (ValueError, TypeError):
+            flash("Ungültige Re-Zentrierungsdauer", "error"); valid = False
+
+        try:
+            config["rotationThreshold"] = max(0.5, min(5.0, float(
+                request.form.get('rotationThreshold', config["rotationThreshold"]))))
+        except (ValueError, TypeError):
+            flash("Ungültige Rotationsschwelle", "error"); valid = False
+
+        try:
+            config["rotationSmoothSpeed"] = max(1.0, min(50.0, float(
+                request.form.get('rotationSmoothSpeed', config["rotationSmoothSpeed"]))))
+        except (ValueError, TypeError):
+            flash("Ungültige Rotationsglättung", "error"); valid = False
+
+        try:
+            config["historyLength"] = max(0, min(20, int(request.form.get('historyLength', config["historyLength"]))))
+        except (ValueError, TypeError):
+            flash("Ungültige History-Länge", "error"); valid = False
+
+        try:
+            config["handleSmoothSpeed"] = max(1.0, min(50.0, float(
+                request.form.get('handleSmoothSpeed', config["handleSmoothSpeed"]))))
+        except (ValueError, TypeError):
+            flash("Ungültige Griffglättung", "error"); valid = False
+
+        try:
+            config["visualizerSmoothSpeed"] = max(1.0, min(50.0, float(
+                request.form.get('visualizerSmoothSpeed', config["visualizerSmoothSpeed"]))))
+        except (ValueError, TypeError):
+            flash("Ungültige Visualizerglättung", "error"); valid = False
+
+        try:
+            config["rotationExponent"] = max(1.0, min(3.0, float(
+                request.form.get('rotationExponent', config["rotationExponent"]))))
+        except (ValueError, TypeError):
+            flash("Ungültiger Rotationsexponent", "error"); valid = False
+
+        try:
+            config["rotationDeadZone"] = max(0.0, min(0.49, float(
+                request.form.get('rotationDeadZone', config["rotationDeadZone"]))))
+        except (ValueError, TypeError):
+            flash("Ungültige Rotations-Deadzone", "error"); valid = False
+
+        try:
+            config["outputSensitivity"] = max(0.1, min(1.0, float(
+                request.form.get('outputSensitivity', config["outputSensitivity"]))))
+        except (ValueError, TypeError):
+            flash("Ungültige Output-Sensitivität", "error"); valid = False
+
+        if valid:
+            if save_config(CONFIG_FILE_ML2, config):  # Speichere in ml2_joystick_config.json
+                flash("ML2-Joystick-Einstellungen gespeichert.", "success")
+                reply = send_server_command(ipc_control.CMD_SEND_ML2_CONFIG, config=config) if ipc_control else None
+                if reply and reply["ok"]:
+                    flash("ML2-Konfiguration an die ML2 übertragen.", "success")
+                    return redirect(url_for('show_ml2_config'))
+                if reply:
+                    flash(f"ML2-Konfiguration nicht direkt übertragen ({reply.get('error')}), "
+                          f"wird bei der nächsten Verbindung gesendet.", "info")
+                # Fallback: Erstelle/Aktualisiere die Trigger-Datei mit dem JSON-Inhalt
+                try:
+                    with open(ZMQ_ML2_CONFIG_TRIGGER_FILE, "w") as f:
+                        json.dump(config, f)  # Schreibe das config Dictionary als JSON
+                    print(
+                        f"Trigger-Datei '{ZMQ_ML2_CONFIG_TRIGGER_FILE}' für ML2-Konfigurationsupdate geschrieben/aktualisiert.")
+                    flash("ML2-Konfigurationsupdate ausgelöst.", "info")
+                except Exception as e_trigger:
+                    flash(f"Fehler beim Schreiben der Trigger-Datei: {e_trigger}", "error")
+                    print(f"Fehler beim Schreiben der Trigger-Datei: {e_trigger}", file=sys.stderr)
+            else:
+                flash("Fehler beim Speichern der ML2-Joystick-Einstellungen.", "error")
+        else:
+            flash("ML2-Joystick-Einstellungen NICHT gespeichert (ungültige Werte).", "warning")
+
+    except Exception as e:
+        flash(f"Unerwarteter Fehler beim Speichern der ML2-Konfig: {e}", "error")
+        print(f"Unerwarteter Fehler in /save_ml2_config: {e}", file=sys.stderr)
+
+    return redirect(url_for('show_ml2_config'))
+
+@app.route('/control_zmq_server/start', methods=['POST'])
+def zmq_server_start():
+    app.logger.info("Versuche ZMQ-Server-Start via Web-Button.") # Falls app.logger konfiguriert ist
+    message = "Startbefehl für ZMQ-Server gesendet."
+    category = "success"
+    try:
+        # Führe das Start-Skript aus
+        result = subprocess.run(
+            ['sudo', PATH_TO_START_ZMQ_SCRIPT],
+            capture_output=True, text=True, check=True, timeout=10
+        )
+        message += f" Ausgabe: {result.stdout.strip()}"
+    except FileNotFoundError:
+        message = f"Fehler: Start-Skript für ZMQ nicht gefunden unter {PATH_TO_START_ZMQ_SCRIPT}"
+        category = "error"
+        if app.logger: app.logger.error(message)
+    except subprocess.CalledProcessError as e:
+        message = f"Fehler beim Starten des ZMQ-Servers: {e.stderr.strip()}"
+        category = "error"
+        if app.logger: app.logger.error(f"CalledProcessError ZMQ Start: {e.stderr.strip()}")
+    except subprocess.TimeoutExpired:
+        message = "Timeout beim Starten des ZMQ-Servers."
+        category = "error"
+        if app.logger: app.logger.error(message)
+    except Exception as e:
+        message = f"Unerwarteter Fehler beim ZMQ-Start: {str(e)}"
+        category = "error"
+        if app.logger: app.logger.error(message)
+
+    flash(message, category)
+    return redirect(url_for('index')) # Leite zurück zur Hauptseite
+
+@app.route('/control_zmq_server/stop', methods=['POST'])
+def zmq_server_stop():
+    app.logger.info("Versuche ZMQ-Server-Stopp via Web-Button.") # Falls app.logger konfiguriert ist
+    message = "Stoppbefehl für ZMQ-Server gesendet."
+    category = "success"
+    try:
+        # Führe das Stopp-Skript aus
+        result = subprocess.run(
+            ['sudo', PATH_TO_STOP_ZMQ_SCRIPT],
+            capture_output=True, text=True, check=True, timeout=10
+        )
+        message += f" Ausgabe: {result.stdout.strip()}"
+    except FileNotFoundError:
+        message = f"Fehler: Stopp-Skript für ZMQ nicht gefunden unter {PATH_TO_STOP_ZMQ_SCRIPT}"
+        category = "error"
+        if app.logger: app.logger.error(message)
+    except subprocess.CalledProcessError as e:
+        message = f"Fehler beim Stoppen des ZMQ-Servers: {e.stderr.strip()}"
+        category = "error"
+        if app.logger: app.logger.error(f"CalledProcessError ZMQ Stopp: {e.stderr.strip()}")
+    except subprocess.TimeoutExpired:
+        message = "Timeout beim Stoppen des ZMQ-Servers."
+        category = "error"
+        if app.logger: app.logger.error(message)
+    except Exception as e:
+        message = f"Unerwarteter Fehler beim ZMQ-Stopp: {str(e)}"
+        category = "error"
+        if app.logger: app.logger.error(message)
+
+    flash(message, category)
+    return redirect(url_for('index'))
+
+
+@app.route('/toggle_joystick', methods=['POST'])
+def toggle_joystick_visibility_route():
+    action_message = "Signal zum Umschalten der Joystick-Sichtbarkeit wird angefordert..."
+    category = "info"
+    print(f"Web-Button: {action_message}")  # Serverseitiges Logging
+
+    reply = send_server_command(ipc_control.CMD_TOGGLE_JOYSTICK_VISIBILITY) if ipc_control else None
+    if reply is not None:
+        if reply["ok"]:
+            flash("Joystick-Sichtbarkeit an ML2 gesendet.", "success")
+        else:
+            flash(f"Joystick-Sichtbarkeit nicht umgeschaltet: {reply.get('error')}", "error")
+        return redirect(url_for('index'))
+
+    try:
+        # Fallback: Erstelle die Trigger-Datei (Inhalt ist hier nicht so wichtig, Existenz reicht)
+        with open(JOYSTICK_VISIBILITY_TRIGGER_FILE, "w") as f:
+            f.write(str(time.time()))  # Schreibe Zeitstempel als Inhalt, um Modifikation sicherzustellen
+
+        message = "Trigger-Datei für Joystick-Sichtbarkeit erstellt."
+        category = "success"
+        flash(message, category)
+        print(message)
+
+    except IOError as e:
+        message = f"Fehler beim Erstellen der Trigger-Datei '{JOYSTICK_VISIBILITY_TRIGGER_FILE}': {e}"
+        category = "error"
+        print(message, file=sys.stderr)
+        flash(message, category)
+    except Exception as e:
+        message = f"Unerwarteter Fehler beim Trigger für Joystick-Sichtbarkeit: {str(e)}"
+        category = "error"
+        print(message, file=sys.stderr)
+        flash(message, category)
+
+    return redirect(url_for('index'))  # Leite zurück zur Hauptseite
+
+@app.route('/toggle_gamepad_mode', methods=['POST'])
+def toggle_gamepad_mode_route():
+    global gamepad_web_switch_enabled # Dieser Schalter ist nur für die Anzeige im Webinterface
+    # Aktuellen Status wenn möglich vom Server holen statt nur dem Web-Schalter zu vertrauen
+    status_reply = send_server_command(ipc_control.CMD_GET_GAMEPAD_STATUS) if ipc_control else None
+    if status_reply is not None and not status_reply["ok"]:
+        # Server erreichbar, aber Status unbekannt (Timeout/Fehler): nicht blind umschalten
+        print(f"Gamepad-Status unbekannt, schalte nicht um: {status_reply.get('error')}", file=sys.stderr)
+        return "Server antwortet nicht, Gamepad-Status unbekannt. Bitte erneut versuchen.", 503
+    if status_reply:
+        gamepad_web_switch_enabled = status_reply["result"]["gamepad_enabled"]
+    requested = not gamepad_web_switch_enabled
+
+    reply = send_server_command(ipc_control.CMD_SET_GAMEPAD_MODE, enabled=requested) if status_reply else None
+    if reply is not None:
+        result = reply["result"]
+        # Der Server antwortet sofort und sucht das Gamepad im Hintergrund: Ergebnis abwarten
+        deadline = time.monotonic() + GAMEPAD_START_WAIT
+        while reply["ok"] and result.get("gamepad_starting") and time.monotonic() < deadline:
+            time.sleep(0.1)
+            status_reply = send_server_command(ipc_control.CMD_GET_GAMEPAD_STATUS)
+            if status_reply is None or not status_reply["ok"]:
+                break
+            result = status_reply["result"]
+        gamepad_web_switch_enabled = result.get("gamepad_enabled", False)
+        status_text = "AN" if gamepad_web_switch_enabled else "AUS"
+        if not reply["ok"]:
+            flash(f"Gamepad-Steuerung bleibt {status_text}: {reply.get('error')}", "error")
+        elif result.get("gamepad_starting"):
+            flash("Gamepad wird noch gesucht, Status bitte gleich erneut prüfen.", "info")
+        elif gamepad_web_switch_enabled == requested:
+            flash(f"Gamepad-Steuerung ist jetzt {status_text}.", "success")
+        else:
+            flash("Gamepad-Steuerung konnte nicht gestartet werden (kein Gamepad gefunden?).", "error")
+        return redirect(url_for('index'))
+
+    # Fallback: Trigger-Datei
+    gamepad_web_switch_enabled = requested
+    command_to_write = "ENABLE_GAMEPAD" if gamepad_web_switch_enabled else "DISABLE_GAMEPAD"
+    message, category = f"Gamepad-Steuerung wird auf '{command_to_write}' gesetzt.", "info"
+    try:
+        with open(GAMEPAD_MODE_TRIGGER_FILE, "w") as f: f.write(f"{command_to_write}:{time.time()}")
+        message = f"Befehl '{command_to_write}' in Trigger-Datei geschrieben."; category = "success"
+    except Exception as e: message = f"Fehler Schreiben Gamepad-Trigger: {e}"; category = "error"
+    flash(message, category); return redirect(url_for('index'))
+
+@app.route('/get_gamepad_status', methods=['GET'])
+def get_gamepad_status_route():
+    # Tatsächlichen Status über den Steuerkanal vom ZMQ-Server abfragen.
+    # Ist der Server nicht erreichbar, bleibt nur der zuletzt gewünschte Zustand des Web-Schalters.
+    global gamepad_web_switch_enabled
+    reply = send_server_command(ipc_control.CMD_GET_GAMEPAD_STATUS) if ipc_control else None
+    if reply and reply["ok"]:
+        gamepad_web_switch_enabled = reply["result"]["gamepad_enabled"]
+        return jsonify({"gamepad_enabled_by_web": gamepad_web_switch_enabled, "source": "server"})
+    return jsonify({"gamepad_enabled_by_web": gamepad_web_switch_enabled, "source": "web"})
+
+
+# --- ENDE Routen ---
+
+
+# --- Server Start ---
+if __name__ == "__main__":
+    print("Starte Flask Server (ML2-Sprache, Rollstuhl-Pi, ML2-Joystick Konfig)...")
+    # Initialisiere/Lade Konfig-Dateien beim Start & speichere sie (um Defaults zu garantieren)
+    save_config(CONFIG_FILE_PI, load_config(CONFIG_FILE_PI, DEFAULT_CONFIG_PI))
+    save_config(CONFIG_FILE_ML2, load_config(CONFIG_FILE_ML2, DEFAULT_CONFIG_ML2))
+
+    print("\nÖffne einen Webbrowser und gehe zu:")
+    print(f"http://<IP-DES-PI>:80/           (ML2 Sprachbefehle)")
+    print(f"http://<IP-DES-PI>:80/config     (Rollstuhl Pi-Parameter)")
+    print(f"http://<IP-DES-PI>:80/ml2_config (ML2 Joystick-Parameter)")
+    print("(Ersetze <IP-DES-PI> mit der IP des Raspberry Pi, z.B. 192.168.4.1 im Hotspot-Modus)")
+    print("(Drücke Strg+C zum Beenden)")
+    try:
+        app.run(host="0.0.0.0", port=80, debug=True)  # DEBUG MODE FÜR ENTWICKLUNG
+    except OSError as e:
+        # ... (Fehlerbehandlung Port 80 wie zuvor) ...
+        if e.errno == 98 or "Address already in use" in str(e):
+            print(f"\nFEHLER: Port 80 wird bereits verwendet.", file=sys.stderr)
+        elif e.errno == 13 or "Permission denied" in str(e):
+            print(f"\nFEHLER: Keine Berechtigung für Port 80.\nVersuche 'sudo python3 {os.path.basename(__file__)}'",
+                  file=sys.stderr)
+        else:
+            print(f"\nFEHLER beim Starten des Servers: {e}", file=sys.stderr)
+    except Exception as e:
+        print(f"\nAllgemeiner FEHLER beim Starten des Servers: {e}", file=sys.stderr)
\ No newline at end of file
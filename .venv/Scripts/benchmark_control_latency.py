@@ -0,0 +1,442 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# benchmark_control_latency.py
+# Performance-Benchmarks für Server.py ohne Hardware (normaler Linux-PC, kein RLink, keine ML2, keine Kamera).
+#
+# Server.py läuft in einem Thread dieses Prozesses mit RLINK_BACKEND=sim; ml2_sim_client.py
+# spielt die ML2 über echtes ZMQ/TCP auf 127.0.0.1. Gemessen wird:
+#   1. Latenz joystickPos senden -> rlink.set_xy (p50/p99)
+#   2. Maximale Joystick-Rate, bevor sich ein Rückstau aufbaut
+#   3. Jitter der RLink-Heartbeats
+#   4. Einfluss der Rückkamera (simulierte Picamera2, echtes JPEG-Encoding) auf die Steuerlatenz
+#   5. Time-to-Drive nach einem Verbindungsabbruch (WLAN-Aussetzer bzw. Neustart der ML2-App)
+#
+# Messprinzip: Die x-Achse wird in Stufen gesendet, deren set_xy-Wert vorher kalibriert wurde.
+# Alle MARKER_INTERVAL Sekunden wechselt die Stufe; die Latenz ist die Zeit vom Senden des
+# Stufenwechsels bis zum ersten set_xy mit dem neuen Wert. Dazwischen wird die gleiche Stufe
+# mit der eingestellten Rate wiederholt (Last). Die Rampe wird per Config abgeschaltet
+# (acceleration_step = 254), damit nur der Transport- und Steuerpfad gemessen wird.
+#
+# Hinweis: Client und Server teilen sich einen Prozess (und den GIL). Absolute Werte sind daher
+# eher pessimistisch, für Vorher/Nachher-Vergleiche auf derselben Maschine aber gut geeignet.
+#
+# Aufruf:  python benchmark_control_latency.py [--legacy] [--input-frames] [--quick]
+import os
+import sys
+import time
+import json
+import argparse
+import tempfile
+import threading
+import statistics
+
+# Muss vor dem Import von Server/WheelchairControlReal gesetzt sein
+os.environ.setdefault("RLINK_BACKEND", "sim")
+os.environ.setdefault("ML2_IP", "127.0.0.1")
+os.environ.setdefault("PC_BIND_IP", "127.0.0.1")
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+if SCRIPT_DIR not in sys.path:
+    sys.path.insert(0, SCRIPT_DIR)
+
+# --- Konfiguration ---
+BENCHMARK_WHEELCHAIR_CONFIG = {
+    "gear_factors": {"1": 1.0, "2": 1.0, "3": 1.0, "4": 1.0, "5": 1.0},
+    "acceleration_step": 254,  # Rampe aus: Ziel wird in einem Schritt erreicht
+    "pi_side_deadzone": 0.1,
+    "min_rlink_command": 10,
+}
+X_LEVELS = tuple(0.2 + i * 0.07 for i in range(12))  # 0.20 .. 0.97, jede Stufe ergibt einen eigenen set_xy-Wert
+FORWARD_Y = 0.5
+REVERSE_Y = -0.5            # Rückwärts -> Server startet die Rückkamera
+MARKER_INTERVAL = 0.05      # Sekunden zwischen Stufenwechseln
+DRAIN_TIME = 0.3            # Sekunden Nachlauf, damit die letzten Marker ankommen
+SETTLE_TIME = 0.3
+BACKLOG_GROWTH_S = 0.050    # Wächst der Median vom ersten zum letzten Drittel um mehr als das -> Rückstau
+SWEEP_RATES = (25, 50, 100, 200, 500, 1000, 2000, 5000)
+BASE_RATE = 50.0
+SIM_CAMERA_RESOLUTION = (640, 480)
+RECONNECT_TEST_TIMEOUT = 1.5  # Server.RECONNECT_INTERVAL während Messung 5 (Client-Heartbeat alle 1 s)
+RECONNECT_TEST_OUTAGE = 2.5   # Sekunden Funkstille, länger als der Heartbeat-Timeout
+
+
+class SimulatedPicamera2:
+    """Minimaler Picamera2-Ersatz: liefert Rauschbilder mit der konfigurierten Bildrate."""
+
+    def __init__(self):
+        import numpy as np
+        self._np = np
+        self._frames = None
+        self._frame_index = 0
+        self._frame_interval = 1.0 / 30
+        self._next_frame = 0.0
+        self.started = False
+
+    def create_video_configuration(self, main=None, controls=None):
+        return {"main": main or {}, "controls": controls or {}}
+
+    def configure(self, config):
+        width, height = config["main"].get("size", SIM_CAMERA_RESOLUTION)
+        frame_rate = config["controls"].get("FrameRate", 30.0)
+        self._frame_interval = 1.0 / max(1.0, frame_rate)
+        rng = self._np.random.default_rng(0)
+        # Rauschen ist für JPEG der teure Fall (pessimistische Encode-Last)
+        self._frames = [rng.integers(0, 256, (height, width, 3), dtype=self._np.uint8) for _ in range(4)]
+
+    def start(self):
+        self.started = True
+        self._next_frame = time.monotonic()
+
+    def stop(self):
+        self.started = False
+
+    def capture_array(self, name="main"):
+        # Wie die echte Kamera: blockiert bis zum nächsten Sensorbild
+        delay = self._next_frame - time.monotonic()
+        if delay > 0:
+            time.sleep(delay)
+        self._next_frame = max(self._next_frame + self._frame_interval, time.monotonic())
+        self._frame_index = (self._frame_index + 1) % len(self._frames)
+        return self._frames[self._frame_index]
+
+    def close(self):
+        self.started = False
+
+
+def percentile(sorted_values, p):
+    """Nearest-Rank-Perzentil einer sortierten Liste (p in 0..100)."""
+    if not sorted_values:
+        return float("nan")
+    index = max(0, min(len(sorted_values) - 1, int(round(p / 100.0 * len(sorted_values) + 0.5)) - 1))
+    return sorted_values[index]
+
+
+def latency_summary(latencies):
+    values = sorted(latencies)
+    if not values:
+        return {"n": 0, "p50_ms": float("nan"), "p99_ms": float("nan"), "max_ms": float("nan")}
+    return {"n": len(values), "p50_ms": percentile(values, 50) * 1000.0,
+            "p99_ms": percentile(values, 99) * 1000.0, "max_ms": values[-1] * 1000.0}
+
+
+class ControlLatencyBenchmark:
+    def __init__(self, server, client, rlink, out):
+        self.server = server
+        self.client = client
+        self.rlink = rlink
+        self.out = out
+        self.expected_x = {}  # X-Stufe -> kalibrierter set_xy-x-Wert
+
+    def log(self, text=""):
+        print(text, file=self.out, flush=True)
+
+    def _hold(self, x, y, seconds, rate=BASE_RATE):
+        period = 1.0 / rate
+        end = time.monotonic() + seconds
+        while time.monotonic() < end:
+            self.client.send_joystick(x, y)
+            self.client.keep_alive()
+            time.sleep(period)
+
+    def _last_set_xy(self):
+        calls = self.rlink.get_calls("set_xy")
+        return calls[-1].args if calls else None
+
+    def calibrate(self):
+        """Ermittelt für jede X-Stufe den set_xy-Wert, den der Server daraus macht."""
+        for level in X_LEVELS:
+            self._hold(level, FORWARD_Y, 0.15)
+            last = self._last_set_xy()
+            self.expected_x[level] = last[0] if last else None
+        values = list(self.expected_x.values())
+        if None in values or len(set(values)) != len(values):
+            raise RuntimeError(f"Kalibrierung fehlgeschlagen, Stufen nicht unterscheidbar: {self.expected_x}")
+        self.log(f"Kalibrierung: {', '.join(f'{k:.2f}->{v}' for k, v in self.expected_x.items())}")
+
+    def run(self, rate, duration, y=FORWARD_Y):
+        """Sendet mit 'rate' Hz für 'duration' Sekunden und gibt die Messwerte zurück."""
+        self._hold(X_LEVELS[0], y, SETTLE_TIME)
+        markers = []  # (Sendezeit, erwarteter set_xy-x-Wert)
+        period = 1.0 / rate
+        level_index = 0
+        sent = 0
+        start = time.monotonic()
+        end = start + duration
+        next_marker = start
+        next_send = start
+        camera_frames_before = len(self.client.camera_frame_times)
+
+        while True:
+            now = time.monotonic()
+            if now >= end:
+                break
+            marker = now >= next_marker
+            if marker:
+                level_index = (level_index + 1) % len(X_LEVELS)
+                next_marker += MARKER_INTERVAL
+            level = X_LEVELS[level_index]
+            send_time = self.client.send_joystick(level, y)
+            sent += 1
+            if marker:
+                markers.append((send_time, self.expected_x[level]))
+            self.client.keep_alive()
+
+            next_send += period
+            delay = next_send - time.monotonic()
+            if delay > 0.0005:
+                time.sleep(delay)
+            elif delay < -0.1:
+                next_send = time.monotonic()  # Sender selbst kommt nicht hinterher: nicht aufholen
+            else:
+                while time.monotonic() < next_send:
+                    pass
+        achieved_rate = sent / (time.monotonic() - start)
+        self._hold(X_LEVELS[level_index], y, DRAIN_TIME)
+
+        set_xy_calls = self.rlink.get_calls("set_xy", since=start)
+        heartbeats = self.rlink.get_calls("heartbeat", since=start)
+        latencies, unmatched = self._match_markers(markers, set_xy_calls)
+        return {
+            "rate": rate,
+            "achieved_rate": achieved_rate,
+            "sent": sent,
+            "markers": len(markers),
+            "latencies": latencies,
+            "unmatched": unmatched,
+            "set_xy_calls": len(set_xy_calls),
+            "heartbeat_times": [c.timestamp for c in heartbeats if c.timestamp <= end],
+            "camera_frames": len(self.client.camera_frame_times) - camera_frames_before,
+        }
+
+    def reconnect(self, outage, restart=False):
+        """
+        Client schweigt 'outage' Sekunden (WLAN weg) und sendet danach weiter bzw. verbindet sich
+        neu (App-Neustart). Gemessen wird die Zeit von der Rückkehr bis zum ersten set_xy mit dem
+        neuen Wert.
+        """
+        from ml2_sim_client import SimulatedML2Client
+
+        self._hold(X_LEVELS[0], FORWARD_Y, SETTLE_TIME)
+        address_before = self.client.read_server_address(timeout=1.0)
+        silence_start = time.monotonic()
+        while self.server.ml2_session_active and time.monotonic() - silence_start < outage:
+            time.sleep(0.01)
+        timeout_detected = None if self.server.ml2_session_active else time.monotonic() - silence_start
+        time.sleep(max(0.0, outage - (time.monotonic() - silence_start)))
+
+        back = time.monotonic()
+        if restart:
+            self.client.close()
+            self.client = SimulatedML2Client(self.client.pc_ip_file, use_input_frames=self.client.use_input_frames)
+            self.client.connect(timeout=10.0)
+        level = X_LEVELS[1]
+        expected = self.expected_x[level]
+        drive_time = None
+        while drive_time is None and time.monotonic() - back < 10.0:
+            self.client.send_joystick(level, FORWARD_Y)
+            self.client.keep_alive()
+            time.sleep(1.0 / BASE_RATE)
+            matched = [c.timestamp for c in self.rlink.get_calls("set_xy", since=back) if c.args[0] == expected]
+            if matched:
+                drive_time = matched[0] - back
+        return {
+            "restart": restart,
+            "outage_s": outage,
+            "timeout_detected_s": timeout_detected,
+            "time_to_drive_ms": None if drive_time is None else drive_time * 1000.0,
+            "server_time_to_drive_ms": self.server.reconnect_stats["last_time_to_drive_ms"],
+            "port_unchanged": self.client.read_server_address(timeout=1.0) == address_before,
+        }
+
+    def report_reconnect(self, name, result):
+        ttd = result["time_to_drive_ms"]
+        server_ttd = result["server_time_to_drive_ms"]
+        detected = result["timeout_detected_s"]
+        self.log(f"{name:<28} Time-to-Drive={'keine Fahrt' if ttd is None else f'{ttd:.0f}ms'} ab Rückkehr, "
+                 f"Server: {'n/a' if server_ttd is None else f'{server_ttd:.0f}ms'} ab letzter Nachricht | "
+                 f"Abbruch erkannt nach {'-' if detected is None else f'{detected:.2f}s'}, "
+                 f"Port {'unverändert' if result['port_unchanged'] else 'NEU'}")
+
+    @staticmethod
+    def _match_markers(markers, set_xy_calls):
+        """Ordnet jedem Marker in Reihenfolge das erste set_xy mit dem erwarteten Wert zu."""
+        latencies = []
+        unmatched = 0
+        j = 0
+        for send_time, expected in markers:
+            while j < len(set_xy_calls) and set_xy_calls[j].timestamp < send_time:
+                j += 1
+            k = j
+            while k < len(set_xy_calls) and set_xy_calls[k].args[0] != expected:
+                k += 1
+            if k == len(set_xy_calls):
+                unmatched += 1
+                continue
+            latencies.append(set_xy_calls[k].timestamp - send_time)
+            j = k
+        return latencies, unmatched
+
+    @staticmethod
+    def has_backlog(result):
+        latencies = result["latencies"]
+        if result["unmatched"] > max(1, result["markers"] // 50):
+            return True
+        third = len(latencies) // 3
+        if third < 3:
+            return False
+        growth = statistics.median(latencies[-third:]) - statistics.median(latencies[:third])
+        return growth > BACKLOG_GROWTH_S
+
+    @staticmethod
+    def heartbeat_jitter(times):
+        intervals = [b - a for a, b in zip(times, times[1:])]
+        if len(intervals) < 2:
+            return None
+        mean = statistics.mean(intervals)
+        deviations = sorted(abs(i - mean) for i in intervals)
+        return {"n": len(intervals), "mean_ms": mean * 1000.0, "std_ms": statistics.stdev(intervals) * 1000.0,
+                "p99_dev_ms": percentile(deviations, 99) * 1000.0, "max_dev_ms": deviations[-1] * 1000.0}
+
+    def report(self, name, result):
+        s = latency_summary(result["latencies"])
+        self.log(f"{name:<28} rate={result['rate']:>6.0f}Hz (ist {result['achieved_rate']:>7.1f}) "
+                 f"p50={s['p50_ms']:7.2f}ms p99={s['p99_ms']:7.2f}ms max={s['max_ms']:7.2f}ms "
+                 f"n={s['n']:>4} ohne Treffer={result['unmatched']:>3} set_xy={result['set_xy_calls']:>5}"
+                 f"{'  RÜCKSTAU' if self.has_backlog(result) else ''}")
+
+    def report_heartbeat(self, name, result):
+        jitter = self.heartbeat_jitter(result["heartbeat_times"])
+        if jitter is None:
+            self.log(f"{name:<28} zu wenige Heartbeats")
+            return
+        self.log(f"{name:<28} Intervall avg={jitter['mean_ms']:.1f}ms std={jitter['std_ms']:.2f}ms "
+                 f"p99-Abw.={jitter['p99_dev_ms']:.2f}ms max-Abw.={jitter['max_dev_ms']:.2f}ms (n={jitter['n']})")
+
+
+def start_server(server, legacy):
+    if legacy:
+        server.USE_DRIVE_CONTROL_THREAD = False
+    server.LATENCY_REPORT_INTERVAL = 0
+    thread = threading.Thread(target=server.run_server, name="BenchmarkServer", daemon=True)
+    thread.start()
+    return thread
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Steuerlatenz-Benchmarks für Server.py mit simuliertem RLink")
+    parser.add_argument("--legacy", action="store_true", help="set_direction pro Nachricht (ohne DriveControlThread)")
+    parser.add_argument("--input-frames", action="store_true", help="Binäre Input-Frames statt joystickPos")
+    parser.add_argument("--duration", type=float, default=5.0, help="Sekunden pro Messung")
+    parser.add_argument("--sweep-duration", type=float, default=3.0, help="Sekunden pro Rate im Sweep")
+    parser.add_argument("--quick", action="store_true", help="Kurze Messungen (Smoke-Test)")
+    parser.add_argument("--no-camera", action="store_true", help="Rückkamera-Messung überspringen")
+    parser.add_argument("--no-reconnect", action="store_true", help="Wiederverbindungs-Messung überspringen")
+    parser.add_argument("--verbose", action="store_true", help="Ausgaben des Servers nicht unterdrücken")
+    parser.add_argument("--json", help="Ergebnisse zusätzlich als JSON in diese Datei schreiben")
+    args = parser.parse_args()
+    if args.quick:
+        args.duration, args.sweep_duration = 1.5, 1.0
+
+    out = sys.stdout
+    workdir = tempfile.mkdtemp(prefix="jc_benchmark_")
+    json_path = os.path.abspath(args.json) if args.json else None
+    os.chdir(workdir)  # pc_ip.txt und wheelchair_config.json landen hier
+    with open("wheelchair_config.json", "w") as f:
+        json.dump(BENCHMARK_WHEELCHAIR_CONFIG, f)
+
+    camera_available = False
+    if not args.no_camera:
+        try:
+            import numpy  # noqa: F401  (für SimulatedPicamera2)
+            import RearCamera as rear_camera_module
+            rear_camera_module.Picamera2 = SimulatedPicamera2
+            camera_available = True
+        except ImportError as e:
+            print(f"Rückkamera-Messung nicht möglich (numpy/cv2 fehlt): {e}", file=out)
+
+    if not args.verbose:
+        sys.stdout = open(os.devnull, "w")
+    import Server
+    from ml2_sim_client import SimulatedML2Client
+
+    exit_code = 0
+    try:
+        start_server(Server, args.legacy)
+        client = SimulatedML2Client(os.path.join(workdir, Server.PC_IP_FILE), use_input_frames=args.input_frames)
+        connect_time = client.connect(timeout=30.0)
+        bench = ControlLatencyBenchmark(Server, client, Server.wheelchair.rlink, out)
+        mode = "Legacy (set_direction pro Nachricht)" if args.legacy else \
+            f"DriveControlThread {Server.DRIVE_CONTROL_RATE_HZ:.0f} Hz (Latest-Wins)"
+        bench.log(f"Modus: {mode}, Transport: {'input-Frames' if args.input_frames else 'joystickPos'}, "
+                  f"verbunden nach {connect_time * 1000:.0f} ms, Arbeitsverzeichnis {workdir}")
+        bench.calibrate()
+        results = {"mode": mode, "input_frames": args.input_frames}
+
+        bench.log("\n== 1. Latenz Joystick senden -> set_xy ==")
+        base = bench.run(BASE_RATE, args.duration)
+        bench.report("Basis", base)
+        results["base"] = latency_summary(base["latencies"])
+
+        bench.log("\n== 2. Rate-Sweep (maximale Rate ohne Rückstau) ==")
+        max_rate = None
+        results["sweep"] = []
+        for rate in SWEEP_RATES:
+            result = bench.run(rate, args.sweep_duration)
+            bench.report("Sweep", result)
+            backlog = bench.has_backlog(result)
+            results["sweep"].append(dict(latency_summary(result["latencies"]), rate=rate,
+                                         achieved_rate=result["achieved_rate"], backlog=backlog))
+            if backlog:
+                break
+            max_rate = result["achieved_rate"]
+        bench.log(f"Maximale Rate ohne Rückstau: {'< ' + str(SWEEP_RATES[0]) if max_rate is None else f'{max_rate:.0f}'} Hz"
+                  f"{' (Obergrenze des Sweeps erreicht)' if max_rate is not None and not backlog else ''}")
+        results["max_rate_without_backlog"] = max_rate
+
+        bench.log("\n== 3. RLink-Heartbeat-Jitter (Soll 200 ms) ==")
+        bench.report_heartbeat("Heartbeat (Basis)", base)
+        results["heartbeat"] = bench.heartbeat_jitter(base["heartbeat_times"])
+
+        if camera_available:
+            bench.log("\n== 4. Einfluss der Rückkamera ==")
+            forward = bench.run(BASE_RATE, args.duration, y=FORWARD_Y)
+            reverse = bench.run(BASE_RATE, args.duration, y=REVERSE_Y)
+            bench.report("Vorwärts (Kamera aus)", forward)
+            bench.report("Rückwärts (Kamera an)", reverse)
+            bench.report_heartbeat("Heartbeat (Kamera an)", reverse)
+            fwd, rev = latency_summary(forward["latencies"]), latency_summary(reverse["latencies"])
+            bench.log(f"Kamera: {reverse['camera_frames']} Bilder empfangen "
+                      f"({reverse['camera_frames'] / (args.duration + DRAIN_TIME):.1f} fps), "
+                      f"Δp50={rev['p50_ms'] - fwd['p50_ms']:+.2f}ms Δp99={rev['p99_ms'] - fwd['p99_ms']:+.2f}ms")
+            if Server.rear_camera:
+                stats = Server.rear_camera.get_stats()
+                bench.log(f"Encoder: avg={stats['encode_ms_avg']:.1f}ms Qualität={stats['jpeg_quality']} "
+                          f"Skalierung={stats['scale']} verworfen={stats['frames_dropped']}")
+            results["camera"] = {"off": fwd, "on": rev, "frames": reverse["camera_frames"],
+                                 "heartbeat_on": bench.heartbeat_jitter(reverse["heartbeat_times"])}
+
+        if not args.no_reconnect:
+            bench.log(f"\n== 5. Wiederverbindung (Heartbeat-Timeout {RECONNECT_TEST_TIMEOUT:.1f} s, "
+                      f"Funkstille {RECONNECT_TEST_OUTAGE:.1f} s) ==")
+            Server.RECONNECT_INTERVAL = RECONNECT_TEST_TIMEOUT
+            dropout = bench.reconnect(RECONNECT_TEST_OUTAGE)
+            bench.report_reconnect("WLAN-Aussetzer", dropout)
+            restart = bench.reconnect(RECONNECT_TEST_OUTAGE, restart=True)
+            bench.report_reconnect("App-Neustart", restart)
+            results["reconnect"] = {"dropout": dropout, "restart": restart, "stats": dict(Server.reconnect_stats)}
+
+        if json_path:
+            with open(json_path, "w") as f:
+                json.dump(results, f, indent=2)
+            bench.log(f"\nErgebnisse gespeichert in {json_path}")
+    except (TimeoutError, RuntimeError) as e:
+        print(f"Benchmark fehlgeschlagen: {e}", file=out)
+        exit_code = 1
+    out.flush()
+    # Server-Schleife und Sockets laufen in Daemon-Threads weiter; ohne sauberes Herunterfahren
+    # würde zmq beim Beenden des Interpreters blockieren.
+    os._exit(exit_code)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,192 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# benchmark_response_curves.py
+# Micro-Benchmark für das Joystick-Remapping in WheelchairControlReal (ohne Hardware, RLINK_BACKEND=sim).
+#
+# Gemessen wird:
+#   1. Remapping pro Joystick-Wert: frühere Berechnung (Kopie unten) gegen drive_config.ResponseCurves
+#      für jede Kennlinie (linear: Formel mit vorberechnetem Offset/Steigung, expo/s_curve: Tabellen)
+#   2. Kompletter set_direction-Aufruf (Remapping + Rampe + set_xy auf den simulierten RLink)
+#   3. Bauzeit eines Snapshots (= Dauer eines Live-Reloads, läuft außerhalb des Steuerpfads)
+#   4. Genauigkeit: maximale Abweichung der linearen Kennlinie von der früheren Berechnung
+#
+# Aufruf:  python benchmark_response_curves.py [--samples N] [--json ergebnis.json]
+import os
+import sys
+import json
+import math
+import random
+import timeit
+import argparse
+import tempfile
+
+# Muss vor dem Import von WheelchairControlReal gesetzt sein
+os.environ.setdefault("RLINK_BACKEND", "sim")
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+if SCRIPT_DIR not in sys.path:
+    sys.path.insert(0, SCRIPT_DIR)
+
+from drive_config import CURVES, DEFAULT_CONFIG, ResponseCurves, parse_config
+
+# --- Konfiguration ---
+DEFAULT_SAMPLES = 20000
+REPEATS = 7
+ACCURACY_STEPS = 100000  # Eingabewerte 0..1 für den Genauigkeitsvergleich
+ACCURACY_TOLERANCE = 1e-9  # Größere Abweichungen gelten als Unterschied (darunter: Rundungsrauschen)
+BENCHMARK_GEAR = 3
+
+
+def legacy_targets(gear_factors, pi_side_deadzone, min_rlink_command, gear, raw_x, raw_y):
+    """Remapping wie in WheelchairControlReal._set_direction vor drive_config.ResponseCurves (Vergleichsbasis)."""
+    gear_str = str(gear)
+    max_speed_factor = gear_factors.get(gear_str, 1.0)
+    min_output_normalized = float(min_rlink_command) / 127.0
+    effective_min_output = min_output_normalized
+    if effective_min_output >= max_speed_factor:
+        effective_min_output = max_speed_factor
+
+    target_x = 0.0
+    if abs(raw_x) >= pi_side_deadzone:
+        input_range = 1.0 - pi_side_deadzone
+        if input_range <= 1e-6: normalized_input_x = 1.0
+        else: normalized_input_x = (abs(raw_x) - pi_side_deadzone) / input_range
+        output_range = max_speed_factor - effective_min_output
+        if output_range < 0: output_range = 0
+        scaled_output_x = effective_min_output + normalized_input_x * output_range
+        target_x = math.copysign(scaled_output_x * 127.0, raw_x)
+
+    target_y = 0.0
+    if abs(raw_y) >= pi_side_deadzone:
+        input_range = 1.0 - pi_side_deadzone
+        if input_range <= 1e-6: normalized_input_y = 1.0
+        else: normalized_input_y = (abs(raw_y) - pi_side_deadzone) / input_range
+        output_range = max_speed_factor - effective_min_output
+        if output_range < 0: output_range = 0
+        scaled_output_y = effective_min_output + normalized_input_y * output_range
+        target_y = math.copysign(scaled_output_y * 127.0, raw_y)
+    return target_x, target_y
+
+
+def make_samples(count, seed=1):
+    rng = random.Random(seed)
+    return [(rng.uniform(-1.0, 1.0), rng.uniform(-1.0, 1.0)) for _ in range(count)]
+
+
+def per_sample_ns(func, samples, *leading_args):
+    """Bester Durchlauf aus REPEATS, in Nanosekunden pro Joystick-Wert: func(*leading_args, x, y)."""
+    def run():
+        for x, y in samples:
+            func(*leading_args, x, y)
+    return min(timeit.repeat(run, number=1, repeat=REPEATS)) / len(samples) * 1e9
+
+
+def bench_remapping(samples, log):
+    config = parse_config(DEFAULT_CONFIG)[0]
+    gear_factors = config["gear_factors"]
+    deadzone = config["pi_side_deadzone"]
+    min_cmd = config["min_rlink_command"]
+    gear = BENCHMARK_GEAR
+    legacy_ns = per_sample_ns(legacy_targets, samples, gear_factors, deadzone, min_cmd, gear)
+    log(f"  {'früher (Berechnung)':<24} {legacy_ns:8.0f} ns")
+    results = {"legacy_ns": legacy_ns}
+    for curve in CURVES:
+        curves = ResponseCurves(dict(config, response_curve=curve))
+        ns = per_sample_ns(curves.targets, samples, gear)
+        label = ("Formel " if curve == "linear" else "Tabelle ") + curve
+        log(f"  {label:<24} {ns:8.0f} ns  ({legacy_ns / ns:.2f}x)")
+        results[curve + "_ns"] = ns
+    return results
+
+
+def bench_set_direction(samples, log):
+    from WheelchairControlReal import WheelchairControlReal
+    results = {}
+    with tempfile.TemporaryDirectory() as tmpdir:
+        config_path = os.path.join(tmpdir, "wheelchair_config.json")
+        with open(config_path, "w") as f:
+            json.dump(DEFAULT_CONFIG, f)
+        stdout = sys.stdout
+        sys.stdout = open(os.devnull, "w")
+        try:
+            wheelchair = WheelchairControlReal(config_filepath=config_path, recorder_filepath=None, watch_config=False)
+        finally:
+            sys.stdout.close()
+            sys.stdout = stdout
+        try:
+            while wheelchair.get_actual_gear() < BENCHMARK_GEAR:
+                wheelchair.set_gear(True)
+            for curve in CURVES:
+                wheelchair._apply_config(dict(wheelchair._curves.config, response_curve=curve))
+                ns = per_sample_ns(lambda x, y: wheelchair.set_direction((x, y)), samples)
+                log(f"  {'set_direction ' + curve:<24} {ns / 1000:8.2f} µs")
+                results[curve + "_us"] = ns / 1000
+        finally:
+            sys.stdout = open(os.devnull, "w")
+            try:
+                wheelchair.shutdown()
+            finally:
+                sys.stdout.close()
+                sys.stdout = stdout
+    return results
+
+
+def bench_build(log):
+    config = parse_config(DEFAULT_CONFIG)[0]
+    results = {}
+    for curve, turn_scale in (("linear", 1.0), ("s_curve", 0.6)):
+        build_config = dict(config, response_curve=curve, turn_scale=turn_scale)
+        ms = min(timeit.repeat(lambda: ResponseCurves(build_config), number=1, repeat=REPEATS)) * 1000
+        label = f"{curve}, Drehen={turn_scale}"
+        log(f"  {label:<24} {ms:8.2f} ms")
+        results[f"{curve}_{turn_scale}_ms"] = ms
+    return results
+
+
+def check_accuracy(log):
+    config = parse_config(DEFAULT_CONFIG)[0]
+    curves = ResponseCurves(config)
+    results = {}
+    for gear in range(1, 6):
+        max_diff = 0.0
+        differing = 0
+        for i in range(ACCURACY_STEPS + 1):
+            value = i / ACCURACY_STEPS
+            legacy, _ = legacy_targets(config["gear_factors"], config["pi_side_deadzone"],
+                                       config["min_rlink_command"], gear, value, 0.0)
+            current, _ = curves.targets(gear, value, 0.0)
+            max_diff = max(max_diff, abs(legacy - current))
+            differing += abs(legacy - current) > ACCURACY_TOLERANCE
+        log(f"  Gang {gear}: max. Abweichung {max_diff:.2e}, Abweichungen > {ACCURACY_TOLERANCE:g}: {differing}")
+        results[str(gear)] = {"max_diff": max_diff, "differing": differing}
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Micro-Benchmark Kennlinien (Formel/Tabellen) gegen die frühere Berechnung")
+    parser.add_argument("--samples", type=int, default=DEFAULT_SAMPLES, help="Joystick-Werte pro Messung")
+    parser.add_argument("--json", help="Ergebnisse zusätzlich als JSON in diese Datei schreiben")
+    args = parser.parse_args()
+
+    samples = make_samples(args.samples)
+    results = {"samples": args.samples}
+    print(f"Python {sys.version.split()[0]}, {args.samples} Joystick-Werte, bester von {REPEATS} Durchläufen")
+
+    print("\n== 1. Remapping pro Joystick-Wert (X und Y) ==")
+    results["remapping"] = bench_remapping(samples, print)
+    print("\n== 2. set_direction (Remapping + Rampe + simulierter RLink) ==")
+    results["set_direction"] = bench_set_direction(samples, print)
+    print("\n== 3. Snapshot bauen (Live-Reload) ==")
+    results["build"] = bench_build(print)
+    print(f"\n== 4. Genauigkeit linear gegen früher ({ACCURACY_STEPS} Eingabewerte) ==")
+    results["accuracy"] = check_accuracy(print)
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+        print(f"\nErgebnisse gespeichert in {args.json}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
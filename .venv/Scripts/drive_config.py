@@ -0,0 +1,286 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# drive_config.py
+# Fahrkonfiguration (wheelchair_config.json) als unveränderlicher, versionierter Snapshot.
+#
+# Deadzone, min_rlink_command, Gangfaktor, Kennlinie und Achsen-Skalierung werden einmal pro
+# Konfigurationsänderung je Gang und Achse zusammengerechnet. Die lineare Kennlinie bleibt eine
+# geschlossene Formel mit vorberechnetem Offset und Steigung (schneller als ein Tabellenzugriff),
+# expo und s_curve nutzen Lookup-Tabellen mit linearer Interpolation. Eine neue Konfiguration wird komplett außerhalb
+# des Steuerpfads gebaut und danach per einfacher Zuweisung ausgetauscht (atomar unter dem GIL);
+# set_direction liest den Snapshot einmal pro Aufruf und sieht daher nie eine halb
+# aktualisierte Konfiguration.
+import os
+import sys
+import time
+import json
+import threading
+import itertools
+
+# --- Konfiguration ---
+CURVE_TABLE_RESOLUTION = 2048  # Tabellenintervalle pro Achse für die Auslenkung nach der Deadzone (0..1)
+CONFIG_WATCH_INTERVAL = 1.0    # Sekunden zwischen Prüfungen der Konfigurationsdatei
+NUM_GEARS = 5
+
+# Kennlinien (n = normierte Auslenkung nach der Deadzone, 0..1; k = curve_strength, 0..1)
+#   linear : n                              (bisheriges Verhalten)
+#   expo   : (1-k)*n + k*n^3                feinfühlig um die Mitte, volle Geschwindigkeit bleibt erreichbar
+#   s_curve: (1-k)*n + k*(3n^2 - 2n^3)      sanfter Anfang und sanftes Ende, steiler in der Mitte
+CURVES = ("linear", "expo", "s_curve")
+
+DEFAULT_CONFIG = {
+    "gear_factors": { # Faktor für Geschwindigkeit (0.0 bis 1.0)
+        "1": 0.2, # 20% der Maximalgeschwindigkeit
+        "2": 0.4,
+        "3": 0.6,
+        "4": 0.8,
+        "5": 1.0  # 100%
+    },
+    "acceleration_step": 10, # Maximale Änderung des Sendewerts (-127 bis 127) pro Aufruf
+    "pi_side_deadzone": 0.1, # Deadzone auf dem Pi
+    "min_rlink_command": 10,
+    "response_curve": "linear", # Kennlinie, siehe CURVES
+    "curve_strength": 0.5, # Anteil der Kennlinie (0.0 = linear, 1.0 = volle Kennlinie)
+    "forward_scale": 1.0, # Zusätzlicher Faktor für Vor/Zurück (Y)
+    "turn_scale": 1.0 # Zusätzlicher Faktor für Drehen (X)
+}
+
+_version_counter = itertools.count(1)
+
+
+def _clamped_float(config, key, low, high, warnings):
+    try:
+        return max(low, min(high, float(config.get(key, DEFAULT_CONFIG[key]))))
+    except (ValueError, TypeError):
+        warnings.append(f"Ungültiger Wert für {key} in Config. Verwende Default.")
+        return float(DEFAULT_CONFIG[key])
+
+
+def parse_config(raw) -> tuple[dict, list]:
+    """
+    Validiert eine geladene Konfiguration (dict aus JSON). Fehlende oder ungültige Werte
+    werden durch Defaults ersetzt bzw. begrenzt. Gibt (config, warnungen) zurück.
+    """
+    warnings = []
+    if not isinstance(raw, dict):
+        warnings.append("Konfiguration ist kein JSON-Objekt. Verwende Defaults.")
+        raw = {}
+
+    loaded_gear_factors = raw.get("gear_factors")
+    if not isinstance(loaded_gear_factors, dict):
+        loaded_gear_factors = DEFAULT_CONFIG["gear_factors"]
+    gear_factors = {}
+    for i in range(1, NUM_GEARS + 1):
+        key = str(i)
+        default = DEFAULT_CONFIG["gear_factors"].get(key, 0.2 * i)
+        try:
+            gear_factors[key] = max(0.0, min(1.0, float(loaded_gear_factors.get(key, default)))) # Clamp 0.0-1.0
+        except (ValueError, TypeError):
+            gear_factors[key] = default
+            warnings.append(f"Ungültiger Faktor für Gang {key} in Config. Verwende Default.")
+
+    config = {
+        "gear_factors": gear_factors,
+        "acceleration_step": _clamped_float(raw, "acceleration_step", 0.1, 254.0, warnings), # Muss positiv sein, min 0.1
+        "pi_side_deadzone": _clamped_float(raw, "pi_side_deadzone", 0.0, 0.9, warnings),
+        "curve_strength": _clamped_float(raw, "curve_strength", 0.0, 1.0, warnings),
+        "forward_scale": _clamped_float(raw, "forward_scale", 0.0, 1.0, warnings),
+        "turn_scale": _clamped_float(raw, "turn_scale", 0.0, 1.0, warnings),
+    }
+    try:
+        # Mindestens 1 (da 0 Stillstand ist), maximal 40
+        config["min_rlink_command"] = max(1, min(40, int(raw.get("min_rlink_command", DEFAULT_CONFIG["min_rlink_command"]))))
+    except (ValueError, TypeError):
+        config["min_rlink_command"] = int(DEFAULT_CONFIG["min_rlink_command"])
+        warnings.append("Ungültiger min_rlink_command in Config. Verwende Default.")
+    curve = raw.get("response_curve", DEFAULT_CONFIG["response_curve"])
+    if curve not in CURVES:
+        warnings.append(f"Unbekannte Kennlinie {curve!r} (erlaubt: {', '.join(CURVES)}). Verwende linear.")
+        curve = "linear"
+    config["response_curve"] = curve
+    return config, warnings
+
+
+def load_config_file(filepath) -> tuple[dict, list]:
+    """Liest und validiert die Konfigurationsdatei. Wirft OSError/ValueError bei Lese-/JSON-Fehlern."""
+    with open(filepath, 'r') as f:
+        raw = json.load(f)
+    return parse_config(raw)
+
+
+def shape_curve(curve, strength, n):
+    if curve == "expo":
+        return (1.0 - strength) * n + strength * n * n * n
+    if curve == "s_curve":
+        return (1.0 - strength) * n + strength * n * n * (3.0 - 2.0 * n)
+    return n
+
+
+def output_range(max_factor, min_command) -> tuple[float, float]:
+    """
+    (min_output, output_range) normiert auf 0..1: n wird auf [min_command/127, max_factor]
+    abgebildet, damit die Ansprechschwelle überwunden wird, ohne die Maximalgeschwindigkeit zu ändern.
+    """
+    # Sicherstellen, dass min Output nicht größer als max Output ist
+    min_output = min(float(min_command) / 127.0, max_factor)
+    return min_output, max(0.0, max_factor - min_output)
+
+
+def build_linear_axis(max_factor, min_command, deadzone) -> tuple[float, float]:
+    """(offset, steigung) für die lineare Kennlinie: RLink-Wert = offset + (|Eingabe| - Deadzone) * steigung."""
+    min_output, range_output = output_range(max_factor, min_command)
+    return min_output * 127.0, range_output * 127.0 / (1.0 - deadzone)
+
+
+def build_axis_table(max_factor, min_command, curve="linear", strength=0.0,
+                     resolution=CURVE_TABLE_RESOLUTION) -> tuple:
+    """
+    Tabelle normierte Auslenkung n (Index i = i/resolution, 0 = Rand der Deadzone) -> RLink-Wert
+    0..127 (float, Rampe arbeitet mit floats) plus Steigung je Intervall für lineare Interpolation:
+    (werte, steigungen), je resolution + 1 Einträge. Wertebereich siehe output_range().
+    """
+    min_output, range_output = output_range(max_factor, min_command)
+    values = [(min_output + shape_curve(curve, strength, i / resolution) * range_output) * 127.0
+              for i in range(resolution + 1)]
+    slopes = [values[i + 1] - values[i] for i in range(resolution)] + [0.0]
+    return tuple(values), tuple(slopes)
+
+
+class ResponseCurves:
+    """
+    Unveränderlicher Snapshot einer Fahrkonfiguration mit vorberechneten Werten je Gang.
+    Wird nach dem Bauen nicht mehr verändert; Änderungen erzeugen einen neuen Snapshot.
+    targets() ist je nach Kennlinie die geschlossene Formel (linear) oder der Tabellenzugriff.
+    """
+
+    def __init__(self, config, resolution=CURVE_TABLE_RESOLUTION):
+        self.version = next(_version_counter)
+        self.created = time.time()
+        self.config = config
+        self.resolution = resolution
+        self.acceleration_step = float(config["acceleration_step"])
+        self.deadzone = deadzone = config["pi_side_deadzone"]
+        # Eingabe -> Tabellenindex: (|Eingabe| - Deadzone) * index_scale (Deadzone ist auf 0.9 begrenzt)
+        self.index_scale = resolution / (1.0 - deadzone)
+        min_command = config["min_rlink_command"]
+        curve = config["response_curve"]
+        strength = config["curve_strength"]
+        # targets(gang, raw_x, raw_y) -> Zielwerte (-127..127) für die Rampe; raw_x/raw_y: -1.0..1.0,
+        # werden auf den Bereich begrenzt. Pro Snapshot einmal gewählt statt pro Aufruf verzweigt.
+        if curve == "linear":
+            build_axis = lambda max_factor: build_linear_axis(max_factor, min_command, deadzone)
+            self.targets = self._linear_targets
+        else:
+            build_axis = lambda max_factor: build_axis_table(max_factor, min_command, curve, strength, resolution)
+            self.targets = self._table_targets
+        # axes[gang] = (X/Drehen, Y/Vor-Zurück), je (offset, steigung) bzw. (werte, steigungen); Index 0 bleibt frei
+        axes = [None]
+        for gear in range(1, NUM_GEARS + 1):
+            gear_factor = config["gear_factors"][str(gear)]
+            axis_x = build_axis(gear_factor * config["turn_scale"])
+            if config["turn_scale"] == config["forward_scale"]:
+                axis_y = axis_x
+            else:
+                axis_y = build_axis(gear_factor * config["forward_scale"])
+            axes.append((axis_x, axis_y))
+        self.axes = tuple(axes)
+
+    def _linear_targets(self, gear, raw_x, raw_y) -> tuple[float, float]:
+        (offset_x, gain_x), (offset_y, gain_y) = self.axes[gear]
+        deadzone = self.deadzone
+        target_x = 0.0
+        abs_x = abs(raw_x)
+        if abs_x >= deadzone: # False auch für NaN -> Stillstand
+            if abs_x > 1.0: abs_x = 1.0
+            target_x = offset_x + (abs_x - deadzone) * gain_x
+            if raw_x < 0.0: target_x = -target_x
+        target_y = 0.0
+        abs_y = abs(raw_y)
+        if abs_y >= deadzone:
+            if abs_y > 1.0: abs_y = 1.0
+            target_y = offset_y + (abs_y - deadzone) * gain_y
+            if raw_y < 0.0: target_y = -target_y
+        return target_x, target_y
+
+    def _table_targets(self, gear, raw_x, raw_y) -> tuple[float, float]:
+        (values_x, slopes_x), (values_y, slopes_y) = self.axes[gear]
+        resolution = self.resolution
+        deadzone = self.deadzone
+        index_scale = self.index_scale
+        target_x = 0.0
+        abs_x = abs(raw_x)
+        if abs_x >= deadzone: # False auch für NaN -> Stillstand
+            f = (abs_x - deadzone) * index_scale
+            if f > resolution: f = resolution
+            i = int(f)
+            target_x = values_x[i] + slopes_x[i] * (f - i)
+            if raw_x < 0.0: target_x = -target_x
+        target_y = 0.0
+        abs_y = abs(raw_y)
+        if abs_y >= deadzone:
+            f = (abs_y - deadzone) * index_scale
+            if f > resolution: f = resolution
+            i = int(f)
+            target_y = values_y[i] + slopes_y[i] * (f - i)
+            if raw_y < 0.0: target_y = -target_y
+        return target_x, target_y
+
+    def describe(self) -> str:
+        config = self.config
+        return (f"v{self.version}: Gänge={config['gear_factors']}, Beschl.={config['acceleration_step']}, "
+                f"Deadzone={config['pi_side_deadzone']}, MinCmd={config['min_rlink_command']}, "
+                f"Kennlinie={config['response_curve']}({config['curve_strength']}), "
+                f"Vor/Zurück={config['forward_scale']}, Drehen={config['turn_scale']}")
+
+
+class ConfigWatcher:
+    """
+    Prüft die Konfigurationsdatei in einem Hintergrund-Thread auf Änderungen (mtime/Größe)
+    und ruft dann on_change() auf. Das Laden und Bauen der Tabellen passiert damit nie im
+    Steuerpfad. Polling statt inotify, damit es ohne Zusatzpakete auf dem Pi läuft.
+    """
+
+    def __init__(self, filepath, on_change, interval=CONFIG_WATCH_INTERVAL):
+        self.filepath = filepath
+        self.on_change = on_change
+        self.interval = interval
+        self.quit_event = threading.Event()
+        self.thread = None
+        self._last_stat = self._stat()
+
+    def _stat(self):
+        try:
+            st = os.stat(self.filepath)
+            return st.st_mtime_ns, st.st_size
+        except OSError:
+            return None
+
+    def mark_current(self):
+        """Aktuellen Dateistand als bekannt markieren (z.B. nach dem eigenen Speichern)."""
+        self._last_stat = self._stat()
+
+    def _watch_thread_func(self):
+        print(f"Config watcher started ({self.filepath}).")
+        while not self.quit_event.wait(self.interval):
+            current = self._stat()
+            if current is None or current == self._last_stat:
+                continue
+            self._last_stat = current
+            try:
+                self.on_change()
+            except Exception as e:
+                print(f"Fehler beim Neuladen der Konfiguration: {e}", file=sys.stderr)
+        print("Config watcher finished.")
+
+    def start(self):
+        if self.thread and self.thread.is_alive():
+            return False
+        self.quit_event.clear()
+        self.thread = threading.Thread(target=self._watch_thread_func, name="ConfigWatcher", daemon=True)
+        self.thread.start()
+        return True
+
+    def stop(self):
+        self.quit_event.set()
+        if self.thread and self.thread.is_alive():
+            self.thread.join(timeout=1.0)
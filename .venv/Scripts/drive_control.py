@@ -0,0 +1,298 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import time
+import threading
+import sys
+
+# --- Konfiguration ---
+DRIVE_CONTROL_RATE_HZ = 25.0  # Feste Rate, mit der set_direction + Rampe ausgeführt werden
+JOYSTICK_INPUT_TIMEOUT = 0.5  # Sekunden ohne neue Joystick-Position -> Ziel (0, 0)
+RLINK_HEARTBEAT_INTERVAL = 0.2  # Sekunden zwischen Heartbeats ZUM Rollstuhl
+
+# --- Eingabequellen (Arbitrierung) ---
+# Es fährt immer die Quelle mit der höchsten Priorität, die innerhalb ihres Timeouts etwas
+# gesendet hat. Meldet sich keine Quelle mehr, ist das Ziel (0, 0).
+SOURCE_ML2 = "ml2"
+SOURCE_GAMEPAD = "gamepad"
+PRIORITY_ML2 = 10
+PRIORITY_GAMEPAD = 20  # Gamepad (Begleitperson) übersteuert die ML2
+
+_NOT_SENT = object()
+
+
+class RLinkOutputCache:
+    """
+    Merkt sich die zuletzt an RLink gesendeten Werte (set_xy, set_light, set_axis, set_horn)
+    und überspringt Aufrufe, deren Wert sich nicht geändert hat. Nicht thread-safe, der
+    Aufrufer serialisiert (WheelchairControlReal._lock bzw. ein einzelner Steuer-Thread).
+    """
+
+    def __init__(self):
+        self._sent = {}
+        self.sent_count = {}
+        self.suppressed_count = {}
+
+    def pending(self, name, key, value) -> bool:
+        """True, wenn 'value' noch nicht gesendet wurde."""
+        return self._sent.get((name, key), _NOT_SENT) != value
+
+    def send(self, name, key, value, send_func, *args) -> bool:
+        """Ruft send_func(*args) nur auf, wenn sich 'value' geändert hat. Gibt True zurück, wenn gesendet wurde."""
+        if self._sent.get((name, key), _NOT_SENT) == value:
+            self.suppressed_count[name] = self.suppressed_count.get(name, 0) + 1
+            return False
+        send_func(*args)  # Bei RLinkError bleibt der alte Wert gespeichert -> nächster Aufruf sendet erneut
+        self._sent[(name, key)] = value
+        self.sent_count[name] = self.sent_count.get(name, 0) + 1
+        return True
+
+    def invalidate(self):
+        """Nächster Aufruf sendet wieder (z.B. nach erneutem Öffnen des RLink)."""
+        self._sent.clear()
+
+    def snapshot(self) -> dict:
+        return {"sent": dict(self.sent_count), "suppressed": dict(self.suppressed_count)}
+
+
+class InputSource:
+    """Eine Eingabequelle mit Priorität und Timeout und ihrem Latest-Wins-Slot."""
+
+    def __init__(self, name, priority, timeout):
+        self.name = name
+        self.priority = priority
+        self.timeout = timeout
+        self.direction = (0.0, 0.0)
+        self.recv_time = None  # None = bereits angewendet
+        self.last_input_time = 0.0
+
+
+class LatencyStats:
+    """
+    Einfache Latenz-Zähler (Anzahl, Mittelwert, Maximum) pro Stufe.
+    Wird vom Control-Thread geschrieben und von beliebigen Threads gelesen.
+    """
+
+    def __init__(self, stage_names):
+        self._lock = threading.Lock()
+        self._stage_names = tuple(stage_names)
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self._count = {name: 0 for name in self._stage_names}
+            self._sum = {name: 0.0 for name in self._stage_names}
+            self._max = {name: 0.0 for name in self._stage_names}
+
+    def add(self, stage, seconds):
+        with self._lock:
+            self._count[stage] += 1
+            self._sum[stage] += seconds
+            if seconds > self._max[stage]:
+                self._max[stage] = seconds
+
+    def snapshot(self) -> dict:
+        """Gibt {stage: {"count", "avg_ms", "max_ms"}} zurück."""
+        with self._lock:
+            result = {}
+            for name in self._stage_names:
+                count = self._count[name]
+                result[name] = {
+                    "count": count,
+                    "avg_ms": (self._sum[name] / count * 1000.0) if count else 0.0,
+                    "max_ms": self._max[name] * 1000.0,
+                }
+            return result
+
+
+class DriveControlThread:
+    """
+    Einziger Schreiber auf RLink: führt WheelchairControlReal.set_direction (inkl.
+    Beschleunigungsrampe) auf einem eigenen Thread mit fester Rate aus, sendet Hupe/Licht/
+    Achse, sobald sie sich geändert haben, und genau einen Heartbeat pro Intervall.
+    Lesend greift daneben nur der TelemetrySampler zu; alle RLink-Aufrufe beider Threads
+    laufen unter dem Lock des Rollstuhls und damit nie gleichzeitig.
+
+    Eingabequellen (ML2, Gamepad, ...) melden sich mit Priorität und Timeout an. Jede Quelle
+    hat einen "Latest-Wins"-Slot; ältere, noch nicht angewendete Positionen werden verworfen,
+    damit sich bei hoher Senderate kein Rückstau aufbaut. Pro Tick fährt die Quelle mit der
+    höchsten Priorität, deren letzte Eingabe jünger als ihr Timeout ist.
+
+    Latenz-Stufen:
+      receive_to_ramp  : Empfang der Nachricht -> Beginn von set_direction
+      ramp_to_set_xy   : Beginn von set_direction -> rlink.set_xy zurückgekehrt
+      receive_to_set_xy: Gesamtlatenz
+    """
+
+    STAGES = ("receive_to_ramp", "ramp_to_set_xy", "receive_to_set_xy")
+
+    def __init__(self, wheelchair_instance, rate_hz=DRIVE_CONTROL_RATE_HZ, input_timeout=JOYSTICK_INPUT_TIMEOUT,
+                 heartbeat_interval=RLINK_HEARTBEAT_INTERVAL):
+        self.wheelchair = wheelchair_instance
+        self.rate_hz = max(1.0, float(rate_hz))
+        self.heartbeat_interval = heartbeat_interval
+        self.quit_event = threading.Event()
+        self.thread = None
+        self.latency = LatencyStats(self.STAGES)
+
+        self._slot_lock = threading.Lock()
+        self._sources = {}
+        self._active_source = None       # Name der Quelle, die im letzten Tick gefahren ist
+        self._last_driving_source = None
+        self.register_source(SOURCE_ML2, PRIORITY_ML2, input_timeout)
+
+        self.received_count = 0   # Alle übergebenen Joystick-Positionen
+        self.collapsed_count = 0  # Davon verworfen, weil eine neuere vorlag
+        self.tick_count = 0
+        self.overrun_count = 0    # Ticks, die länger als eine Periode gedauert haben
+        self.source_switch_count = 0
+        self.heartbeat_count = 0
+        self.heartbeat_error_count = 0
+
+    def register_source(self, name, priority, timeout=JOYSTICK_INPUT_TIMEOUT):
+        """Meldet eine Eingabequelle an (oder ändert Priorität/Timeout einer vorhandenen)."""
+        with self._slot_lock:
+            source = self._sources.get(name)
+            if source is None:
+                self._sources[name] = InputSource(name, priority, timeout)
+            else:
+                source.priority = priority
+                source.timeout = timeout
+
+    def unregister_source(self, name):
+        with self._slot_lock:
+            self._sources.pop(name, None)
+
+    def submit(self, direction, recv_time=None, source=SOURCE_ML2):
+        """Legt die neueste Position einer Quelle ab (aus dem ZMQ-/Gamepad-Thread aufgerufen)."""
+        if recv_time is None:
+            recv_time = time.monotonic()
+        with self._slot_lock:
+            slot = self._sources.get(source)
+            if slot is None:
+                return False
+            if slot.recv_time is not None:
+                self.collapsed_count += 1
+            slot.direction = direction
+            slot.recv_time = recv_time
+            slot.last_input_time = recv_time
+            self.received_count += 1
+        return True
+
+    def stop_motion(self, source=SOURCE_ML2):
+        """Setzt das Ziel der Quelle sofort auf (0, 0), z.B. bei Verbindungsabbruch."""
+        self.submit((0.0, 0.0), source=source)
+
+    def get_active_source(self):
+        return self._active_source
+
+    def get_latency_stats(self) -> dict:
+        stats = self.latency.snapshot()
+        stats["counters"] = {
+            "received": self.received_count,
+            "collapsed": self.collapsed_count,
+            "ticks": self.tick_count,
+            "overruns": self.overrun_count,
+        }
+        return stats
+
+    def get_arbitration_stats(self) -> dict:
+        """
+        Aktive Quelle, Quellenwechsel, Heartbeats und gesendete/übersprungene RLink-Aufrufe.
+        Wird aus dem Server-Thread aufgerufen, die Quellen daher unter _slot_lock lesen.
+        """
+        with self._slot_lock:
+            sources = sorted(self._sources)
+        outputs = self.wheelchair.get_output_stats()
+        return {
+            "active_source": self._active_source,
+            "sources": sources,
+            "source_switches": self.source_switch_count,
+            "heartbeats": self.heartbeat_count,
+            "heartbeat_errors": self.heartbeat_error_count,
+            "sent": outputs["sent"],
+            "suppressed": outputs["suppressed"],
+        }
+
+    def _select_source(self, now):
+        """Wählt die Quelle für diesen Tick (unter _slot_lock aufrufen)."""
+        best = None
+        for source in self._sources.values():
+            if now - source.last_input_time > source.timeout:
+                continue
+            if best is None or source.priority > best.priority:
+                best = source
+        if best is None:
+            return None, (0.0, 0.0), None
+        recv_time = best.recv_time
+        best.recv_time = None
+        return best.name, best.direction, recv_time
+
+    def _control_loop_thread_func(self):
+        print(f"Drive control thread started ({self.rate_hz:.0f} Hz).")
+        period = 1.0 / self.rate_hz
+        next_tick = time.monotonic()
+        next_heartbeat = next_tick
+        while not self.quit_event.is_set():
+            tick_start = time.monotonic()
+            with self._slot_lock:
+                source, direction, recv_time = self._select_source(tick_start)
+            if source != self._active_source:
+                if source is not None and source != self._last_driving_source:
+                    if self._last_driving_source is not None:
+                        self.source_switch_count += 1
+                        print(f"Eingabequelle gewechselt: {self._last_driving_source} -> {source}")
+                    self._last_driving_source = source
+                self._active_source = source
+
+            try:
+                ramp_start = time.monotonic()
+                self.wheelchair.set_direction(direction)
+                sent_time = getattr(self.wheelchair, "last_set_xy_time", None)
+                if recv_time is not None:
+                    self.latency.add("receive_to_ramp", ramp_start - recv_time)
+                    if sent_time is not None and sent_time >= ramp_start:
+                        self.latency.add("ramp_to_set_xy", sent_time - ramp_start)
+                        self.latency.add("receive_to_set_xy", sent_time - recv_time)
+                self.wheelchair.apply_outputs()  # Hupe/Licht/Achse aus anderen Threads
+            except Exception as e:
+                print(f"Fehler im Drive-Control-Thread: {e}", file=sys.stderr)
+
+            if tick_start >= next_heartbeat:
+                if self.wheelchair.send_rlink_heartbeat():
+                    self.heartbeat_count += 1
+                else:
+                    self.heartbeat_error_count += 1
+                next_heartbeat += self.heartbeat_interval
+                if next_heartbeat < tick_start:
+                    next_heartbeat = tick_start + self.heartbeat_interval
+            self.tick_count += 1
+
+            next_tick += period
+            sleep_time = next_tick - time.monotonic()
+            if sleep_time > 0:
+                self.quit_event.wait(sleep_time)
+            else:
+                # Tick hat zu lange gedauert: nicht aufholen, sondern neu takten
+                self.overrun_count += 1
+                next_tick = time.monotonic()
+        print("Drive control thread finished.")
+
+    def start(self):
+        if self.thread and self.thread.is_alive():
+            print("Drive-Control-Thread läuft bereits.")
+            return False
+        self.quit_event.clear()
+        # Ab jetzt schreibt nur dieser Thread auf RLink, Schalter ändern nur noch den Soll-Zustand
+        self.wheelchair.set_command_writer(self)
+        self.thread = threading.Thread(target=self._control_loop_thread_func, name="DriveControlThread", daemon=True)
+        self.thread.start()
+        return True
+
+    def stop(self):
+        print("DriveControlThread wird gestoppt...")
+        self.quit_event.set()
+        if self.thread and self.thread.is_alive():
+            self.thread.join(timeout=1.0)
+        self.wheelchair.set_command_writer(None)
+        print("DriveControlThread gestoppt.")
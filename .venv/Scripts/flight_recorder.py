@@ -0,0 +1,155 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# flight_recorder.py
+# Ständig laufender Fahrtenschreiber: ein Datensatz fester Größe pro Rampen-Tick (auch wenn set_xy
+# wegen unveränderter Werte übersprungen wurde, damit die Wiedergabe Tick für Tick vergleichen kann),
+# geschrieben in eine memory-mapped Ringdatei. Schreiben = struct.pack_into direkt in das mmap (kein Lock, keine
+# Datei-I/O im Steuerpfad, kein neues bytes-Objekt pro Datensatz); das Betriebssystem schreibt
+# die geänderten Seiten im Hintergrund zurück.
+#
+# Dateiformat (Little-Endian):
+#   Header (HEADER_SIZE Byte): magic, version, record_size, capacity, session, record_count,
+#                              wall_minus_monotonic (time.time() - time.monotonic() beim Öffnen)
+#   danach capacity * RECORD (40 Byte), Datensatz n liegt an Position n % capacity.
+import os
+import sys
+import time
+import mmap
+import struct
+import itertools
+
+try:
+    import numpy as np  # Nur zum Lesen/Auswerten nötig
+except ImportError:
+    np = None
+
+FLIGHT_RECORDER_MAGIC = b"JCFR"
+FLIGHT_RECORDER_VERSION = 1
+DEFAULT_CAPACITY = 1 << 18  # 262144 Datensätze (~10 MB), bei 25 Hz knapp 3 Stunden
+
+HEADER = struct.Struct("<4sHHIHxxQd")
+HEADER_SIZE = 64
+RECORD_COUNT = struct.Struct("<Q")
+RECORD_COUNT_OFFSET = 16
+#   d t (time.monotonic()), I seq, H session, B gear, B flags,
+#   f raw_x, f raw_y, f target_x, f target_y, f speed, b sent_x, b sent_y, 2 Byte Reserve
+RECORD = struct.Struct("<dIHBBfffffbbxx")
+
+FLAG_TILT = 0x01
+FLAG_LIGHTS = 0x02
+FLAG_WARN = 0x04
+FLAG_HORN = 0x08
+
+if np is not None:
+    RECORD_DTYPE = np.dtype([
+        ("t", "<f8"), ("seq", "<u4"), ("session", "<u2"), ("gear", "u1"), ("flags", "u1"),
+        ("raw_x", "<f4"), ("raw_y", "<f4"), ("target_x", "<f4"), ("target_y", "<f4"), ("speed", "<f4"),
+        ("sent_x", "i1"), ("sent_y", "i1"), ("reserved", "V2"),
+    ])
+    assert RECORD_DTYPE.itemsize == RECORD.size
+else:
+    RECORD_DTYPE = None
+
+
+class FlightRecorder:
+    """
+    Schreibt Fahrdaten in eine Ringdatei. record() darf aus jedem Thread aufgerufen werden:
+    der Platz wird über einen itertools.count (atomar unter dem GIL) vergeben, danach schreibt
+    jeder Aufrufer nur in seinen eigenen Slot.
+    """
+
+    def __init__(self, filepath, capacity=DEFAULT_CAPACITY):
+        self.filepath = filepath
+        self.capacity = int(capacity)
+        self._file = None
+        self._mmap = None
+
+        file_size = HEADER_SIZE + self.capacity * RECORD.size
+        header = read_header(filepath) if os.path.exists(filepath) else None
+        if header is not None and (header["capacity"] != self.capacity or os.path.getsize(filepath) != file_size):
+            print(f"FlightRecorder: {filepath} hat ein anderes Format/Größe, wird neu angelegt.", file=sys.stderr)
+            header = None
+
+        self._file = open(filepath, "r+b" if header is not None else "w+b")
+        if header is None:
+            self._file.truncate(file_size)
+            self.session = 1
+            start_count = 0
+        else:
+            self.session = (header["session"] % 0xFFFF) + 1
+            start_count = header["record_count"]
+        self._mmap = mmap.mmap(self._file.fileno(), file_size)
+        HEADER.pack_into(self._mmap, 0, FLIGHT_RECORDER_MAGIC, FLIGHT_RECORDER_VERSION, RECORD.size,
+                         self.capacity, self.session, start_count, time.time() - time.monotonic())
+        self._counter = itertools.count(start_count)
+        print(f"FlightRecorder: Sitzung {self.session}, {filepath} ({self.capacity} Datensätze).")
+
+    def record(self, raw_x, raw_y, target_x, target_y, sent_x, sent_y, gear, flags, speed, timestamp=None):
+        buf = self._mmap
+        if buf is None:
+            return
+        if timestamp is None:
+            timestamp = time.monotonic()
+        index = next(self._counter)
+        RECORD.pack_into(buf, HEADER_SIZE + (index % self.capacity) * RECORD.size,
+                         timestamp, index & 0xFFFFFFFF, self.session, gear, flags,
+                         raw_x, raw_y, target_x, target_y, speed, sent_x, sent_y)
+        RECORD_COUNT.pack_into(buf, RECORD_COUNT_OFFSET, index + 1)
+
+    def close(self):
+        buf, self._mmap = self._mmap, None
+        if buf is not None:
+            try:
+                buf.flush()
+            finally:
+                buf.close()
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+
+# --- Lesen ---
+def read_header(filepath):
+    """Gibt den Header als dict zurück oder None, wenn die Datei kein Fahrtenschreiber-Log ist."""
+    try:
+        with open(filepath, "rb") as f:
+            data = f.read(HEADER.size)
+    except OSError:
+        return None
+    if len(data) != HEADER.size:
+        return None
+    magic, version, record_size, capacity, session, record_count, wall_offset = HEADER.unpack(data)
+    if magic != FLIGHT_RECORDER_MAGIC or version != FLIGHT_RECORDER_VERSION or record_size != RECORD.size:
+        return None
+    return {"capacity": capacity, "session": session, "record_count": record_count,
+            "wall_minus_monotonic": wall_offset}
+
+
+def load_records(filepath, session=None):
+    """
+    Liest alle Datensätze in zeitlicher Reihenfolge als NumPy-Structured-Array (RECORD_DTYPE).
+    session: None = alle, -1 = letzte Sitzung, sonst die Sitzungsnummer.
+    """
+    if np is None:
+        raise ImportError("NumPy wird zum Lesen des Fahrtenschreibers benötigt.")
+    header = read_header(filepath)
+    if header is None:
+        raise ValueError(f"{filepath} ist kein gültiges Fahrtenschreiber-Log.")
+    capacity = header["capacity"]
+    count = header["record_count"]
+    records = np.fromfile(filepath, dtype=RECORD_DTYPE, count=min(count, capacity), offset=HEADER_SIZE)
+    if count > capacity:
+        split = count % capacity
+        records = np.concatenate((records[split:], records[:split]))  # Ältester Datensatz zuerst
+    records = records[records["session"] != 0]  # Noch nie beschriebene Slots
+    if session == -1 and len(records):
+        session = int(records["session"][-1])
+    if session is not None:
+        records = records[records["session"] == session]
+    return records
+
+
+def list_sessions(records):
+    """Sitzungsnummern in der Reihenfolge ihres ersten Auftretens."""
+    sessions, first_index = np.unique(records["session"], return_index=True)
+    return [int(s) for s in sessions[np.argsort(first_index)]]
@@ -0,0 +1,90 @@
+# ipc_control.py
+# Lokaler Steuerkanal zwischen app.py (Webinterface) und Server.py (ZMQ-Server).
+# Server.py bindet einen REP-Socket auf CONTROL_ENDPOINT und pollt ihn zusammen mit dem
+# ML2-Subscriber. app.py schickt pro Befehl eine JSON-Anfrage und bekommt eine Quittung
+# mit dem tatsächlichen Ergebnis zurück.
+import json
+import zmq
+
+CONTROL_ENDPOINT = "ipc:///tmp/joystick_communicator_control.ipc"
+DEFAULT_TIMEOUT_MS = 1000
+
+# --- Befehle ---
+CMD_PING = "ping"
+CMD_TOGGLE_JOYSTICK_VISIBILITY = "toggle_joystick_visibility"
+CMD_SET_GAMEPAD_MODE = "set_gamepad_mode"      # Parameter: enabled (bool)
+CMD_GET_GAMEPAD_STATUS = "get_gamepad_status"
+CMD_SEND_ML2_CONFIG = "send_ml2_config"        # Parameter: config (dict)
+CMD_RELOAD_CONFIG = "reload_config"            # wheelchair_config.json neu laden (Kennlinien live übernehmen)
+COMMANDS = (CMD_PING, CMD_TOGGLE_JOYSTICK_VISIBILITY, CMD_SET_GAMEPAD_MODE,
+            CMD_GET_GAMEPAD_STATUS, CMD_SEND_ML2_CONFIG, CMD_RELOAD_CONFIG)
+
+
+class ControlChannelError(Exception):
+    """Server nicht erreichbar oder ungültige Antwort."""
+    pass
+
+
+class ControlChannelTimeout(ControlChannelError):
+    """Anfrage wurde gesendet, aber nicht rechtzeitig beantwortet - der Befehl kann ausgeführt worden sein."""
+    pass
+
+
+def encode_request(cmd: str, **params) -> bytes:
+    if cmd not in COMMANDS:
+        raise ValueError(f"Unbekannter Befehl: {cmd}")
+    return json.dumps({"cmd": cmd, "params": params}).encode('utf-8')
+
+
+def decode_request(data: bytes) -> tuple[str, dict]:
+    request = json.loads(data.decode('utf-8'))
+    cmd = request.get("cmd")
+    if cmd not in COMMANDS:
+        raise ValueError(f"Unbekannter Befehl: {cmd}")
+    params = request.get("params") or {}
+    if not isinstance(params, dict):
+        raise ValueError("params muss ein Objekt sein")
+    return cmd, params
+
+
+def make_reply(ok: bool, error: str | None = None, **result) -> bytes:
+    reply = {"ok": ok, "result": result}
+    if error:
+        reply["error"] = error
+    return json.dumps(reply).encode('utf-8')
+
+
+def send_command(cmd: str, timeout_ms: int = DEFAULT_TIMEOUT_MS, context: zmq.Context | None = None, **params) -> dict:
+    """
+    Schickt einen Befehl an Server.py und wartet auf die Quittung.
+    Gibt {"ok": bool, "result": {...}, "error": str} zurück oder wirft ControlChannelError
+    (ControlChannelTimeout, wenn die Anfrage gesendet, aber nicht beantwortet wurde).
+    Pro Aufruf wird ein eigener REQ-Socket benutzt, damit ein Timeout den Socket nicht blockiert.
+    """
+    ctx = context or zmq.Context.instance()
+    socket = ctx.socket(zmq.REQ)
+    socket.setsockopt(zmq.LINGER, 0)
+    socket.setsockopt(zmq.IMMEDIATE, 1)  # Nur an verbundene Server senden, sonst läuft send() in den Timeout
+    socket.setsockopt(zmq.SNDTIMEO, timeout_ms)
+    socket.setsockopt(zmq.RCVTIMEO, timeout_ms)
+    try:
+        socket.connect(CONTROL_ENDPOINT)
+        try:
+            socket.send(encode_request(cmd, **params))
+        except zmq.error.Again:
+            # REQ sendet erst, wenn ein Server verbunden ist -> Server läuft nicht
+            raise ControlChannelError(f"ZMQ-Server nicht erreichbar ({CONTROL_ENDPOINT}).")
+        try:
+            data = socket.recv()
+        except zmq.error.Again:
+            raise ControlChannelTimeout(f"Keine Antwort vom ZMQ-Server innerhalb von {timeout_ms} ms.")
+        reply = json.loads(data.decode('utf-8'))
+        if not isinstance(reply, dict) or "ok" not in reply:
+            raise ControlChannelError(f"Ungültige Antwort vom Server: {reply}")
+        return reply
+    except zmq.ZMQError as e:
+        raise ControlChannelError(f"ZMQ-Fehler auf dem Steuerkanal: {e}")
+    except (ValueError, UnicodeDecodeError) as e:
+        raise ControlChannelError(f"Antwort nicht lesbar: {e}")
+    finally:
+        socket.close()
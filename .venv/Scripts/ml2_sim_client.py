@@ -0,0 +1,219 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# ml2_sim_client.py
+# Lokaler Ersatz für die Magic-Leap-2-App. Spricht dasselbe ZMQ-Protokoll wie die ML2:
+#   - liest "ip:port" aus pc_ip.txt (von Server.py geschrieben, sonst per adb push auf die ML2)
+#   - bindet den eigenen PUB-Socket auf port + 1 und verbindet den SUB-Socket mit dem Server
+#   - sendet READY, bis der Server antwortet, danach heartbeat + joystickPos (bzw. input-Frames)
+#
+# Lokal starten (ohne ADB und ohne RLink):
+#   RLINK_BACKEND=sim ML2_IP=127.0.0.1 PC_BIND_IP=127.0.0.1 python Server.py
+#   python ml2_sim_client.py
+import os
+import sys
+import time
+import struct
+import threading
+import math
+import argparse
+from collections import Counter
+
+import zmq
+
+import protocol
+
+PC_IP_FILE = "pc_ip.txt"
+CLIENT_HEARTBEAT_INTERVAL = 1.0  # Sekunden, muss unter Server.RECONNECT_INTERVAL liegen
+READY_RETRY_INTERVAL = 0.1       # Sekunden zwischen READY-Versuchen (Slow-Joiner von PUB/SUB)
+
+JOYSTICK_STRUCT = struct.Struct(">ff")
+BOOL_STRUCT = struct.Struct("?")
+
+
+class SimulatedML2Client:
+    """
+    Stand-in für die ML2-App. Der PUB-Socket darf nur vom Thread benutzt werden, der
+    send_* aufruft; empfangene Nachrichten werden von einem eigenen Thread gezählt.
+    """
+
+    def __init__(self, pc_ip_file=PC_IP_FILE, use_input_frames=False, context=None):
+        self.pc_ip_file = pc_ip_file
+        self.use_input_frames = use_input_frames
+        self.context = context or zmq.Context.instance()
+        self.publisher = None
+        self.subscriber = None
+        self.server_endpoint = None
+        self.quit_event = threading.Event()
+        self.thread = None
+
+        self._input_seq = 0
+        self._last_heartbeat_send = 0.0
+        self._connected = threading.Event()
+
+        self.received = Counter()          # Topic -> Anzahl
+        self.last_received = {}            # Topic -> (recv_time, payload)
+        self.camera_frame_times = []       # time.monotonic() jedes empfangenen Rückkamerabildes
+
+    # --- Verbindungsaufbau ---
+    def read_server_address(self, timeout=30.0, not_before=None):
+        """Wartet auf pc_ip.txt (optional jünger als not_before, time.time()) und gibt (ip, port) zurück."""
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            try:
+                if not_before is None or os.path.getmtime(self.pc_ip_file) >= not_before:
+                    with open(self.pc_ip_file, "r") as f:
+                        content = f.read().strip()
+                    if content:
+                        ip, port = content.rsplit(":", 1)
+                        return ip, int(port)
+            except (OSError, ValueError):
+                pass
+            time.sleep(0.05)
+        raise TimeoutError(f"{self.pc_ip_file} wurde nicht innerhalb von {timeout:.0f} s geschrieben.")
+
+    def connect(self, timeout=30.0, not_before=None) -> float:
+        """
+        Baut die Verbindung wie die ML2 auf und wartet, bis der Server READY beantwortet hat
+        (erste gear-Nachricht). Gibt die Dauer bis dahin in Sekunden zurück.
+        """
+        start = time.monotonic()
+        ip, port = self.read_server_address(timeout, not_before)
+        self.server_endpoint = f"tcp://{ip}:{port}"
+
+        self.publisher = self.context.socket(zmq.PUB)
+        self.publisher.setsockopt(zmq.LINGER, 0)
+        self.publisher.bind(f"tcp://{ip}:{port + 1}")
+        self.subscriber = self.context.socket(zmq.SUB)
+        self.subscriber.setsockopt(zmq.LINGER, 0)
+        self.subscriber.setsockopt(zmq.SUBSCRIBE, b"")
+        self.subscriber.connect(self.server_endpoint)
+
+        self.quit_event.clear()
+        self._connected.clear()
+        self.thread = threading.Thread(target=self._receive_thread_func, name="ML2SimReceiver", daemon=True)
+        self.thread.start()
+
+        deadline = start + timeout
+        while not self._connected.is_set():
+            if time.monotonic() > deadline:
+                raise TimeoutError("Server hat READY nicht beantwortet.")
+            self.publisher.send_multipart([b"READY", b""])
+            self._connected.wait(READY_RETRY_INTERVAL)
+        self._last_heartbeat_send = time.monotonic()
+        self.send_heartbeat()
+        return time.monotonic() - start
+
+    def _receive_thread_func(self):
+        poller = zmq.Poller()
+        poller.register(self.subscriber, zmq.POLLIN)
+        while not self.quit_event.is_set():
+            if not poller.poll(50):
+                continue
+            while True:
+                try:
+                    frames = self.subscriber.recv_multipart(zmq.NOBLOCK)
+                except zmq.error.Again:
+                    break
+                except zmq.ZMQError:
+                    return
+                now = time.monotonic()
+                topic = frames[0]
+                payload = frames[1] if len(frames) > 1 else b""
+                self.received[topic] += 1
+                self.last_received[topic] = (now, payload)
+                if topic == b"gear":
+                    self._connected.set()
+                elif topic == b"rear_video_stream":
+                    self.camera_frame_times.append(now)
+
+    # --- Senden (ML2 -> Server) ---
+    def send_heartbeat(self):
+        self.publisher.send_multipart([b"heartbeat", b""])
+        self._last_heartbeat_send = time.monotonic()
+
+    def keep_alive(self):
+        """Heartbeat senden, wenn fällig (in der Sendeschleife aufrufen)."""
+        if time.monotonic() - self._last_heartbeat_send >= CLIENT_HEARTBEAT_INTERVAL:
+            self.send_heartbeat()
+
+    def send_joystick(self, x, y) -> float:
+        """Sendet eine Joystick-Position und gibt den Sendezeitpunkt (time.monotonic()) zurück."""
+        if self.use_input_frames:
+            frame = protocol.encode_input_frame(self._input_seq, x, y)
+            self._input_seq = (self._input_seq + 1) % protocol.SEQUENCE_MODULO
+            sent = time.monotonic()
+            self.publisher.send_multipart([protocol.TOPIC_INPUT, frame])
+        else:
+            payload = JOYSTICK_STRUCT.pack(x, y)
+            sent = time.monotonic()
+            self.publisher.send_multipart([b"joystickPos", payload])
+        return sent
+
+    def send_flag(self, topic, value: bool):
+        """gear (True = hoch), lights, warn, horn, kantelung."""
+        self.publisher.send_multipart([topic, BOOL_STRUCT.pack(value)])
+
+    # --- Auswertung ---
+    def get_state(self):
+        """Letzter dekodierter State-Frame oder None."""
+        entry = self.last_received.get(protocol.TOPIC_STATE)
+        if entry is None:
+            return None
+        try:
+            return protocol.decode_state_frame(entry[1])
+        except protocol.ProtocolError:
+            return None
+
+    def close(self):
+        self.quit_event.set()
+        if self.thread and self.thread.is_alive():
+            self.thread.join(timeout=1.0)
+        for sock in (self.subscriber, self.publisher):
+            if sock is not None and not sock.closed:
+                sock.close(linger=0)
+        self.subscriber = None
+        self.publisher = None
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Lokaler ML2-Ersatz für Server.py")
+    parser.add_argument("--rate", type=float, default=50.0, help="Joystick-Senderate in Hz")
+    parser.add_argument("--duration", type=float, default=0.0, help="Laufzeit in Sekunden (0 = bis Strg+C)")
+    parser.add_argument("--input-frames", action="store_true", help="Binäre Input-Frames statt joystickPos senden")
+    parser.add_argument("--pc-ip-file", default=PC_IP_FILE)
+    args = parser.parse_args()
+
+    client = SimulatedML2Client(args.pc_ip_file, use_input_frames=args.input_frames)
+    try:
+        print(f"Warte auf {args.pc_ip_file} und verbinde...")
+        print(f"Mit {client.connect() * 1000:.0f} ms verbunden ({client.server_endpoint}).")
+        period = 1.0 / max(1.0, args.rate)
+        start = time.monotonic()
+        next_send = start
+        last_report = start
+        while not args.duration or time.monotonic() - start < args.duration:
+            t = time.monotonic() - start
+            # Langsamer Kreis: vorwärts/links/rückwärts/rechts, damit auch die Rückkamera anspringt
+            client.send_joystick(0.8 * math.sin(t * 0.5), 0.8 * math.cos(t * 0.5))
+            client.keep_alive()
+            if time.monotonic() - last_report >= 2.0:
+                last_report = time.monotonic()
+                topics = ", ".join(f"{topic.decode(errors='replace')}={count}"
+                                   for topic, count in sorted(client.received.items()))
+                print(f"[ML2-Sim] empfangen: {topics}")
+            next_send += period
+            delay = next_send - time.monotonic()
+            if delay > 0:
+                time.sleep(delay)
+            else:
+                next_send = time.monotonic()
+    except KeyboardInterrupt:
+        print("\nBeende ML2-Simulation...")
+    except TimeoutError as e:
+        print(f"Fehler: {e}", file=sys.stderr)
+    finally:
+        client.close()
+
+
+if __name__ == "__main__":
+    main()
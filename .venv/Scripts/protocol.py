@@ -0,0 +1,175 @@
+# protocol.py
+# Kompaktes, versioniertes Binärprotokoll zwischen Server.py und der ML2.
+#
+#   Server -> ML2, Topic b"state", ein Frame pro Tick (STATE_FRAME, 22 Byte, Big-Endian):
+#     B  version
+#     I  sequence           (läuft bei 2^32 über)
+#     Q  timestamp_us       (time.monotonic() des Senders in Mikrosekunden)
+#     B  gear               (1-5)
+#     B  flags              (STATE_FLAG_*)
+#     f  speed              (true_speed aus RLink)
+#     b  sent_x, b sent_y   (tatsächlich an RLink gesendete Werte nach Rampe, -127..127)
+#     B  battery_gauge      (0-100, 255 = unbekannt)
+#
+#   ML2 -> Server, Topic b"input", ein Frame pro Eingabe-Tick (INPUT_FRAME, 24 Byte, Big-Endian):
+#     B  version
+#     I  sequence
+#     Q  timestamp_us       (Uhr der ML2)
+#     f  x, f y             (Joystick, -1.0..1.0)
+#     B  levels             (INPUT_LEVEL_*, Zustände wie Hupe/Kantelung)
+#     B  event              (EVENT_*, einmalige Aktionen)
+#     B  event_id           (wird pro neuem Event erhöht; der Event wird bis zum nächsten wiederholt,
+#                            damit ein verlorenes Paket keinen Tastendruck verschluckt)
+import struct
+import time
+
+PROTOCOL_VERSION = 1
+
+TOPIC_STATE = b"state"
+TOPIC_INPUT = b"input"
+
+STATE_FRAME = struct.Struct(">BIQBBfbbB")
+INPUT_FRAME = struct.Struct(">BIQffBBB")
+
+STATE_FLAG_LIGHTS = 0x01
+STATE_FLAG_WARN = 0x02
+STATE_FLAG_KANTELUNG = 0x04
+STATE_FLAG_GAMEPAD = 0x08
+STATE_FLAG_REAR_CAMERA = 0x10
+
+INPUT_LEVEL_HORN = 0x01
+INPUT_LEVEL_KANTELUNG = 0x02
+
+EVENT_NONE = 0
+EVENT_GEAR_UP = 1
+EVENT_GEAR_DOWN = 2
+EVENT_TOGGLE_LIGHTS = 3
+EVENT_TOGGLE_WARN = 4
+
+BATTERY_UNKNOWN = 255
+SEQUENCE_MODULO = 1 << 32
+REORDER_WINDOW = 64  # Weiter zurückliegende Sequenznummern gelten als Neustart des Senders
+
+
+class ProtocolError(Exception):
+    """Frame hat falsche Länge oder eine nicht unterstützte Version."""
+    pass
+
+
+def monotonic_us() -> int:
+    return int(time.monotonic() * 1_000_000)
+
+
+def encode_state_frame(seq, gear, flags, speed, sent_x, sent_y, battery_gauge=BATTERY_UNKNOWN, timestamp_us=None) -> bytes:
+    if timestamp_us is None:
+        timestamp_us = monotonic_us()
+    return STATE_FRAME.pack(PROTOCOL_VERSION, seq % SEQUENCE_MODULO, timestamp_us, gear, flags, speed,
+                            max(-127, min(127, sent_x)), max(-127, min(127, sent_y)), battery_gauge)
+
+
+def decode_state_frame(data) -> tuple:
+    """Gibt (seq, timestamp_us, gear, flags, speed, sent_x, sent_y, battery_gauge) zurück."""
+    if len(data) != STATE_FRAME.size:
+        raise ProtocolError(f"State-Frame hat {len(data)} statt {STATE_FRAME.size} Byte")
+    version, *fields = STATE_FRAME.unpack(data)
+    if version != PROTOCOL_VERSION:
+        raise ProtocolError(f"Nicht unterstützte Protokollversion {version}")
+    return tuple(fields)
+
+
+def encode_input_frame(seq, x, y, levels=0, event=EVENT_NONE, event_id=0, timestamp_us=None) -> bytes:
+    if timestamp_us is None:
+        timestamp_us = monotonic_us()
+    return INPUT_FRAME.pack(PROTOCOL_VERSION, seq % SEQUENCE_MODULO, timestamp_us, x, y, levels, event, event_id)
+
+
+def decode_input_frame(data) -> tuple:
+    """Gibt (seq, timestamp_us, x, y, levels, event, event_id) zurück."""
+    if len(data) != INPUT_FRAME.size:
+        raise ProtocolError(f"Input-Frame hat {len(data)} statt {INPUT_FRAME.size} Byte")
+    version, *fields = INPUT_FRAME.unpack(data)
+    if version != PROTOCOL_VERSION:
+        raise ProtocolError(f"Nicht unterstützte Protokollversion {version}")
+    return tuple(fields)
+
+
+class LinkStats:
+    """
+    Verfolgt Paketverlust, Umordnung und Einweg-Latenz eines Frame-Stroms.
+
+    Die Uhren von ML2 und Pi sind nicht synchronisiert. Als Einweg-Latenz wird daher
+    (Empfangszeit - Sendezeit) relativ zum kleinsten bisher gesehenen Wert gemeldet,
+    d.h. die Verzögerung über dem schnellsten beobachteten Paket (Jitter + Queueing).
+    """
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        self.expected_seq = None
+        self.received = 0
+        self.lost = 0
+        self.reordered = 0
+        self.duplicates = 0
+        self.restarts = 0
+        self._min_offset_us = None
+        self._latency_sum_us = 0
+        self._latency_count = 0
+        self.latency_max_us = 0
+
+    def update(self, seq, sender_timestamp_us, recv_timestamp_us=None) -> bool:
+        """
+        Verbucht ein Paket. Gibt False zurück, wenn das Paket älter als ein bereits
+        empfangenes ist (umgeordnet/doppelt) und nicht mehr angewendet werden soll.
+        Ein Sprung um mehr als REORDER_WINDOW zurück (z.B. App-Neustart ohne READY) beginnt
+        die Zählung neu, das Paket wird angewendet.
+        """
+        if recv_timestamp_us is None:
+            recv_timestamp_us = monotonic_us()
+        self.received += 1
+
+        offset = recv_timestamp_us - sender_timestamp_us
+        if self._min_offset_us is None or offset < self._min_offset_us:
+            self._min_offset_us = offset
+        latency = offset - self._min_offset_us
+        self._latency_sum_us += latency
+        self._latency_count += 1
+        if latency > self.latency_max_us:
+            self.latency_max_us = latency
+
+        if self.expected_seq is None:
+            self.expected_seq = (seq + 1) % SEQUENCE_MODULO
+            return True
+        # Vorzeichenbehaftete Differenz modulo 2^32
+        delta = (seq - self.expected_seq) % SEQUENCE_MODULO
+        if delta >= SEQUENCE_MODULO // 2:
+            delta -= SEQUENCE_MODULO
+        if delta == 0:
+            self.expected_seq = (seq + 1) % SEQUENCE_MODULO
+            return True
+        if delta > 0:
+            self.lost += delta
+            self.expected_seq = (seq + 1) % SEQUENCE_MODULO
+            return True
+        if delta < -REORDER_WINDOW:
+            self.restarts += 1
+            self.expected_seq = (seq + 1) % SEQUENCE_MODULO
+            return True
+        if delta == -1:
+            self.duplicates += 1
+        else:
+            # Verspätetes Paket, das vorher als verloren gezählt wurde
+            self.reordered += 1
+            self.lost = max(0, self.lost - 1)
+        return False
+
+    def snapshot(self) -> dict:
+        return {
+            "received": self.received,
+            "lost": self.lost,
+            "reordered": self.reordered,
+            "duplicates": self.duplicates,
+            "restarts": self.restarts,
+            "latency_avg_ms": (self._latency_sum_us / self._latency_count / 1000.0) if self._latency_count else 0.0,
+            "latency_max_ms": self.latency_max_us / 1000.0,
+        }
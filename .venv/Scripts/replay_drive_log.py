@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# replay_drive_log.py
+# Spielt eine aufgezeichnete Fahrt aus dem Fahrtenschreiber erneut durch WheelchairControlReal.set_direction.
+# Standard ist der simulierte RLink (RLINK_BACKEND=sim), z.B. um eine geänderte Konfiguration
+# (Gänge, Rampe, Deadzone) mit einer echten Fahrt zu vergleichen. Mit --hardware wird der echte
+# Rollstuhl angesteuert - nur aufgebockt verwenden!
+#
+# Wiedergegeben werden Joystick-Eingabe, Gang und Kantelungsmodus. Licht, Warnblinker und Hupe nicht.
+#
+# Aufruf:  python replay_drive_log.py [--session N] [--fast] [--config wheelchair_config.json]
+import os
+import sys
+import time
+import argparse
+
+import numpy as np
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Fahrtenschreiber-Sitzung erneut abspielen")
+    parser.add_argument("logfile", nargs="?", default="drive_flight_recorder.bin")
+    parser.add_argument("--session", type=int, default=-1, help="Sitzungsnummer (Standard: letzte)")
+    parser.add_argument("--config", default="wheelchair_config.json", help="Konfiguration für die Wiedergabe")
+    parser.add_argument("--speed", type=float, default=1.0, help="Wiedergabegeschwindigkeit (1.0 = Echtzeit)")
+    parser.add_argument("--fast", action="store_true", help="Ohne Pausen abspielen (Rampe ist pro Aufruf, Ergebnis identisch)")
+    parser.add_argument("--hardware", action="store_true", help="Echten RLink benutzen statt Simulation")
+    parser.add_argument("--record", help="Wiedergabe selbst in diese Fahrtenschreiber-Datei aufzeichnen")
+    args = parser.parse_args()
+
+    if not args.hardware:
+        os.environ["RLINK_BACKEND"] = "sim"
+    else:
+        print("WARNUNG: Wiedergabe steuert den echten Rollstuhl! Start in 5 Sekunden (Strg+C zum Abbrechen)...")
+        time.sleep(5)
+
+    # Erst nach dem Setzen von RLINK_BACKEND importieren
+    from flight_recorder import load_records, FLAG_TILT
+    from WheelchairControlReal import WheelchairControlReal
+
+    try:
+        records = load_records(args.logfile, session=args.session)
+    except (OSError, ValueError) as e:
+        print(f"Fehler: {e}", file=sys.stderr)
+        return 1
+    if len(records) == 0:
+        print("Keine Datensätze für diese Sitzung gefunden.", file=sys.stderr)
+        return 1
+    session = int(records["session"][0])
+    duration = float(records["t"][-1] - records["t"][0])
+    print(f"Sitzung {session}: {len(records)} Datensätze, {duration:.1f} s")
+
+    wheelchair = WheelchairControlReal(config_filepath=args.config, recorder_filepath=args.record, watch_config=False)
+    replay_x = np.zeros(len(records), dtype=np.int16)
+    replay_y = np.zeros(len(records), dtype=np.int16)
+    i = 0
+    try:
+        start_wall = time.monotonic()
+        start_log = float(records["t"][0])
+        for i, rec in enumerate(records):
+            if not args.fast:
+                delay = (float(rec["t"]) - start_log) / args.speed - (time.monotonic() - start_wall)
+                if delay > 0:
+                    time.sleep(delay)
+            gear = int(rec["gear"])
+            current_gear = wheelchair.get_actual_gear()
+            while current_gear != gear:
+                new_gear = wheelchair.set_gear(gear > current_gear)
+                if new_gear == current_gear:
+                    break  # Gang außerhalb 1-5
+                current_gear = new_gear
+            tilt = bool(rec["flags"] & FLAG_TILT)
+            if tilt != wheelchair.get_kantelung():
+                wheelchair.on_kantelung(tilt)
+            wheelchair.set_direction((float(rec["raw_x"]), float(rec["raw_y"])))
+            replay_x[i] = int(round(wheelchair.get_current_sent_x()))
+            replay_y[i] = int(round(wheelchair.get_current_sent_y()))
+    except KeyboardInterrupt:
+        print("\nWiedergabe abgebrochen.")
+        replay_x, replay_y, records = replay_x[:i], replay_y[:i], records[:i]
+    finally:
+        wheelchair.shutdown()
+
+    # Vergleich Aufzeichnung <-> Wiedergabe
+    diff = np.maximum(np.abs(replay_x - records["sent_x"]), np.abs(replay_y - records["sent_y"]))
+    differing = int(np.count_nonzero(diff))
+    print(f"\nWiedergabe beendet: {len(records)} Datensätze, abweichend={differing} "
+          f"({differing / max(1, len(records)) * 100:.1f}%), max. Abweichung={int(diff.max()) if len(diff) else 0}")
+    if differing:
+        first = int(np.flatnonzero(diff)[0])
+        print(f"Erste Abweichung bei t={records['t'][first] - records['t'][0]:.3f}s: "
+              f"aufgezeichnet=({records['sent_x'][first]},{records['sent_y'][first]}) "
+              f"wiedergegeben=({replay_x[first]},{replay_y[first]})")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,230 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# rlink_sim.py
+# Simulierter RLink für Benchmarks und Tests ohne Hardware.
+# Aktivierung: RLINK_BACKEND=sim (siehe full_rlink_wrapper.py / WheelchairControlReal.py).
+#
+# SimulatedRLink hat dieselbe Methoden-Schnittstelle wie full_rlink_wrapper.RLink, zeichnet aber
+# jeden schreibenden Aufruf (set_xy, set_axis, set_light, heartbeat, ...) mit Zeitstempel
+# (time.monotonic()) auf. get_speed()/get_velocity() liefern Werte, die aus den zuletzt
+# gesendeten set_xy-Werten über ein einfaches Trägheitsmodell (PT1-Glied) berechnet werden.
+import time
+import threading
+import math
+from collections import deque
+
+from full_rlink_wrapper import RLinkError, RLinkDevStatus, RLinkLight
+
+# --- Konfiguration ---
+SIM_MAX_SPEED_KMH = 6.0       # true_speed bei set_xy(_, 127)
+SIM_SPEED_TIME_CONSTANT = 0.5  # Sekunden, Trägheit des simulierten Rollstuhls
+SIM_CALL_LOG_SIZE = 200000     # Anzahl aufgezeichneter Aufrufe (Ringpuffer)
+SIM_BATTERY_GAUGE = 80
+
+
+class RLinkCall:
+    """Ein aufgezeichneter Aufruf."""
+    __slots__ = ("timestamp", "name", "args")
+
+    def __init__(self, timestamp, name, args):
+        self.timestamp = timestamp
+        self.name = name
+        self.args = args
+
+    def __repr__(self):
+        return f"RLinkCall({self.timestamp:.6f}, {self.name}, {self.args})"
+
+
+class SimulatedRLink:
+    """
+    Ersatz für full_rlink_wrapper.RLink ohne libMspRlink.so und ohne Gerät.
+
+    Aufrufe werden in einem Ringpuffer (deque, append ist unter dem GIL atomar) abgelegt,
+    sodass Server-, Drive- und Telemetrie-Thread gleichzeitig aufrufen dürfen.
+    Optional kann ein call_listener(call) registriert werden, der synchron im
+    aufrufenden Thread ausgeführt wird (z.B. für Latenzmessungen).
+    """
+
+    def __init__(self, device_index=0, call_log_size=SIM_CALL_LOG_SIZE,
+                 max_speed_kmh=SIM_MAX_SPEED_KMH, time_constant=SIM_SPEED_TIME_CONSTANT):
+        self.device_index = device_index
+        self.handle = f"sim-rlink-{device_index}"
+        self._opened = False
+        self.max_speed_kmh = max_speed_kmh
+        self.time_constant = max(1e-3, time_constant)
+        self.calls = deque(maxlen=call_log_size)
+        self.call_listener = None
+
+        # Zustand, wie ihn das Gerät zuletzt bekommen hat
+        self._x = 0
+        self._y = 0
+        self._horn = False
+        self._lights = {light: False for light in RLinkLight}
+        self._axes = {}
+        self._error_code = 0
+
+        # Trägheitsmodell (nur unter Lock verändert, Getter und set_xy laufen in verschiedenen Threads)
+        self._model_lock = threading.Lock()
+        self._speed_left = 0.0
+        self._speed_right = 0.0
+        self._model_time = time.monotonic()
+        print(f"SimulatedRLink: Simuliertes Gerät {device_index} erzeugt (keine Hardware).")
+
+    # --- Aufzeichnung ---
+    def _record(self, name, *args):
+        call = RLinkCall(time.monotonic(), name, args)
+        self.calls.append(call)
+        listener = self.call_listener
+        if listener is not None:
+            listener(call)
+        return call
+
+    def get_calls(self, name=None, since=None) -> list:
+        """Kopie der aufgezeichneten Aufrufe, optional gefiltert nach Name und Zeitpunkt."""
+        calls = list(self.calls)
+        if name is not None:
+            calls = [c for c in calls if c.name == name]
+        if since is not None:
+            calls = [c for c in calls if c.timestamp >= since]
+        return calls
+
+    def clear_calls(self):
+        self.calls.clear()
+
+    # --- Trägheitsmodell ---
+    def _update_model(self, now=None):
+        """Lässt die Radgeschwindigkeiten (PT1) bis 'now' den aktuellen set_xy-Werten folgen."""
+        if now is None:
+            now = time.monotonic()
+        dt = now - self._model_time
+        self._model_time = now
+        if dt <= 0:
+            return
+        alpha = 1.0 - math.exp(-dt / self.time_constant)
+        # Differentialantrieb: y = vorwärts, x = Drehung
+        target_left = max(-1.0, min(1.0, (self._y + self._x) / 127.0))
+        target_right = max(-1.0, min(1.0, (self._y - self._x) / 127.0))
+        self._speed_left += alpha * (target_left - self._speed_left)
+        self._speed_right += alpha * (target_right - self._speed_right)
+
+    def _check_open(self):
+        if not self._opened:
+            raise RLinkError("RLink not open")
+
+    # --- open / close / destroy ---
+    def open(self):
+        if self._opened: print("Connection already open."); return
+        self._opened = True
+        self._model_time = time.monotonic()
+        self._record("open")
+        print("SimulatedRLink: Verbindung geöffnet.")
+
+    def close(self):
+        if self._opened:
+            self._opened = False
+            self._record("close")
+            print("SimulatedRLink: Verbindung geschlossen.")
+
+    def destruct(self):
+        self.close()
+        self.handle = None
+
+    def __enter__(self):
+        self.open()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.destruct()
+
+    @staticmethod
+    def enumerate_device_info() -> list[dict]:
+        return [{"index": 0, "serial": "SIM-0000", "description": "Simulated RLink"}]
+
+    # --- Schreibende Methoden ---
+    def heartbeat(self):
+        if not self._opened: return
+        self._record("heartbeat")
+
+    def set_xy(self, x: int, y: int):
+        if not self._opened: return
+        x = max(-127, min(127, int(x)))
+        y = max(-127, min(127, int(y)))
+        with self._model_lock:
+            self._update_model()
+            self._x = x
+            self._y = y
+        self._record("set_xy", x, y)
+
+    def set_axis(self, axis_id, direction):
+        if not self._opened: return
+        self._axes[int(axis_id)] = int(direction)
+        self._record("set_axis", int(axis_id), int(direction))
+
+    def set_button(self, btn, pressed: bool):
+        if not self._opened: return
+        self._record("set_button", int(btn), bool(pressed))
+
+    def set_horn(self, enable: bool):
+        if not self._opened: return
+        self._horn = bool(enable)
+        self._record("set_horn", self._horn)
+
+    def set_light(self, light, enable: bool):
+        if not self._opened: return
+        self._lights[RLinkLight(int(light))] = bool(enable)
+        self._record("set_light", int(light), bool(enable))
+
+    def set_error(self, error_code: int):
+        if not self._opened: return
+        self._error_code = int(error_code)
+        self._record("set_error", self._error_code)
+
+    # --- Getter ---
+    def get_horn(self) -> bool:
+        self._check_open()
+        return self._horn
+
+    def get_light(self, light) -> tuple[bool, bool]:
+        self._check_open()
+        enabled = self._lights.get(RLinkLight(int(light)), False)
+        return enabled, enabled
+
+    def get_velocity(self) -> tuple[float, float, float]:
+        self._check_open()
+        with self._model_lock:
+            self._update_model()
+            left, right = self._speed_left, self._speed_right
+        turn = (left - right) / 2.0
+        return left * self.max_speed_kmh, right * self.max_speed_kmh, turn
+
+    def get_speed(self) -> tuple[int, float, int]:
+        """(speed_val 0-100 %, true_speed km/h, limit %) aus dem Trägheitsmodell."""
+        self._check_open()
+        with self._model_lock:
+            self._update_model()
+            forward = (self._speed_left + self._speed_right) / 2.0
+        true_speed = forward * self.max_speed_kmh
+        return int(round(min(1.0, abs(forward)) * 100)), true_speed, 100
+
+    def get_battery_info(self) -> tuple[bool, int, float]:
+        self._check_open()
+        with self._model_lock:
+            load = (abs(self._speed_left) + abs(self._speed_right)) / 2.0
+        return False, SIM_BATTERY_GAUGE, 2.0 + 30.0 * load
+
+    def get_error_codes(self) -> tuple[int, int]:
+        self._check_open()
+        return self._error_code, 0
+
+    def get_device_status(self) -> tuple[bool, RLinkDevStatus, int]:
+        self._check_open()
+        return False, RLinkDevStatus.FOCUS, 0
+
+    def get_status_flags(self) -> int:
+        return 0
+
+    def set_logging(self, enable: bool):
+        pass
+
+    def set_log_file(self, filename: str) -> bool:
+        return True
@@ -0,0 +1,186 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import time
+import threading
+import struct
+import sys
+import contextlib
+
+from full_rlink_wrapper import RLinkError
+
+# --- Konfiguration ---
+# Pro Quelle: RLink-Getter, Abtastrate, Totband für das Publizieren, ZMQ-Topic und Binärformat (Big-Endian).
+# "speed" wird weiterhin als topic_float (nur true_speed) gesendet, damit die ML2-App unverändert funktioniert.
+TELEMETRY_SOURCES = {
+    "speed": {"getter": "get_speed", "rate_hz": 20.0, "deadband": 0.02,
+              "topic": b"topic_float", "format": ">f", "fields": (1,)},
+    "velocity": {"getter": "get_velocity", "rate_hz": 10.0, "deadband": 0.02,
+                 "topic": b"velocity", "format": ">fff", "fields": (0, 1, 2)},
+    "battery": {"getter": "get_battery_info", "rate_hz": 0.5, "deadband": 0.5,
+                "topic": b"battery", "format": ">?Bf", "fields": (0, 1, 2)},
+    "device_status": {"getter": "get_device_status", "rate_hz": 1.0, "deadband": 0,
+                      "topic": b"device_status", "format": ">?iB", "fields": (0, 1, 2)},
+    "error_codes": {"getter": "get_error_codes", "rate_hz": 1.0, "deadband": 0,
+                    "topic": b"error_codes", "format": ">HH", "fields": (0, 1)},
+    "status_flags": {"getter": "get_status_flags", "rate_hz": 2.0, "deadband": 0,
+                     "topic": b"status_flags", "format": ">I", "fields": None},
+}
+KEEPALIVE_INTERVAL = 2.0  # Sekunden: unveränderte Werte werden spätestens so oft erneut gesendet
+ERROR_LOG_EVERY = 100     # Bei Dauerfehlern nur jede n-te Meldung ausgeben
+
+
+class TelemetryValue:
+    """Unveränderlicher Messwert im Snapshot."""
+    __slots__ = ("values", "timestamp")
+
+    def __init__(self, values, timestamp):
+        self.values = values
+        self.timestamp = timestamp
+
+
+class _Source:
+    def __init__(self, name, spec):
+        self.name = name
+        self.getter_name = spec["getter"]
+        self.period = 1.0 / max(0.01, float(spec["rate_hz"]))
+        self.deadband = float(spec.get("deadband", 0))
+        self.topic = spec["topic"]
+        self.packer = struct.Struct(spec["format"])  # Vorkompiliert
+        self.fields = spec.get("fields")
+        self.next_due = 0.0
+        self.error_count = 0
+        # Publizier-Zustand (nur vom publizierenden Thread benutzt)
+        self.last_published = None
+        self.last_publish_time = 0.0
+
+
+class TelemetrySampler:
+    """
+    Fragt eine konfigurierbare Menge von RLink-Gettern auf einem eigenen Thread ab,
+    jeden mit eigener Rate. Die RLink-Getter benutzen vorallokierte ctypes-Out-Parameter,
+    deshalb ist dieser Thread der einzige Aufrufer. Mit 'lock' läuft jeder Getter unter dem
+    Lock, mit dem auch die übrigen RLink-Aufrufe (Fahren, Heartbeat) serialisiert werden.
+
+    Leser bekommen über get_snapshot() ein Dict, das nie verändert wird. Der Sampler
+    ersetzt nur die Referenz (atomar unter dem GIL) und braucht daher kein Lock.
+    """
+
+    def __init__(self, rlink, sources=None, keepalive_interval=KEEPALIVE_INTERVAL, lock=None):
+        self.rlink = rlink
+        self._rlink_lock = lock if lock is not None else contextlib.nullcontext()
+        self.keepalive_interval = keepalive_interval
+        specs = TELEMETRY_SOURCES if sources is None else sources
+        self._sources = [_Source(name, spec) for name, spec in specs.items()]
+        self._snapshot = {}
+        self.quit_event = threading.Event()
+        self.thread = None
+        self.sample_count = 0
+
+    # --- Lesen ---
+    def get_snapshot(self) -> dict:
+        """{name: TelemetryValue} - darf vom Aufrufer nicht verändert werden."""
+        return self._snapshot
+
+    def get_value(self, name, default=None):
+        entry = self._snapshot.get(name)
+        return entry.values if entry is not None else default
+
+    def is_running(self) -> bool:
+        return self.thread is not None and self.thread.is_alive()
+
+    # --- Publizieren (Aufruf aus dem Server-Thread) ---
+    def collect_updates(self, now=None) -> list:
+        """
+        Gibt [(topic, payload), ...] für alle Werte zurück, die sich um mehr als das Totband
+        geändert haben oder deren Keep-Alive fällig ist.
+        """
+        if now is None:
+            now = time.monotonic()
+        snapshot = self._snapshot
+        updates = []
+        for source in self._sources:
+            entry = snapshot.get(source.name)
+            if entry is None:
+                continue
+            values = entry.values
+            if not isinstance(values, tuple):
+                values = (values,)
+            if source.fields is not None:
+                values = tuple(values[i] for i in source.fields)
+            if (source.last_published is None
+                    or now - source.last_publish_time >= self.keepalive_interval
+                    or self._exceeds_deadband(values, source.last_published, source.deadband)):
+                try:
+                    updates.append((source.topic, source.packer.pack(*values)))
+                except struct.error as e:
+                    print(f"Telemetrie: Kann '{source.name}' nicht packen: {e}", file=sys.stderr)
+                    continue
+                source.last_published = values
+                source.last_publish_time = now
+        return updates
+
+    def force_publish(self):
+        """Beim nächsten collect_updates() alles senden (z.B. nach neuer ML2-Verbindung)."""
+        for source in self._sources:
+            source.last_published = None
+
+    @staticmethod
+    def _exceeds_deadband(values, last_values, deadband):
+        for new, old in zip(values, last_values):
+            if abs(new - old) > deadband:
+                return True
+        return False
+
+    # --- Sampler-Thread ---
+    def _sample(self, source, now):
+        try:
+            with self._rlink_lock:
+                values = getattr(self.rlink, source.getter_name)()
+        except Exception as e:
+            # Nicht nur RLinkError: z.B. ValueError bei unbekanntem Gerätestatus darf den Thread nicht beenden
+            source.error_count += 1
+            if source.error_count % ERROR_LOG_EVERY == 1:
+                kind = "" if isinstance(e, RLinkError) else f"{type(e).__name__}: "
+                print(f"Telemetrie: Fehler bei {source.getter_name} ({source.error_count}x): {kind}{e}", file=sys.stderr)
+            return None
+        source.error_count = 0
+        return TelemetryValue(values, now)
+
+    def _sampler_thread_func(self):
+        print(f"Telemetry sampler started ({', '.join(s.name for s in self._sources)}).")
+        while not self.quit_event.is_set():
+            now = time.monotonic()
+            due = [s for s in self._sources if s.next_due <= now]
+            if due:
+                new_values = {}
+                for source in due:
+                    source.next_due = now + source.period
+                    value = self._sample(source, now)
+                    if value is not None:
+                        new_values[source.name] = value
+                if new_values:
+                    snapshot = dict(self._snapshot)
+                    snapshot.update(new_values)
+                    self._snapshot = snapshot  # Referenztausch, Leser sehen alt oder neu, nie halb
+                    self.sample_count += len(new_values)
+            next_due = min(s.next_due for s in self._sources)
+            self.quit_event.wait(max(0.0, next_due - time.monotonic()))
+        print("Telemetry sampler finished.")
+
+    def start(self):
+        if not self._sources:
+            print("Telemetrie: Keine Quellen konfiguriert, Sampler wird nicht gestartet.")
+            return False
+        if self.is_running():
+            print("Telemetry sampler läuft bereits.")
+            return False
+        self.quit_event.clear()
+        self.thread = threading.Thread(target=self._sampler_thread_func, name="TelemetrySampler", daemon=True)
+        self.thread.start()
+        return True
+
+    def stop(self):
+        self.quit_event.set()
+        if self.thread and self.thread.is_alive():
+            self.thread.join(timeout=1.0)
@@ -0,0 +1,12 @@
+# conftest.py
+# Gemeinsame Einstellungen für die pytest-Tests der reinen Logik (ohne Hardware, ohne ZMQ).
+# Aufruf aus .venv/Scripts:  python -m pytest tests
+import os
+import sys
+
+# Simulierter RLink statt libMspRlink.so (muss vor dem ersten Import von full_rlink_wrapper gesetzt sein)
+os.environ.setdefault("RLINK_BACKEND", "sim")
+
+SCRIPTS_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if SCRIPTS_DIR not in sys.path:
+    sys.path.insert(0, SCRIPTS_DIR)
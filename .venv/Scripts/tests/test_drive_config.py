@@ -0,0 +1,122 @@
+# test_drive_config.py
+# Validierung der Fahrkonfiguration und Kennlinien des ResponseCurves-Snapshots.
+import math
+import threading
+
+import pytest
+
+from drive_config import DEFAULT_CONFIG, ConfigWatcher, ResponseCurves, parse_config
+
+
+def make_curves(**overrides):
+    config, warnings = parse_config(dict(DEFAULT_CONFIG, **overrides))
+    assert warnings == []
+    return ResponseCurves(config)
+
+
+def legacy_target(config, gear, raw):
+    """Frühere Berechnung aus WheelchairControlReal._set_direction (lineare Kennlinie)."""
+    max_factor = config["gear_factors"][str(gear)]
+    min_output = min(config["min_rlink_command"] / 127.0, max_factor)
+    deadzone = config["pi_side_deadzone"]
+    if abs(raw) < deadzone:
+        return 0.0
+    normalized = (abs(raw) - deadzone) / (1.0 - deadzone)
+    return math.copysign((min_output + normalized * max(0.0, max_factor - min_output)) * 127.0, raw)
+
+
+def test_parse_config_clamps_and_replaces_invalid_values():
+    config, warnings = parse_config({
+        "gear_factors": {"1": 1.5, "2": "schnell"},
+        "acceleration_step": 0,
+        "pi_side_deadzone": 2.0,
+        "min_rlink_command": 100,
+        "curve_strength": "x",
+        "response_curve": "quadratisch",
+    })
+    assert config["gear_factors"]["1"] == 1.0
+    assert config["gear_factors"]["2"] == DEFAULT_CONFIG["gear_factors"]["2"]
+    assert config["gear_factors"]["5"] == DEFAULT_CONFIG["gear_factors"]["5"]
+    assert config["acceleration_step"] == 0.1
+    assert config["pi_side_deadzone"] == 0.9
+    assert config["min_rlink_command"] == 40
+    assert config["curve_strength"] == DEFAULT_CONFIG["curve_strength"]
+    assert config["response_curve"] == "linear"
+    assert len(warnings) == 3
+
+
+def test_parse_config_rejects_non_object():
+    config, warnings = parse_config(["kein", "dict"])
+    assert config == parse_config(DEFAULT_CONFIG)[0]
+    assert warnings
+
+
+@pytest.mark.parametrize("gear", range(1, 6))
+def test_linear_matches_previous_formula(gear):
+    curves = make_curves()
+    for i in range(-1000, 1001):
+        raw = i / 1000.0
+        target_x, target_y = curves.targets(gear, raw, -raw)
+        expected = legacy_target(curves.config, gear, raw)
+        assert target_x == pytest.approx(expected, abs=1e-9)
+        assert target_y == pytest.approx(-expected, abs=1e-9)
+
+
+@pytest.mark.parametrize("curve", ["linear", "expo", "s_curve"])
+def test_curves_share_endpoints_and_deadzone(curve):
+    curves = make_curves(response_curve=curve, curve_strength=1.0)
+    config = curves.config
+    gear = 3
+    min_target = config["min_rlink_command"]
+    max_target = config["gear_factors"][str(gear)] * 127.0
+    assert curves.targets(gear, 0.05, -0.05) == (0.0, 0.0)  # Innerhalb der Deadzone
+    assert curves.targets(gear, config["pi_side_deadzone"], 0.0)[0] == pytest.approx(min_target)
+    assert curves.targets(gear, 1.0, -1.0) == pytest.approx((max_target, -max_target))
+    assert curves.targets(gear, 5.0, -5.0) == pytest.approx((max_target, -max_target))  # Begrenzt
+    assert curves.targets(gear, math.nan, 0.0) == (0.0, 0.0)
+    # Monoton steigend
+    values = [curves.targets(gear, i / 200.0, 0.0)[0] for i in range(20, 201)]
+    assert all(b >= a - 1e-9 for a, b in zip(values, values[1:]))
+
+
+def test_expo_is_softer_and_s_curve_steeper_around_the_middle():
+    linear = make_curves(response_curve="linear")
+    expo = make_curves(response_curve="expo", curve_strength=1.0)
+    s_curve = make_curves(response_curve="s_curve", curve_strength=1.0)
+    gear = 5
+    low = 0.1 + 0.9 * 0.25  # n = 0.25 nach der Deadzone
+    assert expo.targets(gear, low, 0.0)[0] < linear.targets(gear, low, 0.0)[0]
+    assert s_curve.targets(gear, low, 0.0)[0] < linear.targets(gear, low, 0.0)[0]
+    high = 0.1 + 0.9 * 0.75
+    assert s_curve.targets(gear, high, 0.0)[0] > linear.targets(gear, high, 0.0)[0]
+    # expo: (1-k)n + k n^3 bei k = 1 -> n^3
+    n = 0.25
+    expected = (10 / 127.0 + n ** 3 * (1.0 - 10 / 127.0)) * 127.0
+    assert expo.targets(gear, low, 0.0)[0] == pytest.approx(expected, abs=0.01)
+
+
+def test_axis_scales_apply_per_axis():
+    curves = make_curves(turn_scale=0.5, forward_scale=1.0)
+    target_x, target_y = curves.targets(5, 1.0, 1.0)
+    assert target_x == pytest.approx(0.5 * 127.0)
+    assert target_y == pytest.approx(127.0)
+
+
+def test_each_snapshot_gets_a_new_version():
+    assert make_curves().version < make_curves().version
+
+
+def test_config_watcher_reports_external_changes_only(tmp_path):
+    filepath = tmp_path / "wheelchair_config.json"
+    filepath.write_text("{}")
+    changed = threading.Event()
+    watcher = ConfigWatcher(str(filepath), changed.set, interval=0.1)
+    watcher.start()
+    try:
+        filepath.write_text('{"acceleration_step": 5}')
+        watcher.mark_current()  # Eigenes Speichern: kein Reload
+        assert not changed.wait(0.3)
+        filepath.write_text('{"acceleration_step": 15.5}')
+        assert changed.wait(2.0)
+    finally:
+        watcher.stop()
@@ -0,0 +1,151 @@
+# test_drive_control.py
+# Latest-Wins-Slots und Arbitrierung des DriveControlThread sowie RLinkOutputCache
+# (ohne RLink, der Rollstuhl ist ein Platzhalter).
+import time
+import threading
+
+from drive_control import (DriveControlThread, RLinkOutputCache, SOURCE_ML2, SOURCE_GAMEPAD, PRIORITY_GAMEPAD,
+                           JOYSTICK_INPUT_TIMEOUT)
+from telemetry import TelemetrySampler
+
+
+class FakeWheelchair:
+    """Nimmt nur auf, was der DriveControlThread aufruft."""
+
+    def __init__(self):
+        self.directions = []
+        self.applied = threading.Event()
+        self.command_writer = None
+        self.last_set_xy_time = None
+
+    def set_command_writer(self, writer):
+        self.command_writer = writer
+
+    def set_direction(self, direction):
+        self.directions.append(direction)
+        self.last_set_xy_time = time.monotonic()
+        if direction != (0.0, 0.0):
+            self.applied.set()
+
+    def apply_outputs(self):
+        pass
+
+    def send_rlink_heartbeat(self):
+        return True
+
+    def get_output_stats(self):
+        return {"sent": {"set_xy": 1}, "suppressed": {}}
+
+
+def test_latest_position_wins():
+    control = DriveControlThread(FakeWheelchair())
+    for direction in ((0.1, 0.1), (0.2, 0.2), (0.3, 0.4)):
+        control.submit(direction, recv_time=100.0)
+    source, direction, recv_time = control._select_source(100.1)
+    assert (source, direction, recv_time) == (SOURCE_ML2, (0.3, 0.4), 100.0)
+    assert control.received_count == 3
+    assert control.collapsed_count == 2
+
+
+def test_applied_position_is_held_until_timeout():
+    control = DriveControlThread(FakeWheelchair())
+    control.submit((0.5, 0.5), recv_time=100.0)
+    control._select_source(100.0)
+    # Keine neue Nachricht: Position wird gehalten, aber nicht erneut als neu gemeldet
+    assert control._select_source(100.0 + JOYSTICK_INPUT_TIMEOUT / 2) == (SOURCE_ML2, (0.5, 0.5), None)
+    assert control._select_source(100.0 + JOYSTICK_INPUT_TIMEOUT + 0.01) == (None, (0.0, 0.0), None)
+
+
+def test_stop_motion_and_unknown_source():
+    control = DriveControlThread(FakeWheelchair())
+    control.submit((0.5, 0.5))
+    control.stop_motion()
+    assert control._select_source(time.monotonic())[1] == (0.0, 0.0)
+    assert control.submit((0.5, 0.5), source="unbekannt") is False
+
+
+def test_thread_applies_position_and_releases_writer():
+    wheelchair = FakeWheelchair()
+    control = DriveControlThread(wheelchair, rate_hz=200.0)
+    control.start()
+    try:
+        assert wheelchair.command_writer is control
+        control.submit((0.0, 0.7))
+        assert wheelchair.applied.wait(1.0)
+        assert (0.0, 0.7) in wheelchair.directions
+    finally:
+        control.stop()
+    assert wheelchair.command_writer is None
+    assert control.get_latency_stats()["receive_to_ramp"]["count"] >= 1
+
+
+def test_higher_priority_source_wins_while_active():
+    control = DriveControlThread(FakeWheelchair())
+    control.register_source(SOURCE_GAMEPAD, PRIORITY_GAMEPAD, timeout=0.5)
+    control.submit((0.0, 0.8), recv_time=100.0, source=SOURCE_ML2)
+    control.submit((0.0, -0.3), recv_time=100.0, source=SOURCE_GAMEPAD)
+    assert control._select_source(100.1)[:2] == (SOURCE_GAMEPAD, (0.0, -0.3))
+    # Gamepad meldet sich nicht mehr, ML2 sendet weiter: nach dem Gamepad-Timeout fährt die ML2
+    control.submit((0.0, 0.8), recv_time=100.4, source=SOURCE_ML2)
+    assert control._select_source(100.45)[0] == SOURCE_GAMEPAD
+    assert control._select_source(100.55)[:2] == (SOURCE_ML2, (0.0, 0.8))
+
+
+def test_unregistered_source_no_longer_drives():
+    control = DriveControlThread(FakeWheelchair())
+    control.register_source(SOURCE_GAMEPAD, PRIORITY_GAMEPAD, timeout=0.5)
+    control.submit((0.5, 0.0), recv_time=100.0, source=SOURCE_GAMEPAD)
+    control.unregister_source(SOURCE_GAMEPAD)
+    assert control._select_source(100.1) == (None, (0.0, 0.0), None)
+    stats = control.get_arbitration_stats()
+    assert stats["sources"] == [SOURCE_ML2]
+    assert stats["sent"] == {"set_xy": 1}
+
+
+def test_output_cache_suppresses_unchanged_values():
+    cache = RLinkOutputCache()
+    sent = []
+    assert cache.send("set_xy", None, (1, 2), lambda *args: sent.append(args), 1, 2)
+    assert not cache.send("set_xy", None, (1, 2), lambda *args: sent.append(args), 1, 2)
+    assert cache.send("set_light", 1, True, lambda *args: sent.append(args), 1, True)
+    assert cache.send("set_light", 2, True, lambda *args: sent.append(args), 2, True)  # Eigener Schlüssel
+    assert not cache.pending("set_light", 1, True)
+    assert sent == [(1, 2), (1, True), (2, True)]
+    assert cache.snapshot() == {"sent": {"set_xy": 1, "set_light": 2}, "suppressed": {"set_xy": 1}}
+    cache.invalidate()
+    assert cache.pending("set_xy", None, (1, 2))
+
+
+def test_output_cache_resends_after_failed_send():
+    cache = RLinkOutputCache()
+
+    def failing_send(*args):
+        raise RuntimeError("RLink nicht erreichbar")
+
+    try:
+        cache.send("set_xy", None, (5, 5), failing_send, 5, 5)
+    except RuntimeError:
+        pass
+    assert cache.pending("set_xy", None, (5, 5))
+
+
+def test_telemetry_getters_wait_for_the_wheelchair_lock():
+    lock = threading.RLock()
+    sampled = threading.Event()
+
+    class FakeRLink:
+        def get_speed(self):
+            sampled.set()
+            return (0, 0.0, 0)
+
+    sources = {"speed": {"getter": "get_speed", "rate_hz": 50.0, "deadband": 0,
+                         "topic": b"topic_float", "format": ">f", "fields": (1,)}}
+    sampler = TelemetrySampler(FakeRLink(), sources=sources, lock=lock)
+    with lock:  # Wie ein laufender set_direction-Aufruf
+        sampler.start()
+        blocked = not sampled.wait(0.2)
+    try:
+        assert blocked
+        assert sampled.wait(2.0)
+    finally:
+        sampler.stop()
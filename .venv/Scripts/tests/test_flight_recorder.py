@@ -0,0 +1,54 @@
+# test_flight_recorder.py
+# Ringdatei des Fahrtenschreibers: Überlauf, Reihenfolge beim Lesen und Sitzungen.
+import pytest
+
+pytest.importorskip("numpy")  # Nur zum Lesen nötig
+from flight_recorder import FlightRecorder, load_records, list_sessions, read_header
+
+CAPACITY = 8
+
+
+def write(filepath, count, first_t=0.0, capacity=CAPACITY):
+    recorder = FlightRecorder(filepath, capacity=capacity)
+    try:
+        for i in range(count):
+            recorder.record(0.1, 0.2, 10.0, 20.0, i % 100, -(i % 100), 3, 0, 1.5, timestamp=first_t + i)
+        return recorder.session
+    finally:
+        recorder.close()
+
+
+def test_records_are_read_back_in_order(tmp_path):
+    filepath = str(tmp_path / "fr.bin")
+    write(filepath, 5)
+    records = load_records(filepath)
+    assert list(records["t"]) == [0.0, 1.0, 2.0, 3.0, 4.0]
+    assert list(records["seq"]) == [0, 1, 2, 3, 4]
+    assert list(records["sent_y"]) == [0, -1, -2, -3, -4]
+    assert read_header(filepath)["record_count"] == 5
+
+
+def test_ring_wraparound_keeps_newest_records_oldest_first(tmp_path):
+    filepath = str(tmp_path / "fr.bin")
+    write(filepath, CAPACITY * 2 + 3)
+    records = load_records(filepath)
+    assert len(records) == CAPACITY
+    assert list(records["seq"]) == list(range(CAPACITY + 3, CAPACITY * 2 + 3))
+
+
+def test_sessions_continue_the_ring(tmp_path):
+    filepath = str(tmp_path / "fr.bin")
+    first = write(filepath, 5)
+    second = write(filepath, 5, first_t=100.0)
+    assert second == first + 1
+    records = load_records(filepath)
+    assert list_sessions(records) == [first, second]
+    assert len(records) == CAPACITY  # 10 Datensätze, die ältesten zwei überschrieben
+    assert list(load_records(filepath, session=-1)["t"]) == [100.0, 101.0, 102.0, 103.0, 104.0]
+
+
+def test_other_capacity_recreates_the_file(tmp_path):
+    filepath = str(tmp_path / "fr.bin")
+    write(filepath, 5)
+    assert write(filepath, 2, capacity=CAPACITY * 2) == 1
+    assert len(load_records(filepath)) == 2
@@ -0,0 +1,69 @@
+# test_protocol.py
+# Frame-Kodierung und LinkStats (Verlust, Duplikate, Umordnung, Neustart des Senders).
+import pytest
+
+import protocol
+from protocol import LinkStats, ProtocolError, REORDER_WINDOW, SEQUENCE_MODULO
+
+
+def feed(stats, sequence):
+    return [stats.update(seq, 0, 0) for seq in sequence]
+
+
+def test_state_and_input_frames_round_trip():
+    frame = protocol.encode_state_frame(7, 3, protocol.STATE_FLAG_LIGHTS, 1.5, 200, -200, 80, timestamp_us=123)
+    assert protocol.decode_state_frame(frame) == (7, 123, 3, protocol.STATE_FLAG_LIGHTS, 1.5, 127, -127, 80)
+    frame = protocol.encode_input_frame(SEQUENCE_MODULO + 2, 0.5, -0.25, protocol.INPUT_LEVEL_HORN,
+                                        protocol.EVENT_GEAR_UP, 9, timestamp_us=456)
+    assert protocol.decode_input_frame(frame) == (2, 456, 0.5, -0.25, protocol.INPUT_LEVEL_HORN,
+                                                  protocol.EVENT_GEAR_UP, 9)
+
+
+def test_wrong_length_or_version_is_rejected():
+    frame = protocol.encode_input_frame(1, 0.0, 0.0)
+    with pytest.raises(ProtocolError):
+        protocol.decode_input_frame(frame[:-1])
+    with pytest.raises(ProtocolError):
+        protocol.decode_input_frame(bytes([protocol.PROTOCOL_VERSION + 1]) + frame[1:])
+
+
+def test_loss_is_counted_and_newer_frames_are_applied():
+    stats = LinkStats()
+    assert feed(stats, (10, 11, 14, 15)) == [True] * 4
+    assert stats.snapshot()["lost"] == 2
+
+
+def test_duplicate_and_late_frames_are_not_applied():
+    stats = LinkStats()
+    assert feed(stats, (1, 2, 4, 4, 3)) == [True, True, True, False, False]
+    snapshot = stats.snapshot()
+    assert (snapshot["duplicates"], snapshot["reordered"], snapshot["lost"]) == (1, 1, 0)
+
+
+def test_sequence_wraparound_is_not_a_restart():
+    stats = LinkStats()
+    assert feed(stats, (SEQUENCE_MODULO - 2, SEQUENCE_MODULO - 1, 0, 1)) == [True] * 4
+    snapshot = stats.snapshot()
+    assert (snapshot["lost"], snapshot["restarts"]) == (0, 0)
+
+
+def test_large_backward_jump_restarts_the_stream():
+    stats = LinkStats()
+    feed(stats, range(1000, 1010))
+    # App-Neustart: Sequenz beginnt wieder klein, alle Frames müssen angewendet werden
+    assert feed(stats, (0, 1, 2)) == [True, True, True]
+    snapshot = stats.snapshot()
+    assert (snapshot["restarts"], snapshot["reordered"]) == (1, 0)
+    # Innerhalb des Fensters bleibt es Umordnung
+    feed(stats, range(3, 3 + REORDER_WINDOW + 1))
+    assert stats.update(3 + REORDER_WINDOW // 2, 0, 0) is False
+    assert stats.snapshot()["reordered"] == 1
+
+
+def test_latency_is_relative_to_fastest_frame():
+    stats = LinkStats()
+    stats.update(1, sender_timestamp_us=1_000, recv_timestamp_us=6_000)
+    stats.update(2, sender_timestamp_us=2_000, recv_timestamp_us=9_000)
+    snapshot = stats.snapshot()
+    assert snapshot["latency_max_ms"] == pytest.approx(2.0)
+    assert snapshot["latency_avg_ms"] == pytest.approx(1.0)
@@ -0,0 +1,53 @@
+# test_rear_camera.py
+# Ringpuffer und adaptive Qualität der RearCamera (ohne Kamera: Picamera2 ist hier nicht verfügbar).
+import pytest
+
+pytest.importorskip("cv2")  # RearCamera importiert OpenCV
+import RearCamera as rear_camera_module
+from RearCamera import (RearCamera, EncodedFrame, ENCODE_BUDGET_S, FRAME_RING_SIZE, JPEG_QUALITY_MAX,
+                        JPEG_QUALITY_MIN, JPEG_QUALITY_STEP, RECOVER_AFTER_FRAMES, SCALE_LEVELS)
+
+
+@pytest.fixture
+def camera(monkeypatch):
+    monkeypatch.setattr(rear_camera_module, "Picamera2", None)
+    cam = RearCamera()
+    yield cam
+    cam.close()
+
+
+def push_frame(camera, seq):
+    with camera._frames_lock:
+        camera._frames.append(EncodedFrame(seq, b"", 0.0, 0.0, camera.jpeg_quality, 1.0))
+
+
+def test_latest_frame_is_handed_out_once_and_skipped_frames_count_as_dropped(camera):
+    assert camera.get_latest_frame() is None
+    push_frame(camera, 1)
+    assert camera.get_latest_frame().seq == 1
+    assert camera.get_latest_frame() is None
+    for seq in range(2, 2 + FRAME_RING_SIZE + 1):
+        push_frame(camera, seq)
+    assert camera.get_latest_frame().seq == FRAME_RING_SIZE + 2
+    assert camera.frames_dropped == FRAME_RING_SIZE
+
+
+def test_slow_encoding_lowers_quality_then_scale(camera):
+    steps_to_min = (JPEG_QUALITY_MAX - JPEG_QUALITY_MIN + JPEG_QUALITY_STEP - 1) // JPEG_QUALITY_STEP
+    for _ in range(steps_to_min):
+        camera._adapt_quality(ENCODE_BUDGET_S * 2)
+    assert camera.jpeg_quality == JPEG_QUALITY_MIN
+    assert camera._scale_index == 0
+    for _ in range(len(SCALE_LEVELS) + 2):
+        camera._adapt_quality(ENCODE_BUDGET_S * 2)
+    assert camera._scale_index == len(SCALE_LEVELS) - 1
+
+
+def test_congestion_lowers_quality_and_fast_encoding_recovers(camera):
+    camera.report_congestion()
+    camera._adapt_quality(0.0001)
+    assert camera.jpeg_quality == JPEG_QUALITY_MAX - JPEG_QUALITY_STEP
+    assert camera.frames_dropped == 1
+    for _ in range(RECOVER_AFTER_FRAMES):
+        camera._adapt_quality(0.0001)
+    assert camera.jpeg_quality == JPEG_QUALITY_MAX
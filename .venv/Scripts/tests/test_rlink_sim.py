@@ -0,0 +1,47 @@
+# test_rlink_sim.py
+# Simulierter RLink: Aufzeichnung, Wertebereich, Verhalten ohne open() und Trägheitsmodell.
+import pytest
+
+from full_rlink_wrapper import RLinkError, RLinkLight
+from rlink_sim import SimulatedRLink
+
+
+@pytest.fixture
+def rlink():
+    sim = SimulatedRLink()
+    sim.open()
+    yield sim
+    sim.destruct()
+
+
+def test_calls_are_recorded_and_values_clamped(rlink):
+    rlink.set_xy(300, -300)
+    rlink.heartbeat()
+    rlink.set_light(RLinkLight.DIP, True)
+    assert [call.args for call in rlink.get_calls("set_xy")] == [(127, -127)]
+    assert [call.name for call in rlink.get_calls()] == ["open", "set_xy", "heartbeat", "set_light"]
+    assert rlink.get_light(RLinkLight.DIP) == (True, True)
+    rlink.clear_calls()
+    assert rlink.get_calls() == []
+
+
+def test_closed_device_ignores_writes_and_rejects_getters():
+    sim = SimulatedRLink()
+    sim.set_xy(50, 50)
+    assert sim.get_calls() == []
+    with pytest.raises(RLinkError):
+        sim.get_speed()
+
+
+def test_speed_follows_set_xy_with_inertia(rlink):
+    start = rlink._model_time
+    rlink.set_xy(0, 127)
+    with rlink._model_lock:
+        rlink._update_model(start + rlink.time_constant)
+    # PT1 nach einer Zeitkonstante: ca. 63 % der Zielgeschwindigkeit
+    assert rlink._speed_left == pytest.approx(0.632, abs=0.02)
+    with rlink._model_lock:
+        rlink._update_model(start + 20 * rlink.time_constant)
+    speed_percent, true_speed, _ = rlink.get_speed()
+    assert speed_percent == 100
+    assert true_speed == pytest.approx(rlink.max_speed_kmh, rel=1e-3)
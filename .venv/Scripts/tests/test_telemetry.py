@@ -0,0 +1,80 @@
+# test_telemetry.py
+# Totband, Keep-Alive und Fehlerbehandlung des TelemetrySampler (RLink ist ein Platzhalter).
+import struct
+import threading
+
+from telemetry import TelemetrySampler, TelemetryValue
+
+SPEED_SOURCE = {"speed": {"getter": "get_speed", "rate_hz": 20.0, "deadband": 0.02,
+                          "topic": b"topic_float", "format": ">f", "fields": (1,)}}
+KEEPALIVE = 2.0
+
+
+class FakeRLink:
+    def __init__(self):
+        self.speed = (0, 1.0, 0)
+        self.calls = 0
+        self.sampled = threading.Event()
+
+    def get_speed(self):
+        self.calls += 1
+        if self.calls >= 3:
+            self.sampled.set()
+        return self.speed
+
+    def get_device_status(self):
+        raise ValueError("unbekannter Gerätestatus")
+
+
+def make_sampler(rlink=None, sources=SPEED_SOURCE):
+    return TelemetrySampler(rlink or FakeRLink(), sources=sources, keepalive_interval=KEEPALIVE)
+
+
+def set_speed(sampler, true_speed, now=0.0):
+    sampler._snapshot = {"speed": TelemetryValue((0, true_speed, 0), now)}
+
+
+def test_first_value_is_published_then_only_changes_beyond_deadband():
+    sampler = make_sampler()
+    assert sampler.collect_updates(now=0.0) == []
+    set_speed(sampler, 1.0)
+    assert sampler.collect_updates(now=0.0) == [(b"topic_float", struct.pack(">f", 1.0))]
+    set_speed(sampler, 1.01)  # Innerhalb des Totbands
+    assert sampler.collect_updates(now=0.1) == []
+    set_speed(sampler, 1.5)
+    assert sampler.collect_updates(now=0.2) == [(b"topic_float", struct.pack(">f", 1.5))]
+
+
+def test_unchanged_value_is_repeated_after_keepalive():
+    sampler = make_sampler()
+    set_speed(sampler, 1.0)
+    assert len(sampler.collect_updates(now=10.0)) == 1
+    assert sampler.collect_updates(now=10.0 + KEEPALIVE - 0.01) == []
+    assert len(sampler.collect_updates(now=10.0 + KEEPALIVE)) == 1
+
+
+def test_force_publish_resends_everything():
+    sampler = make_sampler()
+    set_speed(sampler, 1.0)
+    sampler.collect_updates(now=0.0)
+    sampler.force_publish()
+    assert len(sampler.collect_updates(now=0.1)) == 1
+
+
+def test_failing_getter_is_counted_and_does_not_stop_the_sampler():
+    sources = dict(SPEED_SOURCE)
+    sources["device_status"] = {"getter": "get_device_status", "rate_hz": 50.0, "deadband": 0,
+                                "topic": b"device_status", "format": ">?iB", "fields": (0, 1, 2)}
+    rlink = FakeRLink()
+    sampler = make_sampler(rlink, sources)
+    sampler.start()
+    try:
+        assert rlink.sampled.wait(2.0)
+        assert sampler.is_running()
+    finally:
+        sampler.stop()
+    failing = next(s for s in sampler._sources if s.name == "device_status")
+    assert failing.error_count >= 1
+    assert sampler.get_value("speed") == (0, 1.0, 0)
+    assert sampler.get_value("device_status") is None
+